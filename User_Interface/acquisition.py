@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de adquisición de Sampler. Contiene el hilo lector encargado de vaciar continuamente el puerto COM del microcontrolador
+# para que la velocidad de adquisición no dependa de la velocidad con la que la interfaz gráfica se actualiza.
+
+import threading
+import queue
+import serial
+
+
+class serialReader(threading.Thread):                   # Clase del hilo de adquisición. Hereda de threading.Thread
+    def __init__(self, port, pollTimeout=0.05):         # Requiere el objeto 'serial.Serial' ya abierto. El hilo se vuelve su único dueño
+        super().__init__(daemon=True)
+        self.port = port
+        self.port.timeout = pollTimeout                 # Timeout corto para que el hilo revise periódicamente si debe detenerse
+        self.chunks = queue.SimpleQueue()               # Cola segura entre hilos donde se guardan los bloques de bytes recibidos
+        self.tail = b""                                 # Fragmento de linea incompleto del último bloque entregado por 'drainLines()'
+        self.writeLock = threading.Lock()               # Candado para serializar las escrituras de ordenes al microcontrolador
+        self.stopEvent = threading.Event()
+        self.error = None                               # Última excepción del puerto, en caso de que la conexión se haya perdido
+        self.waiting = 0                                # Bytes pendientes en el buffer del puerto en la última lectura ('in_waiting'). Vease 'metrics.py'
+        self.bytesRead = 0                              # Bytes leidos del puerto por este hilo y bytes entregados por 'drainBytes()'. Cada uno lo escribe un solo hilo; su
+        self.bytesDrained = 0                           # diferencia es la cantidad de bytes en la cola
+
+    def run(self):                                      # Bucle principal del hilo. Ejecuta:
+        while not self.stopEvent.is_set():
+            try:                                        # -> Leer todos los bytes disponibles en el buffer del puerto COM (al menos 1,
+                self.waiting = self.port.in_waiting     #    bloqueando como máximo 'pollTimeout' segundos)
+                chunk = self.port.read(max(1, self.waiting))
+            except (serial.SerialException, OSError) as e:
+                self.error = e                          # -> En caso de error, guardar la excepción y terminar el hilo
+                break
+            if chunk:
+                self.chunks.put(chunk)                  # -> Insertar los bytes recibidos en la cola, sin interpretarlos
+                self.bytesRead += len(chunk)
+
+    def drainBytes(self):                               # Método llamado por la interfaz para obtener todos los bytes acumulados desde la última llamada.
+        chunks = []                                     # Los bytes se entregan tal cual, para que el decodificador del formato activo (ASCII o
+        try:                                            # binario, vease 'protocol.py') se encargue de separarlos
+            while True:
+                chunks.append(self.chunks.get_nowait())
+        except queue.Empty:
+            pass
+        data = b"".join(chunks)
+        self.bytesDrained += len(data)
+        return data
+
+    def drainLines(self):                               # Método llamado por la interfaz para obtener todas las lineas completas acumuladas desde la última llamada.
+        parts = (self.tail + self.drainBytes()).split(b"\n")   # El último fragmento sin terminador se conserva para la siguiente llamada
+        self.tail = parts.pop()
+        return [line + b"\n" for line in parts]
+
+    def write(self, data):                              # Método para enviar ordenes al microcontrolador desde cualquier hilo
+        with self.writeLock:
+            self.port.write(data)
+
+    def setBaudrate(self, rate):                        # Método para cambiar la velocidad del puerto COM durante el saludo. Vease 'protocol.negotiateBaudrate()'
+        with self.writeLock:
+            self.port.baudrate = rate
+
+    def reset(self):                                    # Método para descartar todos los datos pendientes, tanto del puerto COM como de la cola
+        self.port.reset_input_buffer()
+        self.drainBytes()
+        self.tail = b""
+
+    def stop(self):                                     # Método para detener el hilo y cerrar el puerto COM
+        self.stopEvent.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+        self.port.close()
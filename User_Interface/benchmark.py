@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Banco de mediciones de rendimiento de Sampler. Ejecuta sin pantalla (plataforma 'offscreen' de Qt, lienzo Agg de Matplotlib)
+# las etapas del recorrido de las lecturas, desde los bytes recibidos hasta el cuadro dibujado:
+#
+#   parse       Decodificación de bloques ASCII y binarios (vease 'protocol.py')
+#   buffer      Inserción en los canales de la sesión y crecimiento de sus vectores (vease 'storage.py')
+#   filter      Cadenas de filtros por canal (vease 'filters.py')
+#   render      Actualización de la pirámide de decimación y dibujo de cuadros completos y por blitting
+#   startup     Arranque en frío de la aplicación hasta el primer cuadro, por etapas (vease 'startup.py')
+#   pipeline    Aplicación completa conectada al banco de pruebas virtual ('simulator.py') a frecuencias crecientes: lecturas por
+#               segundo sostenidas, latencia de cada lectura (de su generación hasta el cuadro que la dibuja) y crecimiento de memoria
+#   replay      Motor de adquisición alimentado a velocidad máxima con una captura del puerto (vease 'capture.py'): la indicada con
+#               '--capture' (p. ej. tráfico real de un banco) o una grabada del banco de pruebas virtual
+#
+# Los resultados se pueden guardar como referencia y comparar en ejecuciones posteriores para detectar regresiones:
+#
+#   python benchmark.py --save                      Medir y guardar la referencia en 'benchmark_baseline.json'
+#   python benchmark.py                             Medir y comparar contra la referencia guardada
+#   python benchmark.py --quick --only parse buffer Medición corta de algunas etapas
+#   python benchmark.py --no-compare                Medir sin comparar
+#
+# El repositorio incluye una referencia medida con la ejecución completa (sin '--quick') en la máquina indicada en su campo 'machine'.
+# Los tiempos dependen de la máquina, por lo que conviene guardar una referencia propia antes de comparar. Si la referencia no existe
+# o no se puede leer, la comparación falla (código de salida 2) en lugar de omitirse; '--no-compare' únicamente mide.
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import platform
+import resource
+import shutil
+import struct
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from protocol import asciiDecoder, binaryDecoder
+from storage import recordedData, CHANNELS
+from decimation import minMaxPyramid
+from simulator import SIM_PORT, virtualTestBank
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+STAGES = ("parse", "buffer", "filter", "render", "startup", "pipeline", "replay")
+
+
+class results:                                          # Clase que acumula las mediciones. Cada medición indica si un valor mayor es mejor ('higher') o peor ('lower')
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, unit, better="lower"):
+        self.metrics[name] = {"value": float(value), "unit": unit, "better": better}
+        print("  %-44s %14.3f %s" % (name, value, unit))
+
+    def timings(self, name, samples, unit="us"):        # Método que guarda la mediana y los percentiles 95 y 99 de un conjunto de duraciones (s)
+        scaled = np.asarray(samples) * {"us": 1e6, "ms": 1e3}[unit]
+        for (label, q) in (("p50", 50), ("p95", 95), ("p99", 99)):
+            self.add(name + "." + label, np.percentile(scaled, q), unit)
+
+
+def repeat(function, count):                            # Función que devuelve la duración (s) de cada una de 'count' llamadas a 'function'
+    times = np.empty(count)
+    for k in range(count):
+        t0 = time.perf_counter()
+        function()
+        times[k] = time.perf_counter() - t0
+    return times
+
+
+def rssMB():                                            # Función que devuelve la memoria residente actual del proceso, en MB
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def syntheticStream(lines, binary=False, cellRate=800.0):   # Función que genera un bloque de bytes con al menos 'lines' lecturas del banco de pruebas virtual
+    clock = [0.0]
+    device = virtualTestBank(cellRate=cellRate, clock=lambda: clock[0], seed=0)
+    device.write(b"B" if binary else b"A")
+    device.write(b"X" + b"n" + struct.pack("I", 60) + b"r")
+    device.reset_input_buffer()
+    clock[0] += (lines / 3) / cellRate + 0.001
+    return device.read(device.in_waiting)
+
+
+# ==== Mediciones por etapa ==== #
+
+def benchParse(res, quick):
+    for binary in (False, True):
+        name = "parse.binary" if binary else "parse.ascii"
+        data = syntheticStream(3000, binary)
+        block = data[:len(data)//2]
+        def run():
+            decoder = binaryDecoder() if binary else asciiDecoder()
+            decoder.feed(block)
+        lines = len(binaryDecoder().feed(block)[0]) if binary else len(asciiDecoder().feed(block)[0])
+        times = repeat(run, 50 if quick else 300)
+        res.add(name + ".throughput", lines / np.median(times), "samples/s", "higher")
+        res.timings(name + ".block", times)
+
+
+def benchBuffer(res, quick):
+    for block in (10, 1000):
+        record = recordedData()
+        t = np.arange(block, dtype=np.uint32)
+        y = np.ones(block, np.float32)
+        count = 2000 if quick else 20000
+        times = repeat(lambda: record.extend(t, y), count)
+        res.add("buffer.extend%d.throughput" % block, block / np.median(times), "samples/s", "higher")
+        res.timings("buffer.extend%d.block" % block, times)
+    for n in ((1 << 20,) if quick else (1 << 20, 1 << 23)):
+        times = []
+        for k in range(5):
+            record = recordedData(n)
+            record.dataCount = n
+            t0 = time.perf_counter()
+            record.increaseSize(n + 1)
+            times.append(time.perf_counter() - t0)
+        res.add("buffer.increaseSize.%dk" % (n >> 10), np.median(times) * 1e3, "ms")
+    n = 1_000_000 if quick else 5_000_000                # Memoria por lectura de una sesión larga insertada en bloques de 30 lecturas
+    tracemalloc.start()
+    record = recordedData()
+    t = np.arange(30, dtype=np.uint32)
+    y = np.ones(30, np.float32)
+    for k in range(n // 30):
+        record.extend(t, y)
+    (current, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    res.add("buffer.memory.bytesPerSample", current / len(record), "B")
+    res.add("buffer.memory.peakBytesPerSample", peak / len(record), "B")
+
+
+def benchFilter(res, quick):
+    from engine import samplerEngine
+    from filters import filterChain
+    rng = np.random.default_rng(0)
+    chains = dict(samplerEngine.filterSpec, lowpass="ema:0.2,fir:8")
+    for block in (30, 3000):
+        t = np.arange(block, dtype=np.uint32) * 2
+        y = np.abs(rng.normal(1, 0.5, block))
+        for (name, spec) in chains.items():
+            chain = filterChain(spec)
+            times = repeat(lambda: chain.apply(t, y), 500 if quick else 5000)
+            res.add("filter.%s%d.throughput" % (name, block), block / np.median(times), "samples/s", "higher")
+            res.timings("filter.%s%d.block" % (name, block), times)
+
+
+def benchRender(res, quick, app):
+    from plotting import plotWindow
+    for n in ((100_000,) if quick else (100_000, 2_000_000)):
+        window = plotWindow()
+        window.renderTimer.stop()
+        window.resize(1200, 500)
+        window.show()
+        app.processEvents()
+        record = recordedData(n)
+        t = (np.arange(n, dtype=np.uint32) * 10)
+        y = np.sin(np.arange(n) / 500).astype(np.float32)
+        pyramid = minMaxPyramid()
+        step = 300                                      # -> Bloque de lecturas que llega en un timeout de 10 ms a ~30 000 lecturas/s
+        record.extend(t[:n - 100*step], y[:n - 100*step])
+        pyramid.update(*record.view())
+        def grow():
+            k = len(record)
+            record.extend(t[k:k+step], y[k:k+step])
+            pyramid.update(*record.view())
+        times = repeat(grow, 100)
+        res.add("render.pyramidUpdate.%dk" % (n // 1000), np.median(times) * 1e3, "ms")
+        window.plot.axesT.set_xlim(0, 10*len(record))
+        window.updatePlot(*record.view(), 0, "T")
+        def fullFrame():
+            window.requestFullRedraw()
+            window.stale.add(("T", 0))
+            window.renderFrame()
+        def blitFrame():
+            window.updatePlot(*record.view(), 0, "T")
+            window.renderFrame()
+        fullFrame()
+        res.add("render.fullFrame.%dk" % (n // 1000), np.median(repeat(fullFrame, 5 if quick else 20)) * 1e3, "ms")
+        res.add("render.blitFrame.%dk" % (n // 1000), np.median(repeat(blitFrame, 20 if quick else 100)) * 1e3, "ms")
+        window.close()
+
+
+def benchStartup(res, quick):                           # Medición del arranque: se ejecuta 'main.py --startup-report --quit' en un proceso nuevo varias veces
+    stages = {}
+    for _ in range(3 if quick else 10):
+        out = subprocess.run([sys.executable, "main.py", "--startup-report", "--quit"], capture_output=True, text=True, timeout=60).stdout
+        for line in out.splitlines():
+            if line.strip().endswith(" ms"):
+                (stage, value) = line.strip()[:-3].rsplit(None, 1)
+                words = stage.split(" (")[0].split()
+                stages.setdefault(words[0] + "".join(w[0].upper() + w[1:] for w in words[1:]), []).append(float(value))
+    for (stage, values) in stages.items():
+        res.add("startup." + stage, np.median(values), "ms")
+
+
+def benchPipeline(res, quick, app, linkFormat="ascii"):    # Medición de la aplicación completa conectada al banco de pruebas virtual
+    import main
+    from simulator import openSimulator
+    duration = 2.0 if quick else 6.0
+    rates = (80, 800) if quick else (80, 400, 800, 1600, 3200)
+    main.Main.spillDir = None
+    for rate in rates:
+        devices = []
+        def opener(port):
+            devices.append(openSimulator(port, cellRate=rate, seed=0))
+            return devices[-1]
+        ui = main.Main(linkFormat, portFinder=lambda: SIM_PORT, portOpener=opener)
+        deadline = time.monotonic() + 10
+        while not ui.engine.isConnected() and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+        ui.updateConnection()
+        stages = {s: [] for s in ("parse", "filter", "buffer", "render")}
+        def timed(function, stage):
+            def wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                out = function(*args, **kwargs)
+                stages[stage].append(time.perf_counter() - t0)
+                return out
+            return wrapper
+        engine = ui.engine
+        engine.decoder.feed = timed(engine.decoder.feed, "parse")
+        engine.filterBlock = timed(engine.filterBlock, "filter")
+        engine.storeBlock = timed(engine.storeBlock, "buffer")
+        ui.modeSweep()
+        ui.showPlot()
+        plot = ui.plot1
+        plot.resize(1200, 500)
+        latencies = []
+        rendered = [0]
+        device = devices[-1]
+        def render():                                   # -> Latencia de cada lectura nueva dibujada: tiempo del cuadro menos su tiempo de generación en el dispositivo
+            t0 = time.perf_counter()
+            plot.renderFrame()
+            end = time.monotonic()
+            stages["render"].append(time.perf_counter() - t0)
+            (t, _) = engine.sessions[-1]["T"].view()
+            if len(t) > rendered[0]:
+                generated = device.start + (device.tp + t[rendered[0]:].astype(np.float64) - device.tk) / 1000
+                latencies.append(end - generated)
+                rendered[0] = len(t)
+        plot.renderTimer.timeout.disconnect()
+        plot.renderTimer.timeout.connect(render)
+        rss0 = rssMB()
+        ui.runSampleSweep()
+        engine.connection.write(b"n" + struct.pack("I", 60))
+        start = time.monotonic()
+        memory = []
+        while time.monotonic() - start < duration:
+            app.processEvents()
+            time.sleep(0.001)
+            memory.append(rssMB())
+        ui.stopSampleSweep()
+        elapsed = time.monotonic() - start
+        stored = len(engine.sessions[-1]["T"])
+        prefix = "pipeline.%dHz" % rate
+        res.add(prefix + ".sustained", 3*stored / elapsed, "samples/s", "higher")
+        res.add(prefix + ".keptUp", 100 * stored / max(rate*elapsed, 1), "%", "higher")
+        if latencies:
+            res.timings(prefix + ".latency", np.concatenate(latencies), "ms")
+        for (stage, times) in stages.items():
+            if times:
+                res.add(prefix + "." + stage + ".perSecond", 1e3 * np.sum(times) / elapsed, "ms/s")
+        res.add(prefix + ".memoryGrowth", (memory[-1] - rss0) if memory else 0, "MB")
+        engine.stop()
+        plot.renderTimer.stop()
+        plot.close()
+        ui.close()
+
+
+def benchReplay(res, quick, path=None):                # Medición del motor de adquisición sin interfaz alimentado con una captura a velocidad máxima
+    import tempfile
+    from capture import REPLAY_PORT, captureOpener, captureFormat, captureLink, readCapture, replayOpener
+    from engine import samplerEngine
+    from simulator import openSimulator
+    directory = None
+    if path is None:                                    # -> Sin captura indicada, grabar una del banco de pruebas virtual en formato binario a 800 Hz
+        directory = tempfile.mkdtemp()
+        engine = samplerEngine("binary", None, portFinder=lambda: SIM_PORT,
+                               portOpener=captureOpener(lambda port: openSimulator(port, cellRate=800, seed=0), directory))
+        engine.log = lambda text: None
+        engine.start()
+        while not engine.isConnected():
+            time.sleep(0.01)
+        engine.pollConnection()
+        engine.selectMode("Manual")
+        engine.startSweep()
+        engine.setThrottle(60)
+        time.sleep(2.0 if quick else 6.0)
+        engine.stop()
+        path = os.path.join(directory, os.listdir(directory)[0])
+    chunks = readCapture(path)
+    if directory is not None:
+        shutil.rmtree(directory)
+    size = sum(len(data) for (_, _, data) in chunks)
+    times = []
+    for _ in range(3 if quick else 5):
+        ports = []
+        engine = samplerEngine(captureFormat(chunks), None, portFinder=lambda: REPLAY_PORT, portOpener=replayOpener(chunks, None, ports), link=captureLink(chunks))
+        engine.log = lambda text: None
+        engine.start()
+        while not engine.isConnected():
+            time.sleep(0.01)
+        engine.pollConnection()
+        engine.selectMode("Manual")
+        t0 = time.perf_counter()
+        engine.startSweep()
+        while not ports[-1].drained:
+            engine.update()
+        engine.readSamples()
+        times.append(time.perf_counter() - t0)
+        stored = sum(len(engine.sessions[-1][c]) for c in CHANNELS)
+        engine.stop()
+    res.add("replay.throughput", stored / np.median(times), "samples/s", "higher")
+    res.add("replay.bytesPerSecond", size / np.median(times) / 1e6, "MB/s", "higher")
+
+
+# ==== Referencias ==== #
+
+def compare(res, report, baselinePath, tolerance):      # Función que compara los resultados con la referencia guardada. Devuelve la cantidad de regresiones, o None si
+    try:                                                # la referencia no existe o no se puede leer
+        with open(baselinePath) as f:
+            saved = json.load(f)
+        baseline = saved["metrics"]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print("\nerror: cannot read the baseline %s (%s). Run with --save to create one, or with --no-compare to only measure." % (baselinePath, e), file=sys.stderr)
+        return None
+    for (key, what) in (("machine", "machine"), ("quick", "--quick setting")):  # -> Advertir si la referencia no es comparable con esta ejecución
+        if saved.get(key) != report[key]:
+            print("\nwarning: the baseline was measured with a different %s (%s); ratios are not comparable." % (what, saved.get(key)), file=sys.stderr)
+    regressions = 0
+    print("\nComparison against %s (tolerance %.0f%%):" % (baselinePath, 100*tolerance))
+    for (name, metric) in res.metrics.items():
+        if name not in baseline or baseline[name]["value"] == 0:
+            continue
+        ratio = metric["value"] / baseline[name]["value"]
+        worse = ratio < 1 - tolerance if metric["better"] == "higher" else ratio > 1 + tolerance
+        if worse:
+            regressions += 1
+        print("  %-44s %7.2fx %s" % (name, ratio, "REGRESSION" if worse else ""))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless throughput and latency benchmarks for Sampler")
+    parser.add_argument("--only", nargs="+", choices=STAGES, default=STAGES, help="stages to run")
+    parser.add_argument("--quick", action="store_true", help="shorter runs and fewer rates")
+    parser.add_argument("--binary", action="store_true", help="use the binary link format in the pipeline benchmark")
+    parser.add_argument("--save", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--no-compare", action="store_true", help="only measure; do not compare against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative change reported as a regression")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--capture", help="capture file (.cap) replayed in the replay benchmark, e.g. traffic recorded from a real test bench")
+    args = parser.parse_args()
+
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))    # 'Main' carga 'sampler.ui' desde el directorio de la aplicación
+    res = results()
+    for stage in args.only:
+        print("[%s]" % stage)
+        match stage:
+            case "parse":
+                benchParse(res, args.quick)
+            case "buffer":
+                benchBuffer(res, args.quick)
+            case "filter":
+                benchFilter(res, args.quick)
+            case "render":
+                benchRender(res, args.quick, app)
+            case "startup":
+                benchStartup(res, args.quick)
+            case "pipeline":
+                benchPipeline(res, args.quick, app, "binary" if args.binary else "ascii")
+            case "replay":
+                benchReplay(res, args.quick, args.capture)
+    report = {"machine": platform.platform(), "python": platform.python_version(), "quick": args.quick,
+              "date": time.strftime("%Y-%m-%d %H:%M:%S"), "metrics": res.metrics}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=1)
+        print("\nBaseline saved to " + args.baseline)
+        return 0
+    if args.no_compare:
+        return 0
+    regressions = compare(res, report, args.baseline, args.tolerance)
+    return 2 if regressions is None else 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de captura y reproducción de Sampler. 'capturePort' envuelve al puerto del microcontrolador (o a cualquier transporte con
+# la interfaz de 'serial.Serial', p. ej. el banco de pruebas virtual) y guarda en un archivo cada bloque de bytes tal como se leyó
+# del puerto, con el instante del anfitrión en que se recibió, junto con las ordenes enviadas. 'replayPort' es un transporte que
+# entrega de nuevo una captura a Sampler, a la velocidad original, N veces más rápido o tan rápido como se procese, por lo que las
+# lecturas recorren la misma decodificación, filtrado, almacenamiento y gráficas que con el banco real.
+#
+# Formato del archivo (.cap), de solo inserción:
+#
+#   MAGIC (8 bytes)                                 Encabezado
+#   CHUNK (13 bytes) + bytes                        Un registro por bloque: instante (us desde la apertura), dirección (RX/TX) y longitud
+#
+# La captura se realiza en el hilo de adquisición con escrituras a un buffer en memoria que se vacia a disco cada 'flushInterval'
+# segundos, por lo que puede mantenerse habilitada durante todo el muestreo. Ambos se conectan por medio de 'portOpener' del
+# administrador de conexión (vease 'connection.py'):
+#
+#   connectionManager(portOpener=captureOpener(openArduino, "captures"))
+#   rigArray(1, lister=lambda: [REPLAY_PORT], portOpener=replayOpener(readCapture("captures/20261017-120000-ttyACM0.cap"), speed=10))
+#
+# La reproducción retiene las lecturas grabadas después de la primer orden 'r' (exportar lecturas) hasta que Sampler la envie de
+# nuevo, de modo que las lecturas llegan mientras existe una sesión activa. La decodificación, los filtros y la fusión no dependen
+# de cómo se dividan los bytes en bloques, por lo que las lecturas guardadas son las mismas a cualquier velocidad; únicamente las
+# etapas del muestreo por etapas se programan con el reloj del anfitrión. La velocidad y los números de secuencia acordados durante
+# la captura ('captureLink()') se entregan al administrador de conexión en lugar de repetir el saludo.
+
+import os
+import re
+import struct
+import threading
+import time
+import mmap
+
+from protocol import FORMAT_REPLY, BAUD_CONFIRM, BAUD_DEFAULT
+
+
+MAGIC = b"SMPLRCAP"
+CHUNK = struct.Struct("<QBI")                           # Encabezado de cada bloque: instante (us), dirección y cantidad de bytes
+RX = 0                                                  # Bytes recibidos del microcontrolador
+TX = 1                                                  # Ordenes enviadas al microcontrolador
+REPLAY_PORT = "replay://capture"                        # Nombre del puerto de reproducción reportado a la interfaz
+
+
+class captureWriter:                                    # Clase del archivo de captura. Los bloques pueden registrarse desde varios hilos. Los bloques recibidos a menos
+    def __init__(self, path, flushInterval=1.0, merge=5000, clock=time.monotonic_ns):     # de 'merge' us del primero de ellos se guardan como uno solo, con el
+        self.path = path                                                                   # instante de este, para que el encabezado de cada lectura del
+        self.file = open(path, "wb", buffering=1 << 20)                                    # puerto no ocupe más que los bytes mismos
+        self.file.write(MAGIC)
+        self.clock = clock
+        self.start = clock()
+        self.flushInterval = flushInterval
+        self.merge = merge
+        self.pending = (0, bytearray())                 # Instante y bytes recibidos aún no escritos
+        self.lastFlush = time.monotonic()
+        self.lock = threading.Lock()
+        self.bytes = 0                                  # Bytes recibidos capturados
+
+    def record(self, direction, data):                  # Método para registrar un bloque de bytes en la dirección 'direction' (RX o TX)
+        with self.lock:
+            if self.file.closed:
+                return
+            now = (self.clock() - self.start) // 1000
+            if direction == RX:
+                self.bytes += len(data)
+                if self.pending[1] and now - self.pending[0] <= self.merge:
+                    self.pending[1].extend(data)
+                    return
+                self.writePending()
+                self.pending = (now, bytearray(data))
+            else:
+                self.writePending()                     # -> Las ordenes se escriben después de los bytes recibidos antes que ellas
+                self.file.write(CHUNK.pack(now, direction, len(data)))
+                self.file.write(data)
+            if time.monotonic() - self.lastFlush > self.flushInterval:     # -> Acotar lo que se pierde si el programa se cierra a la fuerza
+                self.file.flush()
+                self.lastFlush = time.monotonic()
+
+    def writePending(self):                             # Método que escribe los bytes recibidos pendientes como un solo bloque
+        (t, data) = self.pending
+        if data:
+            self.file.write(CHUNK.pack(t, RX, len(data)))
+            self.file.write(data)
+            self.pending = (0, bytearray())
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.writePending()
+                self.file.close()
+
+
+class capturePort:                                      # Clase del puerto con captura. Implementa la parte de la interfaz de 'serial.Serial' utilizada por Sampler
+    def __init__(self, port, path, **options):         # y la delega al puerto 'port'. Requiere la ruta del archivo de captura
+        self.port = port
+        self.capture = captureWriter(path, **options)
+
+    @property
+    def timeout(self):
+        return self.port.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self.port.timeout = value
+
+    @property
+    def baudrate(self):
+        return self.port.baudrate
+
+    @baudrate.setter
+    def baudrate(self, value):
+        self.port.baudrate = value
+
+    @property
+    def in_waiting(self):
+        return self.port.in_waiting
+
+    def read(self, size=1):
+        data = self.port.read(size)
+        if data:
+            self.capture.record(RX, data)
+        return data
+
+    def write(self, data):
+        self.capture.record(TX, bytes(data))
+        return self.port.write(data)
+
+    def reset_input_buffer(self):
+        self.port.reset_input_buffer()
+
+    def flush(self):
+        self.port.flush()
+
+    def close(self):
+        self.port.close()
+        self.capture.close()
+
+
+def captureOpener(opener, directory):                   # Función que devuelve un 'portOpener' que abre el puerto con 'opener' y captura su tráfico en
+    os.makedirs(directory, exist_ok=True)               # '<directory>/<fecha>-<puerto>.cap'
+    def openPort(portID):
+        port = opener(portID)
+        name = time.strftime("%Y%m%d-%H%M%S") + "-" + (re.sub(r"[^A-Za-z0-9]+", "_", portID.split("://")[-1]).strip("_") or "port")
+        k = 1
+        path = os.path.join(directory, name + ".cap")
+        while os.path.exists(path):                     # -> Nunca sobrescribir otra captura
+            k += 1
+            path = os.path.join(directory, name + "-" + str(k) + ".cap")
+        return capturePort(port, path)
+    return openPort
+
+
+def readCapture(path):                                  # Función que devuelve los bloques de una captura como lista de (instante en us, dirección, bytes). Un bloque
+    chunks = []                                         # final incompleto (p. ej. el programa se cerró a la fuerza) se descarta
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a Sampler capture file: " + path)
+    offset = len(MAGIC)
+    while offset + CHUNK.size <= len(data):
+        (t, direction, n) = CHUNK.unpack_from(data, offset)
+        offset += CHUNK.size
+        if offset + n > len(data):
+            break
+        chunks.append((t, direction, data[offset:offset+n]))
+        offset += n
+    return chunks
+
+
+def captureFormat(chunks, search=1 << 16):             # Función que devuelve el formato de exportación ("ascii" o "binary") acordado en una captura, según la respuesta
+    received = b""                                      # del microcontrolador en los primeros 'search' bytes recibidos. Vease 'protocol.negotiateFormat()'
+    for (_, direction, data) in chunks:
+        if direction == RX:
+            received += data[:search]
+            if len(received) >= search:
+                break
+    return "binary" if FORMAT_REPLY["binary"] in received else "ascii"
+
+
+def captureLink(chunks, search=1 << 16):               # Función que devuelve (baudios, números de secuencia) acordados en una captura: la última velocidad solicitada
+    requested = None                                    # antes de la primer confirmación del microcontrolador. Vease 'protocol.negotiateBaudrate()'
+    received = b""
+    for (_, direction, data) in chunks:
+        request = re.fullmatch(rb"U([0-9]+)\n", bytes(data)) if direction == TX else None
+        if request is not None:
+            (requested, received) = (int(request.group(1)), b"")
+        elif direction == RX and requested is not None:
+            received += data[:search]
+            if BAUD_CONFIRM in received:
+                return (requested, True)
+            if len(received) >= search:
+                break
+    return (BAUD_DEFAULT, False)
+
+
+class replayPort:                                       # Clase del transporte de reproducción. Implementa la parte de la interfaz de 'serial.Serial' utilizada por Sampler.
+    def __init__(self, chunks, speed=1.0, maxChunk=1 << 16, clock=time.monotonic, timeout=None):   # Requiere los bloques de la captura ('readCapture()') y
+        self.chunks = [(t, data) for (t, direction, data) in chunks if direction == RX]        # la velocidad de reproducción (None o 0 para la máxima)
+        starts = [t for (t, direction, data) in chunks if direction == TX and data == b"r"]
+        self.gate = starts[0] if starts else None       # Instante grabado de la primer orden 'r'; las lecturas posteriores esperan a que Sampler la envie
+        self.speed = speed if speed else None
+        self.maxChunk = maxChunk                        # Bytes entregados como máximo por lectura
+        self.clock = clock
+        self.timeout = timeout
+        self.baudrate = BAUD_DEFAULT                    # Sin efecto; la velocidad de la reproducción la controla 'speed'
+        self.origin = None                              # Instante del anfitrión en que Sampler envió la orden 'r'
+        self.index = 0                                  # Siguiente bloque por entregar
+        self.offset = 0                                 # Bytes ya entregados del bloque 'index'
+        self.drained = False                            # Flag de captura entregada por completo y leida de nuevo (el lector ya guardó el último bloque)
+        self.is_open = True
+        self.lock = threading.Condition()
+
+    def due(self, k):                                   # Método que devuelve el instante del anfitrión en que debe entregarse el bloque 'k' (None si aún no se conoce)
+        t = self.chunks[k][0]
+        if self.gate is None or t < self.gate:          # -> Lecturas previas a la primer orden 'r' (saludo, respuesta al formato): de inmediato
+            return 0.0
+        if self.origin is None:
+            return None
+        return self.origin + ((t - self.gate) / 1e6 / self.speed if self.speed else 0.0)
+
+    def available(self):                                # Método que devuelve la cantidad de bytes que ya deben haberse entregado, como máximo 'maxChunk' (o un bloque
+        now = self.clock()                              # completo, si es mayor)
+        size = 0
+        for k in range(self.index, len(self.chunks)):
+            due = self.due(k)
+            if due is None or due > now or size >= self.maxChunk:
+                break
+            size += len(self.chunks[k][1]) - (self.offset if k == self.index else 0)
+        return size
+
+    @property
+    def finished(self):                                 # Flag de captura entregada por completo
+        return self.index >= len(self.chunks)
+
+    @property
+    def in_waiting(self):
+        with self.lock:
+            return self.available()
+
+    def read(self, size=1):                             # Método que devuelve hasta 'size' bytes de los bloques cuyo instante ya llegó, esperando como máximo 'timeout'
+        deadline = None if self.timeout is None else self.clock() + self.timeout    # segundos a que llegue alguno
+        with self.lock:
+            while self.is_open and not self.available():
+                if self.finished:
+                    self.drained = True
+                    self.lock.wait(self.timeout or 0.05)
+                    return b""
+                due = self.due(self.index)
+                wait = 0.05 if due is None else due - self.clock()
+                if deadline is not None:
+                    wait = min(wait, deadline - self.clock())
+                    if wait <= 0:
+                        return b""
+                self.lock.wait(max(wait, 0))
+            out = []
+            size = min(size, self.available())
+            while size > 0:
+                data = self.chunks[self.index][1]
+                part = data[self.offset:self.offset+size]
+                out.append(part)
+                size -= len(part)
+                self.offset += len(part)
+                if self.offset >= len(data):
+                    (self.index, self.offset) = (self.index + 1, 0)
+            return b"".join(out)
+
+    def write(self, data):                              # Método que recibe ordenes. Únicamente la orden 'r' tiene efecto: inicia la reproducción de las lecturas
+        with self.lock:
+            if bytes(data) == b"r" and self.origin is None:
+                self.origin = self.clock()
+                self.lock.notify_all()
+        return len(data)
+
+    def reset_input_buffer(self):                       # Método que descarta los bytes que ya debian haberse entregado, igual que el puerto real
+        with self.lock:
+            size = self.available()
+            while size > 0:
+                part = min(size, len(self.chunks[self.index][1]) - self.offset)
+                size -= part
+                self.offset += part
+                if self.offset >= len(self.chunks[self.index][1]):
+                    (self.index, self.offset) = (self.index + 1, 0)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        with self.lock:
+            self.is_open = False
+            self.lock.notify_all()
+
+
+def replayOpener(chunks, speed=1.0, ports=None):        # Función que devuelve un 'portOpener' que reproduce los bloques de una captura ('readCapture()'). Guarda en
+                                                        # 'ports' (si es una lista) cada transporte abierto, p. ej. para consultar 'drained'
+    def openPort(portID):
+        port = replayPort(chunks, speed)
+        if ports is not None:
+            ports.append(port)
+        return port
+    return openPort
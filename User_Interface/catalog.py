@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo del catálogo de sesiones de Sampler. Indexa en una base de datos SQLite ('catalog.sqlite', en el directorio de respaldo
+# 'spillDir') cada sesión concluida: fecha, banco, etiqueta de la hélice y el motor, modo, perfil de Throttle ('period', 'steps' y
+# 'powerSteps'), un resumen de cada canal (lecturas, mínimo, máximo y media) y las estadísticas de cada etapa (vease 'stepstats.py').
+# Las lecturas mismas no se copian a la base de datos: permanecen en los archivos mapeados en memoria de cada sesión (vease
+# 'storage.py'), junto al catálogo, y se abren únicamente al cargar una sesión encontrada.
+#
+#   <spillDir>/catalog.sqlite                   Catálogo
+#   <spillDir>/[<banco>/]<fecha>-<n>/<canal>.t  Lecturas de cada sesión, con la ruta relativa al catálogo
+#
+# Las consultas se resuelven con los indices de la base de datos, sin abrir los archivos de las sesiones, p. ej. todas las hélices
+# 10x4.5 por encima de 8000 rpm desde el 1 de septiembre:
+#
+#   catalog.find(label="10x4.5*", above={"R": 8000}, since=time.mktime((2026, 9, 1, 0, 0, 0, 0, 0, -1)))
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+from storage import sessionStore, CHANNELS, HEADER, MAGIC
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY, path TEXT UNIQUE, started REAL, rig TEXT, label TEXT, mode TEXT,
+                                     period INTEGER, steps INTEGER, powerSteps TEXT, meta TEXT);
+CREATE TABLE IF NOT EXISTS channels (session INTEGER, channel TEXT, count INTEGER, min REAL, max REAL, mean REAL,
+                                     PRIMARY KEY (session, channel)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS steps (session INTEGER, step INTEGER, channel TEXT, throttle REAL, count INTEGER, mean REAL, std REAL,
+                                  min REAL, max REAL, PRIMARY KEY (session, step, channel)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sessionsStarted ON sessions (started);
+CREATE INDEX IF NOT EXISTS sessionsLabel ON sessions (label, started);
+CREATE INDEX IF NOT EXISTS sessionsRig ON sessions (rig, started);
+CREATE INDEX IF NOT EXISTS channelsMax ON channels (channel, max, session);
+CREATE INDEX IF NOT EXISTS channelsMin ON channels (channel, min, session);
+"""
+COLUMNS = ("id", "path", "started", "rig", "label", "mode", "period", "steps", "powerSteps")    # Columnas de cada sesión que devuelve 'find()'
+
+
+def startedAt(path):                                    # Función que devuelve la fecha (segundos desde la época) en que comenzó la sesión respaldada en 'path'. Se
+    try:                                                # obtiene del nombre de su directorio (vease 'samplerEngine.newSession()') o, si no lo sigue, de la fecha de
+        return time.mktime(time.strptime(os.path.basename(path)[:15], "%Y%m%d-%H%M%S"))    # creación de sus archivos
+    except ValueError:
+        return os.path.getctime(os.path.join(path, CHANNELS[0] + ".t"))
+
+
+class sessionCatalog:                                   # Clase del catálogo. Requiere el directorio de respaldo de las sesiones. Una misma instancia se puede compartir
+    def __init__(self, directory):                      # entre los motores de varios bancos ('rigs.py'), cada uno en su propio hilo
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(self.directory, "catalog.sqlite"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")      # -> Las consultas no esperan a que termine de escribirse una sesión
+        self.db.executescript(SCHEMA)
+        self.log = print                                # Función con la que se reportan las sesiones omitidas por 'scan()'
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):                                    # Método para cerrar la base de datos. Actualiza antes las estadísticas con las que SQLite elige los indices
+        with self.lock:
+            self.db.execute("PRAGMA optimize")
+            self.db.close()
+
+    def add(self, session, meta=None, rig=None, label=None):   # Método para indexar una sesión concluida respaldada en disco ('sessionStore' con 'path') con sus metadatos
+        if session.path is None:                               # (vease 'samplerEngine.sessionMeta()'). Si la sesión ya estaba indexada, se reemplaza. Devuelve su 'id'
+            raise ValueError("Only sessions backed on disk can be catalogued")
+        meta = meta or {}
+        summary = []
+        for (channel, record) in session.channels.items():     # -> Resumen de cada canal, en una sola pasada por sus lecturas
+            y = record.view()[1]
+            if len(y):
+                summary.append((channel, len(y), float(y.min()), float(y.max()), float(y.mean(dtype=np.float64))))
+        stepRows = []
+        for row in meta.get("stepStats", []):
+            for (channel, values) in row.items():
+                if isinstance(values, dict) and values["count"]:
+                    stepRows.append((row["step"], channel, row["throttle"], values["count"], values["mean"], values["std"], values["min"], values["max"]))
+        path = os.path.relpath(os.path.abspath(session.path), self.directory)
+        with self.lock, self.db:                               # -> Una sola transacción por sesión
+            self.db.execute("DELETE FROM channels WHERE session IN (SELECT id FROM sessions WHERE path = ?)", (path,))
+            self.db.execute("DELETE FROM steps WHERE session IN (SELECT id FROM sessions WHERE path = ?)", (path,))
+            self.db.execute("DELETE FROM sessions WHERE path = ?", (path,))
+            cursor = self.db.execute("INSERT INTO sessions (path, started, rig, label, mode, period, steps, powerSteps, meta) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                     (path, startedAt(session.path), rig if rig is not None else meta.get("rig"), label if label is not None else meta.get("label"),
+                                      meta.get("mode"), meta.get("period"), meta.get("steps"), json.dumps(meta.get("powerSteps", [])), json.dumps(meta)))
+            key = cursor.lastrowid
+            self.db.executemany("INSERT INTO channels VALUES (?, ?, ?, ?, ?, ?)", [(key,) + row for row in summary])
+            self.db.executemany("INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [(key,) + row for row in stepRows])
+        return key
+
+    def scan(self, rig=None):                           # Método para indexar las sesiones concluidas del directorio de respaldo (y de los subdirectorios de cada banco)
+        with self.lock:                                 # que aún no estan en el catálogo, p. ej. las grabadas antes de que existiera. Se indexan sin metadatos. Devuelve
+            known = {row[0] for row in self.db.execute("SELECT path FROM sessions")}   # la cantidad de sesiones agregadas
+        added = 0
+        for (root, dirs, files) in os.walk(self.directory):
+            dirs.sort()
+            header = os.path.join(root, CHANNELS[0] + ".t")
+            if os.path.relpath(root, self.directory) in known or not os.path.isfile(header):
+                continue
+            dirs[:] = []                                # -> Los directorios de sesión no contienen otras sesiones
+            first = np.fromfile(header, HEADER, 1)
+            if not len(first) or first[0]["magic"] != MAGIC or not first[0]["closed"]:
+                continue                                # -> Las sesiones interrumpidas se indexan al recuperarlas. Vease 'samplerEngine.start()'
+            parent = os.path.relpath(os.path.dirname(root), self.directory)
+            try:
+                session = sessionStore(path=root, readOnly=True)   # -> Sin modificar los archivos de la sesión
+                self.add(session, rig=rig if rig is not None else (parent if parent != "." else None))
+            except (OSError, ValueError) as e:          # -> Una sesión dañada no debe detener la revisión de las demás
+                self.log("Skipped damaged session: " + root + " (" + str(e) + ")")
+                continue
+            added += 1
+        return added
+
+    def find(self, label=None, rig=None, mode=None, since=None, until=None, period=None, steps=None, above=None, below=None, limit=None):
+        where = []                                      # Método que devuelve las sesiones que cumplen todas las condiciones indicadas, de la más reciente a la más
+        args = []                                       # antigua, como lista de diccionarios con las columnas 'COLUMNS'. Condiciones:
+        for (column, op, value) in (("label", "GLOB", label), ("rig", "=", rig), ("mode", "=", mode), ("started", ">=", since),   # -> 'label' admite comodines
+                                    ("started", "<", until), ("period", "=", period), ("steps", "=", steps)):                     #    ('*', '?', '[...]')
+            if value is not None:
+                where.append("s.%s %s ?" % (column, op))
+                args.append(value)
+        for (column, op, limits) in (("max", ">=", above), ("min", "<=", below)):  # -> 'above'/'below': {canal: valor} que el máximo/mínimo del canal debe alcanzar
+            for (channel, value) in (limits or {}).items():
+                where.append("EXISTS (SELECT 1 FROM channels c WHERE c.session = s.id AND c.channel = ? AND c.%s %s ?)" % (column, op))
+                args += [channel, value]
+        query = "SELECT %s FROM sessions s" % ", ".join("s." + c for c in COLUMNS)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY s.started DESC"
+        if limit is not None:
+            query += " LIMIT %d" % int(limit)
+        with self.lock:
+            rows = self.db.execute(query, args).fetchall()
+        return [dict(zip(COLUMNS, row[:-1]), powerSteps=json.loads(row[-1] or "[]")) for row in rows]
+
+    def channels(self, key):                            # Método que devuelve el resumen de cada canal de una sesión: {canal: {"count", "min", "max", "mean"}}
+        with self.lock:
+            rows = self.db.execute("SELECT channel, count, min, max, mean FROM channels WHERE session = ?", (key,)).fetchall()
+        return {row[0]: dict(zip(("count", "min", "max", "mean"), row[1:])) for row in rows}
+
+    def steps(self, key, channel):                      # Método que devuelve las estadísticas por etapa de un canal de una sesión como vectores (Throttle, media, desviación
+        with self.lock:                                 # estándar), igual que 'stepStatistics.curve()'
+            rows = self.db.execute("SELECT throttle, mean, std FROM steps WHERE session = ? AND channel = ? ORDER BY step", (key, channel)).fetchall()
+        return tuple(np.array([row[k] for row in rows], dtype=np.float64) for k in range(3))
+
+    def meta(self, key):                                # Método que devuelve los metadatos completos con los que se indexó una sesión
+        with self.lock:
+            row = self.db.execute("SELECT meta FROM sessions WHERE id = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def load(self, key):                                # Método que abre las lecturas de una sesión indexada ('sessionStore' respaldado en disco, sin copiarlas a la RAM).
+        with self.lock:                                 # Lanza KeyError si la sesión no existe en el catálogo y OSError si sus archivos ya no existen
+            row = self.db.execute("SELECT path FROM sessions WHERE id = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        path = os.path.join(self.directory, row[0])
+        if not os.path.isfile(os.path.join(path, CHANNELS[0] + ".t")):
+            raise OSError("Session files not found: " + path)
+        return sessionStore(path=path, readOnly=True)   # -> Sin modificar los archivos; abrirla no debe hacerla parecer interrumpida
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de conexión de Sampler. Contiene el administrador de conexión encargado de abrir el puerto COM del microcontrolador una
+# sola vez, reutilizarlo mientras siga presente y vigilar en segundo plano la conexión y desconexión del dispositivo. Las acciones
+# de la interfaz únicamente consultan el estado guardado, sin enumerar puertos ni abrir conexiones nuevas. Al abrir el puerto se acuerda
+# con el microcontrolador la velocidad del enlace, los números de secuencia y el formato de exportación (vease 'protocol.py').
+
+import threading
+import queue
+import serial
+import serial.tools.list_ports as serialP
+
+from acquisition import serialReader
+from protocol import negotiateFormat, negotiateBaudrate, FORMAT_REQUEST, BAUD_DEFAULT, BAUDRATES
+
+
+def get_ports():                    # Función para obtener los puertos seriales o COM disponibles en el computador
+
+    ports = serialP.comports()
+
+    return ports
+
+def findArduino(ports):                         # Función para encontrar el puerto COM correspondiente al microcontrolador Arduino. Ejecuta:
+    for port in ports:                          # -> Para cada puerto disponible:
+        portID = str(port)                      # -> Extraer el nombre del puerto
+        if "ACM" in portID:                     # -> Si dentro del nombre del puerto se encuentra la secuencia "ACM", [Arduino se identifica por medio de esta secuencia en Linux]
+            return portID.split(' ')[0]         # ---> Regresar el primer fragmento del nombre separado por ' ' [espacio], el nombre del dispositivo
+    return None                                 # -> De lo contrario, regresar None
+
+def findArduinos(ports):                        # Función para encontrar los puertos COM de todos los microcontroladores conectados, con el mismo criterio que 'findArduino()'
+    return [str(port).split(' ')[0] for port in ports if "ACM" in str(port)]
+
+def openArduino(portID):                        # Función para establecer conexión serial con Arduino, baudrate inicial de 57600, timeout de 1 segundo. La velocidad
+    return serial.Serial(portID, baudrate = BAUD_DEFAULT, timeout = 1)     # se eleva durante el saludo. Vease 'protocol.negotiateBaudrate()'
+
+
+class portPool:                                             # Clase que reparte los puertos de varios microcontroladores entre varios administradores de conexión
+    def __init__(self, lister=None):                        # (uno por banco de pruebas), sin que dos de ellos abran el mismo puerto. Requiere, opcionalmente, la
+        self.lister = lister or (lambda: findArduinos(get_ports()))     # función que enumera los puertos disponibles
+        self.owners = {}                                    # Puerto -> nombre del banco que lo tiene asignado
+        self.lock = threading.Lock()
+
+    def finder(self, owner):                                # Método que devuelve la función 'portFinder' del administrador de conexión del banco 'owner'
+        return lambda: self.claim(owner)
+
+    def claim(self, owner):                                 # Método que devuelve el puerto asignado a 'owner'. Ejecuta:
+        ports = self.lister()
+        with self.lock:
+            for port in [p for p in self.owners if p not in ports]:
+                del self.owners[port]                       # -> Liberar los puertos de los dispositivos desconectados
+            for (port, name) in self.owners.items():
+                if name == owner:                           # -> Si el banco ya tiene un puerto presente, conservarlo
+                    return port
+            for port in ports:
+                if port not in self.owners:                 # -> De lo contrario, asignarle el primer puerto libre
+                    self.owners[port] = owner
+                    return port
+        return None
+
+    def release(self, owner):                               # Método para liberar el puerto asignado a 'owner'
+        with self.lock:
+            for port in [p for (p, name) in self.owners.items() if name == owner]:
+                del self.owners[port]
+
+
+class connectionManager(threading.Thread):                  # Clase del administrador de conexión. Hereda de threading.Thread
+    def __init__(self, linkFormat="ascii", pollInterval=1.0, portFinder=None, portOpener=openArduino, baudrates=BAUDRATES, link=None):
+        super().__init__(daemon=True)                       # Requiere el formato de exportación deseado (vease 'protocol.py'), el periodo en segundos con el que
+        self.requestedFormat = linkFormat                   # se revisan los puertos y, opcionalmente, las funciones para encontrar y abrir el puerto. Estas
+        self.pollInterval = pollInterval                    # permiten reemplazar el puerto físico por otro transporte (p. ej. un dispositivo simulado)
+        self.portFinder = portFinder or (lambda: findArduino(get_ports()))
+        self.portOpener = portOpener
+        self.baudrates = baudrates                          # Velocidades que se solicitan durante el saludo (vacio para permanecer a 57600 baudios sin números de secuencia)
+        self.fixedLink = link                               # (baudios, números de secuencia) ya acordados, p. ej. los de una captura reproducida. Omite el saludo
+        self.reader = None                                  # Hilo de adquisición del puerto abierto. Vease 'acquisition.serialReader'
+        self.portName = None                                # Nombre del puerto abierto
+        self.linkFormat = "ascii"                           # Formato de exportación acordado con el microcontrolador
+        self.baudrate = BAUD_DEFAULT                        # Velocidad acordada con el microcontrolador
+        self.sequenced = False                              # Flag de lecturas con número de secuencia
+        self.events = queue.SimpleQueue()                   # Cola de sucesos ("connected" / "disconnected", puerto) para la interfaz
+        self.wakeEvent = threading.Event()
+        self.stopEvent = threading.Event()
+
+    def run(self):                                          # Bucle principal del hilo. Revisa la conexión cada 'pollInterval' segundos o cuando se solicite
+        while not self.stopEvent.is_set():
+            self.checkPort()
+            self.wakeEvent.wait(self.pollInterval)
+            self.wakeEvent.clear()
+
+    def checkPort(self):                                    # Método que revisa el estado de la conexión. Ejecuta:
+        portID = self.portFinder()                          # -> Buscar el puerto del microcontrolador
+        if self.reader is not None:
+            if self.reader.is_alive() and portID == self.portName:
+                return                                      # -> Si el puerto abierto sigue presente y su hilo de adquisición vivo, no hacer nada
+            self.disconnect()                               # -> Si el dispositivo fue desconectado o el puerto falló, liberarlo
+        if portID is not None:                              # -> Si no hay conexión y existe un dispositivo, abrir su puerto una sola vez
+            try:
+                port = self.portOpener(portID)
+            except (serial.SerialException, OSError):
+                return
+            reader = serialReader(port)
+            reader.start()
+            if self.fixedLink is not None:                  # -> Acordar la velocidad y los números de secuencia. Vease 'protocol.negotiateBaudrate()'
+                (self.baudrate, self.sequenced) = self.fixedLink
+            elif self.baudrates:
+                (self.baudrate, self.sequenced) = negotiateBaudrate(reader, self.baudrates)
+            else:
+                (self.baudrate, self.sequenced) = (BAUD_DEFAULT, False)
+            if self.requestedFormat == "binary":            # -> Acordar el formato de exportación. Vease 'protocol.negotiateFormat()'
+                self.linkFormat = negotiateFormat(reader, "binary")
+            else:
+                reader.write(FORMAT_REQUEST["ascii"])
+                self.linkFormat = "ascii"
+            (self.reader, self.portName) = (reader, portID)
+            self.events.put(("connected", portID))
+
+    def disconnect(self):                                   # Método para detener el hilo de adquisición y liberar el puerto
+        if self.reader is not None:
+            self.reader.stop()
+            self.events.put(("disconnected", self.portName))
+        (self.reader, self.portName) = (None, None)
+
+    def isConnected(self):                                  # Método que devuelve el estado guardado de la conexión, sin acceder a los puertos
+        reader = self.reader
+        return reader is not None and reader.is_alive()
+
+    def rescan(self):                                       # Método para solicitar una revisión inmediata de los puertos
+        self.wakeEvent.set()
+
+    def write(self, data):                                  # Método para enviar ordenes al microcontrolador, si existe conexión
+        reader = self.reader
+        if reader is not None:
+            reader.write(data)
+
+    def drainBytes(self):                                   # Método que devuelve todos los bytes recibidos desde la última llamada
+        reader = self.reader
+        return reader.drainBytes() if reader is not None else b""
+
+    def backlog(self):                                      # Método que devuelve los bytes pendientes en el buffer del puerto y en la cola del hilo de adquisición
+        reader = self.reader
+        return (reader.waiting, reader.bytesRead - reader.bytesDrained) if reader is not None else (0, 0)
+
+    def reset(self):                                        # Método para descartar los datos pendientes del puerto
+        reader = self.reader
+        if reader is not None:
+            reader.reset()
+
+    def stop(self):                                         # Método para detener el hilo y liberar el puerto
+        self.stopEvent.set()
+        self.wakeEvent.set()
+        if self.is_alive():
+            self.join()
+        self.disconnect()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de la consola de Sampler. Reemplaza la escritura directa de cada linea recibida en el QTextEdit de la ventana principal,
+# cuyo documento crecía sin límite y se volvía a maquetar con cada inserción. Las lineas nuevas se acumulan en un buffer circular
+# de tamaño fijo ('consoleBuffer') y se escriben en el widget por lotes, como máximo 'rate' veces por segundo ('logConsole'). El
+# documento del widget conserva únicamente las últimas 'capacity' lineas. Modos de la consola:
+#
+#   all         Mensajes de estado y todas las lineas recibidas del microcontrolador
+#   status      Únicamente mensajes de estado (conexión, cuenta regresiva, etapas, errores)
+#   preview     Mensajes de estado y una de cada 'previewEvery' lineas recibidas
+
+from collections import deque
+
+from PyQt5 import QtCore
+from PyQt5.QtGui import QTextCursor
+
+
+MODES = ("all", "status", "preview")
+
+
+class consoleBuffer:                                    # Clase del buffer circular de lineas pendientes de mostrar
+    def __init__(self, capacity=2000, mode="all", previewEvery=50):
+        self.lines = deque(maxlen=capacity)             # Lineas completas pendientes. Al llenarse, las más antiguas se descartan
+        self.partial = ""                               # Fragmento final de una linea recibida incompleta
+        self.mode = mode
+        self.previewEvery = previewEvery
+        self.count = 0                                  # Lineas recibidas, para elegir una de cada 'previewEvery' en el modo "preview"
+        self.dropped = 0                                # Lineas descartadas desde el último lote por exceder la capacidad
+
+    def status(self, text):                             # Método para agregar un mensaje de estado. Se muestra en todos los modos
+        self.push([text])
+
+    def data(self, text):                               # Método para agregar texto recibido del microcontrolador, posiblemente con lineas incompletas
+        if self.mode == "status":
+            return
+        lines = (self.partial + text).replace("\r", "").split("\n")
+        self.partial = lines.pop()
+        if self.mode == "preview":
+            first = -self.count % self.previewEvery
+            self.count += len(lines)
+            lines = lines[first::self.previewEvery]
+        self.push(lines)
+
+    def push(self, lines):
+        self.dropped += max(len(self.lines) + len(lines) - self.lines.maxlen, 0)
+        self.lines.extend(lines)
+
+    def take(self):                                     # Método que devuelve y vacia las lineas pendientes, junto con la cantidad de lineas descartadas
+        (lines, dropped) = (list(self.lines), self.dropped)
+        self.lines.clear()
+        self.dropped = 0
+        return (lines, dropped)
+
+    def clear(self):
+        self.lines.clear()
+        self.partial = ""
+        self.dropped = 0
+
+
+class logConsole:                                       # Clase que escribe por lotes el contenido de un 'consoleBuffer' en un QTextEdit
+    def __init__(self, widget, capacity=2000, rate=10, mode="all", previewEvery=50):
+        self.widget = widget                            # Requiere el widget, la cantidad máxima de lineas mostradas, la cantidad máxima de lotes
+        self.buffer = consoleBuffer(capacity, mode, previewEvery)   # por segundo, el modo y, para el modo "preview", cada cuántas lineas se muestra una
+        widget.setUndoRedoEnabled(False)                # -> Sin historial de deshacer, que de otro modo conservaría todo el texto insertado
+        widget.document().setMaximumBlockCount(capacity)    # -> El documento descarta sus lineas más antiguas al superar 'capacity'
+        self.timer = QtCore.QTimer()
+        self.timer.setInterval(int(1000/rate))
+        self.timer.timeout.connect(self.flush)
+        self.timer.start()
+
+    @property
+    def mode(self):
+        return self.buffer.mode
+
+    def setMode(self, mode):
+        self.buffer.mode = mode
+
+    def status(self, text):
+        self.buffer.status(text)
+
+    def data(self, text):
+        self.buffer.data(text)
+
+    def flush(self):                                    # Método llamado por 'timer'. Escribe las lineas pendientes en una sola inserción
+        (lines, dropped) = self.buffer.take()
+        if not lines:
+            return
+        if dropped:
+            lines.insert(0, "... %d lines skipped ..." % dropped)
+        bar = self.widget.verticalScrollBar()
+        following = bar.value() == bar.maximum()        # -> Solo desplazar la vista al final si el usuario no se movió hacia arriba
+        cursor = QTextCursor(self.widget.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(("\n" if not self.widget.document().isEmpty() else "") + "\n".join(lines))
+        if following:
+            bar.setValue(bar.maximum())
+
+    def clear(self):
+        self.buffer.clear()
+        self.widget.clear()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de decimación de Sampler. Contiene la pirámide de mínimos y máximos que permite gráficar sesiones de cualquier duración
+# entregando a Matplotlib únicamente tantos puntos como pixeles tiene la gráfica, sin perder los picos de las lecturas.
+#
+# Cada nivel de la pirámide es una secuencia de puntos (t, y) obtenida del nivel anterior: por cada grupo de 'group' puntos
+# consecutivos se conservan únicamente el mínimo y el máximo, en orden temporal. El nivel 0 son las lecturas originales.
+
+import numpy as np
+
+from storage import recordedData
+
+
+class minMaxPyramid:                                    # Clase de la pirámide de decimación de un canal. Se actualiza de manera incremental con cada bloque de lecturas
+    __slots__ = ("group", "levels", "consumed", "seen", "firstT")
+
+    def __init__(self, group=16):
+        self.group = group                              # Puntos de un nivel que se reducen a 2 puntos en el siguiente (reducción de group/2 por nivel)
+        self.levels = []                                # Niveles 1, 2, ... guardados como 'recordedData'. Vease 'storage.py'
+        self.consumed = []                              # Cantidad de puntos de cada nivel anterior que ya fueron reducidos en el nivel correspondiente
+        self.seen = 0                                   # Cantidad de lecturas originales vistas, para detectar un cambio de sesión
+        self.firstT = None
+
+    def reset(self):
+        self.levels = []
+        self.consumed = []
+        self.seen = 0
+        self.firstT = None
+
+    def update(self, t, y):                             # Método llamado con las vistas completas (t, y) del canal cada vez que llegan lecturas nuevas.
+        if len(t) < self.seen or (len(t) and t[0] != self.firstT):   # Solo procesa los grupos completos que aún no habían sido reducidos
+            self.reset()                                # -> Si las lecturas no son continuación de las anteriores (nueva sesión o reinicio), empezar de nuevo
+        self.seen = len(t)
+        self.firstT = t[0] if len(t) else None
+        (srcT, srcY) = (t, y)
+        k = 0
+        while True:
+            if k == len(self.levels):                   # -> Crear un nivel nuevo cuando el nivel anterior tiene al menos un grupo completo
+                if len(srcT) < 2*self.group:
+                    break
+                self.levels.append(recordedData(256))
+                self.consumed.append(0)
+            start = self.consumed[k]
+            full = (len(srcT) - start) // self.group
+            if full:                                    # -> Reducir los grupos completos nuevos y agregarlos al nivel siguiente
+                stop = start + full*self.group
+                self.levels[k].extend(*reduceMinMax(srcT[start:stop], srcY[start:stop], self.group))
+                self.consumed[k] = stop
+            (srcT, srcY) = self.levels[k].view()
+            k += 1
+
+    def query(self, t, y, x0, x1, maxPoints):           # Método que devuelve los puntos (t, y) a gráficar entre los tiempos 'x0' y 'x1', usando el nivel más detallado
+        sources = [(t, y)] + [level.view() for level in self.levels]    # que no exceda 'maxPoints' puntos dentro del intervalo
+        for k in range(len(sources)):
+            (st, sy) = sources[k]
+            i0 = max(np.searchsorted(st, x0, "left") - 1, 0)            # -> Incluir un punto a cada lado del intervalo para que la linea llegue a los bordes
+            i1 = np.searchsorted(st, x1, "right") + 1
+            if i1 - i0 <= maxPoints or k == len(sources) - 1:
+                break
+        partsT = [st[i0:i1]]
+        partsY = [sy[i0:i1]]
+        for j in range(k-1, -1, -1):                    # -> Agregar los puntos recientes de los niveles más detallados que aún no forman un grupo completo
+            (jt, jy) = sources[j]
+            partsT.append(jt[self.consumed[j]:])
+            partsY.append(jy[self.consumed[j]:])
+        if len(partsT) == 1:
+            return (partsT[0], partsY[0])
+        return (np.concatenate(partsT), np.concatenate(partsY))
+
+
+def reduceMinMax(t, y, group):                          # Función que reduce cada grupo de 'group' puntos a su mínimo y su máximo, en orden temporal
+    tb = t.reshape(-1, group)
+    yb = y.reshape(-1, group)
+    iMin = np.argmin(yb, axis=1)
+    iMax = np.argmax(yb, axis=1)
+    first = np.minimum(iMin, iMax)
+    second = np.maximum(iMin, iMax)
+    rows = np.arange(len(tb))
+    return (np.column_stack((tb[rows, first], tb[rows, second])).ravel(),
+            np.column_stack((yb[rows, first], yb[rows, second])).ravel())
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo del motor de adquisición de Sampler. Contiene toda la lógica de muestreo que no depende de la interfaz gráfica: conexión
+# con el microcontrolador, selección de modo, control de Throttle, secuencia de etapas, decodificación, filtrado, almacenamiento y
+# exportación de las sesiones. No importa Qt ni Matplotlib, por lo que puede ejecutarse en una computadora sin pantalla por medio de
+# la linea de comandos ('sampler.py'), mientras que la ventana principal ('main.py') es únicamente un cliente del mismo motor.
+#
+# El motor no tiene temporizadores propios: quien lo utiliza debe llamar a 'update()' periódicamente (cada 'samplingInterval'
+# milisegundos). Los mensajes y las lecturas nuevas se comunican mediante funciones que el cliente puede reemplazar:
+#
+#   log(text)                               Mensajes de estado (por defecto se imprimen)
+#   console(text)                           Lineas recibidas del microcontrolador, tal cual o reconstruidas del formato binario
+#   onData(channel, record, t, y)           Bloque de lecturas 't', 'y' insertado en el canal 'record' ("T", "M" o "R") de la sesión activa
+#
+# Cada etapa del recorrido de las lecturas (vaciado de la cola, decodificación, filtros, almacenamiento y notificación al cliente) se
+# mide en 'metrics' (vease 'metrics.py'), junto con los bytes pendientes en el puerto, las lecturas rechazadas, las lineas corruptas y,
+# si el microcontrolador exporta números de secuencia, las lecturas perdidas en el enlace.
+
+import math
+import os
+import sqlite3
+import struct
+import time
+import numpy as np
+
+from connection import connectionManager
+from storage import sessionStore, interruptedSessions, CHANNELS, DERIVED
+from protocol import asciiDecoder, binaryDecoder, torquePairer, CH_T, CH_R
+from export import sessionWriter, exportSession, sessionBlocks
+from stepstats import stepStatistics
+from filters import filterChain
+from fusion import channelFusion, derivedChannels
+from metrics import pipelineMetrics
+
+
+class samplerEngine:                                    # Clase del motor de adquisición
+    samplingInterval = 10                               # Periodo (ms) con el que se espera que el cliente llame a 'update()'
+    defaultCountdown = 5                                # Duración (s) de la cuenta regresiva previa al muestreo por etapas
+    throttleRange = (0, 65)                             # Rango de Throttle recorrido por las etapas
+    settleTime = 500                                    # Ventana de asentamiento (ms) al inicio de cada etapa excluida de las estadísticas, como máximo la mitad de la etapa
+    filterSpec = {"T": "range:0:2",                     # Cadena de filtros de cada canal. Vease 'filters.py'. Los límites de tracción y torque son los del antiguo
+                  "M": "range:0:0.1",                   # 'noiseProtect'. Las cadenas por defecto no incluyen 'hampel': su ventana es causal y reemplaza las primeras
+                  "R": ""}                              # lecturas de cada cambio de etapa por el nivel anterior
+    fusionInterval = 20                                 # Intervalo (ms) de la base temporal común de los canales derivados. Vease 'fusion.py'
+    propDiameter = 0.254                                # Diámetro de la hélice (m) y densidad del aire (kg/m^3) para los coeficientes de tracción y torque
+    airDensity = 1.225
+    label = ""                                          # Etiqueta de la hélice y el motor probados (p. ej. "10x4.5 2212-920KV"), con la que se indexan las sesiones
+
+    def __init__(self, linkFormat="ascii", spillDir="sessions", **connectionOptions):
+        self.connection = connectionManager(linkFormat, **connectionOptions)    # Administrador de la conexión. Vease 'connection.py'
+        self.decoder = asciiDecoder()                   # Decodificador de bloques del formato acordado. Vease 'protocol.py'
+        self.torquePairer = torquePairer()              # Emparejador de las lecturas de torque M1 y M2
+        self.spillDir = spillDir                        # Directorio donde se respaldan las sesiones en disco (None para guardarlas solo en memoria). Vease 'storage.py'
+        self.sessions = []                              # Sesiones de muestreo realizadas
+        self.dataSets = 0                               # Cantidad de sesiones de muestreo realizadas
+        self.writer = None                              # Escritor en disco de la sesión activa. Vease 'export.py'
+        self.closedWriters = []                         # Escritores de sesiones concluidas que pueden seguir escribiendo en segundo plano
+        self.exportPath = None                          # Ruta base (nombre, formato, numerar) con la que se exportan las sesiones de manera continua
+        self.mode = None                                # Modo de muestreo: "Manual" (barrido) o "Auto Period" (por etapas)
+        self.readStatus = 0                             # Flag de sesión de muestreo activa
+        self.pauseStatus = 0                            # Flag de sesión de muestreo en pausa
+        self.phase = None                               # Fase del muestreo por etapas: "countdown", "steps" o None
+        self.period = 0                                 # Duración (ms) de cada etapa
+        self.steps = 0                                  # Cantidad de etapas
+        self.powerSteps = np.zeros(0)                   # Throttle de cada etapa
+        self.stepIndex = 0                              # Etapa actual
+        self.stepsStart = 0.0                           # Instante (time.monotonic) en que comienza la primer etapa. La etapa k concluye en stepsStart + (k+1)*period
+        self.stepLog = []                               # Inicio de cada etapa, en tiempo del anfitrión y del microcontrolador. Vease 'beginStep()'
+        self.boundaryPending = False                    # Flag de etapa iniciada cuya marca temporal del microcontrolador aún no se conoce
+        self.throttleLog = {}                           # Cambios de etapa y Throttle de la sesión activa por canal: [[indice de la lectura, etapa, Throttle], ...]
+        self.lastDeviceTime = 0                         # Marca temporal de la última lectura guardada
+        self.countdown = self.defaultCountdown          # Segundos restantes de la cuenta regresiva
+        self.stats = stepStatistics(CHANNELS + DERIVED) # Estadísticas por canal y por etapa de la secuencia actual. Vease 'stepstats.py'
+        self.fusion = channelFusion(self.fusionInterval)    # Remuestreo de los canales medidos sobre una base temporal común para los canales derivados
+        self.filters = {c: filterChain(self.filterSpec.get(c, "")) for c in CHANNELS}  # Cadenas de filtros de cada canal, con su estado entre bloques
+        self.throttle = 0                               # Última configuración de Throttle enviada al microcontrolador
+        self.throttleStep = -1                          # Etapa de 'powerSteps' a la que corresponde 'throttle'. -1 en el modo de barrido
+        self.metrics = pipelineMetrics()                # Métricas de rendimiento del recorrido de las lecturas
+        self.lostAtStart = 0                            # Lecturas perdidas en el enlace al iniciar la sesión activa
+        self.catalog = None                             # Catálogo donde se indexa cada sesión concluida respaldada en disco y nombre del banco. Vease 'catalog.py'
+        self.rigName = None
+        self.catalogued = set()                         # Rutas de las sesiones ya indexadas
+        self.log = print
+        self.console = None
+        self.onData = None
+
+    # ==== Conexión ==== #
+
+    def start(self):                                    # Método para iniciar el administrador de conexión y recuperar las sesiones interrumpidas
+        for path in (interruptedSessions(self.spillDir) if self.spillDir is not None else []):
+            self.sessions.append(sessionStore(path=path))
+            self.sessions[-1].close()
+            self.dataSets += 1
+            self.sessions[-1].meta = {"session": self.dataSets}
+            self.catalogSession(self.sessions[-1], self.sessions[-1].meta)
+            self.log("Recovered interrupted session: " + path + " (" + str(len(self.sessions[-1]["T"])) + " thrust samples)")
+        self.connection.start()
+
+    def stop(self):                                     # Método para concluir la sesión activa, esperar a que todas las sesiones se escriban en disco y liberar el puerto
+        self.connection.stop()
+        self.finishSession()
+        for writer in self.closedWriters:
+            writer.join()
+            if writer.error is not None:
+                self.log("Export error: " + str(writer.error))
+        self.closedWriters = []
+
+    def isConnected(self):
+        return self.connection.isConnected()
+
+    def pollConnection(self):                           # Método que atiende los sucesos reportados por el administrador de conexión. Devuelve la lista de sucesos
+        events = []
+        while not self.connection.events.empty():
+            (event, port) = self.connection.events.get()
+            if event == "connected":                    # -> Al conectarse un dispositivo, preparar el decodificador del formato acordado
+                self.decoder = binaryDecoder(self.connection.sequenced) if self.connection.linkFormat == "binary" else asciiDecoder()
+                self.torquePairer.reset()
+                self.metrics.setLink(self.connection.baudrate, self.connection.sequenced)
+                self.log("Connected at: " + port + ". Link format: " + self.connection.linkFormat + ", " + str(self.connection.baudrate) + " baud"
+                         + (", sequence numbers" if self.connection.sequenced else ""))
+            else:                                       # -> Al desconectarse, detener la sesión activa
+                self.abort()
+            events.append((event, port))
+        return events
+
+    def abort(self):                                    # Método para detener el muestreo cuando se pierde la conexión
+        self.phase = None
+        self.boundaryPending = False
+        self.readStatus = 0
+
+    def write(self, command):                           # Método para enviar una orden de un carácter al microcontrolador
+        self.connection.write(bytes(command, 'utf-8'))
+
+    # ==== Control de modo, muestreo y Throttle ==== #
+
+    def selectMode(self, mode):                         # Método para seleccionar el modo de muestreo ("Manual" o "Auto Period") y ordenar al microcontrolador
+        if mode != self.mode:                           # cambiar a modo de lectura. Al cambiar de modo, la sesión del modo anterior concluye con sus metadatos
+            if self.phase is not None:                  # -> Interrumpir la secuencia de etapas en curso y apagar el motor
+                self.setThrottle(0)
+            if self.readStatus == 1 and self.isConnected():
+                self.write("s")
+            self.abort()
+            self.pauseStatus = 0
+            self.finishSession()
+        self.mode = mode
+        self.write("X")
+
+    def startSweep(self):                               # Método para iniciar o reanudar el muestreo de barrido. Devuelve False si no hay conexión
+        if not self.isConnected():
+            return False
+        if self.readStatus == 0:                        # -> En caso de que no haya una sesión activa, crear una nueva
+            self.sessions.append(self.newSession())
+            self.dataSets += 1
+            self.readStatus = 1
+            self.throttleStep = -1
+            self.openSessionWriter()
+        self.pauseStatus = 0
+        self.write("r")                                 # -> Ordenar al microcontrolador a exportar lecturas
+        return True
+
+    def pauseSweep(self):                               # Método para pausar el muestreo de barrido
+        if self.isConnected():
+            self.write("s")
+            self.pauseStatus = 1
+        if self.writer is not None:                     # -> Asegurar que las lecturas escritas hasta el momento lleguen a disco
+            self.writer.flush()
+
+    def startSteps(self, period, steps, countdown=None):    # Método para iniciar el muestreo por etapas. Requiere la duración de cada etapa (ms) y la cantidad
+        if period <= 0 or steps <= 0:                        # de etapas. Inicia la cuenta regresiva; las etapas comienzan al concluir esta
+            raise ValueError("Invalid values entered for step configuration")
+        if not self.isConnected():
+            return False
+        self.sessions.append(self.newSession())         # -> Concluir antes la sesión anterior, con su duración y cantidad de etapas
+        self.dataSets += 1
+        (self.period, self.steps) = (int(period), int(steps))
+        self.stepIndex = 0
+        self.stepLog = []
+        self.powerSteps = np.linspace(*self.throttleRange, self.steps)  # -> Throttle de cada etapa dentro del rango especificado
+        self.stats.reset(self.powerSteps, min(self.settleTime, self.period / 2))
+        self.setThrottle(self.powerSteps[0], 0)                         # -> Cambiar a la primer etapa de Throttle
+        self.openSessionWriter()
+        self.readStatus = 1
+        self.write("r")                                 # -> Ordenar al microcontrolador a exportar lecturas
+        self.countdown = self.defaultCountdown if countdown is None else countdown
+        self.phase = "countdown"
+        self.stepsStart = time.monotonic() + self.countdown         # -> Las etapas se programan desde un origen fijo del reloj monotónico, por lo que
+                                                                    #    su duración no depende de la puntualidad con la que se llame a 'update()'
+        self.log("Countdown begin at: " + str(self.countdown) + "seconds")
+        return True
+
+    def setThrottle(self, value, step=-1):              # Método para cambiar la configuración de Throttle. Requiere el valor y, opcionalmente, la etapa a la que corresponde
+        if not self.isConnected():
+            return False
+        self.throttle = value
+        self.throttleStep = step
+        self.write("n")                                 # -> Ordenar al microcontrolador a cambiar la configuración de Throttle
+        self.connection.write(struct.pack("I", int(value)))     # -> Enviar la configuración empaquetada como entero de 4 bytes
+        if self.readStatus == 1:                        # -> En caso de que haya una sesión activa, ordenar a resumir la exportación de lecturas
+            self.write("r")
+        return True
+
+    def resetTime(self):                                # Método para reiniciar las marcas temporales del microcontrolador y descartar los datos pendientes
+        self.write("t")
+        self.connection.reset()
+        self.decoder.reset()                            # -> Descartar la linea o trama incompleta y no contar como perdidas las lecturas descartadas
+        self.torquePairer.reset()
+
+    def update(self):                                   # Método que el cliente debe llamar cada 'samplingInterval' ms. Procesa las lecturas recibidas y avanza la
+        t0 = time.perf_counter()                        # secuencia de etapas. Ejecuta:
+        if self.phase == "countdown":
+            self.receivedSamples()                      # -> Durante la cuenta regresiva, descartar las lecturas recibidas
+            self.updateCountdown()
+        elif self.phase == "steps":
+            self.updateSteps()
+        elif self.readStatus == 1 and self.pauseStatus == 0:
+            self.readSamples()
+        if self.writer is not None and self.writer.error is not None:  # -> Reportar un error de exportación en cuanto ocurre y dejar de exportar la sesión activa;
+            self.log("Export error: " + str(self.writer.error))         #    la adquisición continua
+            self.writer = None
+        self.metrics.observe("update", time.perf_counter() - t0)
+
+    def updateCountdown(self):                          # Método llamado en cada 'update()' durante la cuenta regresiva. Los mensajes y el inicio de las etapas se
+        remaining = self.stepsStart - time.monotonic()  # deciden por el tiempo restante según el reloj monotónico, no por la cantidad de llamadas
+        if remaining <= 0:
+            self.countdown = self.defaultCountdown
+            self.phase = "steps"
+            self.beginStep(0)
+            self.log("Sampling by Step begin. Throttle at: " + str(self.powerSteps[0]))
+        elif math.ceil(remaining) < self.countdown:
+            self.countdown = math.ceil(remaining)
+            self.log("Countdown: " + str(self.countdown) + "seconds")
+
+    def updateSteps(self):                              # Método llamado en cada 'update()' durante el muestreo por etapas. La etapa actual concluye cuando el reloj
+        if time.monotonic() < self.stepsStart + (self.stepIndex + 1) * self.period / 1000:     # monotónico alcanza su límite programado. Un retraso del
+            self.readSamples()                          # anfitrión acorta únicamente la etapa en curso, sin acumularse en las siguientes
+            return
+        self.readSamples()                              # -> Guardar con la etapa que concluye las lecturas recibidas hasta el momento
+        self.stepIndex += 1
+        if self.stepIndex < self.steps:                 # -> Cambiar a la configuración de Throttle de la siguiente etapa
+            self.setThrottle(self.powerSteps[self.stepIndex], self.stepIndex)
+            self.beginStep(self.stepIndex)
+            self.log("Step Change. Throttle at: " + str(self.powerSteps[self.stepIndex]))
+        else:                                           # -> Al concluir todas las etapas, apagar el motor, pausar la exportación y concluir la sesión
+            self.endSteps()
+            self.phase = None
+            self.readStatus = 0
+            self.setThrottle(0)
+            self.write("s")
+            self.stepIndex = 0
+            self.log("Sampling by Step Done")
+            self.logStepTiming()
+            self.log("Step statistics:")                # -> El resultado de la prueba esta listo al concluir la última etapa
+            for line in self.stats.table():
+                self.log(line)
+            self.finishSession()
+
+    def beginStep(self, step):                          # Método que registra el inicio de una etapa. El inicio en tiempo del microcontrolador es la marca temporal de
+        self.stepLog.append({"step": step, "throttle": float(self.powerSteps[step]), "requested": self.period,    # la primer lectura
+            "hostStart": round(1000 * (time.monotonic() - self.stepsStart), 1), "deviceStart": None})           # guardada de la etapa
+        self.boundaryPending = True
+
+    def endSteps(self):                                 # Método que calcula la duración real de cada etapa, medida con el reloj del anfitrión y con las marcas
+        hostEnd = round(1000 * (time.monotonic() - self.stepsStart), 1)     # temporales del microcontrolador
+        for (k, entry) in enumerate(self.stepLog):
+            following = self.stepLog[k+1] if k+1 < len(self.stepLog) else {"hostStart": hostEnd, "deviceStart": self.lastDeviceTime}
+            entry["host"] = round(following["hostStart"] - entry["hostStart"], 1)
+            if entry["deviceStart"] is not None and following["deviceStart"] is not None:
+                entry["device"] = following["deviceStart"] - entry["deviceStart"]
+
+    def logStepTiming(self):                            # Método que reporta la duración solicitada y la real de cada etapa
+        self.log("Step timing (requested / device / host ms):")
+        for entry in self.stepLog:
+            self.log("  %d: %d / %s / %.0f" % (entry["step"], entry["requested"], entry.get("device", "-"), entry["host"]))
+
+    # ==== Lecturas ==== #
+
+    def receivedSamples(self):                          # Método que vacia el hilo de adquisición y decodifica el bloque recibido. Devuelve los vectores (t, y, ch)
+        (waiting, queued) = self.connection.backlog()
+        self.metrics.gauge("serial.backlog", waiting)   # -> Bytes pendientes en el puerto y en la cola al momento de vaciarla
+        self.metrics.gauge("queue.bytes", queued)
+        t0 = time.perf_counter()
+        data = self.connection.drainBytes()
+        t1 = time.perf_counter()
+        (garbled, lost) = (self.decoder.garbled(), self.decoder.lost())
+        (t, y, ch) = self.decoder.feed(data)
+        self.metrics.observe("drain", t1 - t0)
+        self.metrics.observe("parse", time.perf_counter() - t1)
+        self.metrics.count("rx.bytes", len(data))
+        self.metrics.count("samples", len(t))
+        self.metrics.count("garbled", self.decoder.garbled() - garbled)
+        self.metrics.count("lost", self.decoder.lost() - lost)
+        return (t, y, ch)
+
+    def readSamples(self):                              # Método que procesa todas las lecturas recibidas desde la última llamada
+        (t, y, ch) = self.receivedSamples()
+        if len(t):
+            if self.console is not None:
+                self.console(self.decoder.consoleText())
+            self.processSamples(t, y, ch)
+
+    def processSamples(self, t, y, ch):                 # Método que filtra y guarda en la sesión activa un bloque de lecturas (t, y, ch). Se utiliza el valor absoluto
+        yAbs = np.abs(y)                                # de las lecturas
+        session = self.sessions[-1]
+        sel = (ch == CH_T)
+        if np.any(sel):                                 # -> Tracción
+            self.storeBlock("T", session, t[sel], self.filterBlock("T", t[sel], yAbs[sel]), yAbs[sel])
+        (promx, promy) = self.torquePairer.pair(t, yAbs, ch)
+        if len(promx):                                  # -> Torque: promedio de cada pareja M1/M2
+            promx = np.rint(promx)
+            self.storeBlock("M", session, promx, self.filterBlock("M", promx, promy), promy)
+        sel = (ch == CH_R)
+        if np.any(sel):                                 # -> Velocidad angular
+            self.storeBlock("R", session, t[sel], self.filterBlock("R", t[sel], yAbs[sel]), yAbs[sel])
+        (grid, aligned) = self.fusion.fuse()
+        if len(grid):                                   # -> Canales derivados, calculados únicamente sobre las marcas nuevas de la base común
+            derived = derivedChannels(aligned, self.airDensity, self.propDiameter)
+            for c in DERIVED:
+                self.storeBlock(c, session, grid, derived[c])
+
+    def filterBlock(self, channel, t, y):               # Método que aplica a un bloque de lecturas la cadena de filtros de su canal. Vease 'filters.py'
+        chain = self.filters[channel]
+        (t0, rejected) = (time.perf_counter(), chain.rejected())
+        out = chain.apply(t, y)
+        self.metrics.observe("filter", time.perf_counter() - t0)
+        self.metrics.count("filter.rejected", chain.rejected() - rejected)
+        return out
+
+    def setFilters(self, specs):                        # Método para reemplazar las cadenas de filtros. Requiere un diccionario {canal: especificación}; los canales
+        chains = {c: filterChain(spec) for (c, spec) in specs.items()}     # omitidos conservan la suya. Lanza ValueError si una especificación no es válida
+        self.filters.update(chains)
+        self.filterSpec = {c: chain.spec for (c, chain) in self.filters.items()}
+
+    def storeBlock(self, channel, session, t, y, raw=None):     # Método que inserta un bloque filtrado 'y' en un canal de la sesión, junto con sus lecturas sin filtrar 'raw',
+        t0 = time.perf_counter()                                # lo encola para exportar y lo notifica al cliente
+        record = session[channel]
+        log = self.throttleLog.setdefault(channel, [])
+        if not log or log[-1][1:] != [self.throttleStep, float(self.throttle)]:    # -> Registrar desde qué lectura rigen la etapa y el Throttle activos, para
+            log.append([len(record), self.throttleStep, float(self.throttle)])     #    reconstruirlos al exportar la sesión concluida. Vease 'export.sessionBlocks()'
+        record.extend(t, y)
+        if channel in session.raw:
+            session.raw[channel].extend(t, y if raw is None else raw)
+        if channel in self.fusion.channels:
+            self.fusion.push(channel, t, y)
+        if self.boundaryPending:                        # -> Primer bloque de una etapa: registrar su inicio en tiempo del microcontrolador y escribir la marca de
+            self.boundaryPending = False                #    cambio de etapa en el canal "S" (marca temporal, Throttle) del archivo exportado
+            self.stepLog[-1]["deviceStart"] = int(t[0])
+            self.stats.startStep(self.throttleStep, int(t[0]))
+            if self.writer is not None:
+                self.writer.append("S", t[:1], [self.throttle], self.throttleStep, self.throttle)
+        self.lastDeviceTime = int(t[-1])
+        if self.phase == "steps":                       # -> Acumular las estadísticas de la etapa activa
+            self.stats.update(channel, self.throttleStep, t, y)
+        if self.writer is not None:
+            self.writer.append(channel, t, y, self.throttleStep, self.throttle, raw)
+        t1 = time.perf_counter()
+        self.metrics.observe("buffer", t1 - t0)
+        if self.onData is not None:
+            self.onData(channel, record, t, y)
+            self.metrics.observe("client", time.perf_counter() - t1)
+
+    # ==== Sesiones y exportación ==== #
+
+    def newSession(self):                               # Método que crea el almacenamiento de una nueva sesión, respaldado en 'spillDir' en caso de que este especificado.
+        self.finishSession()                            # Concluye antes la sesión anterior y descarta el estado de los filtros
+        for chain in self.filters.values():
+            chain.reset()
+        self.fusion.reset()
+        self.throttleLog = {}
+        self.lostAtStart = self.decoder.lost()
+        if self.spillDir is None:
+            return sessionStore()
+        stamp = os.path.join(self.spillDir, time.strftime("%Y%m%d-%H%M%S"))
+        k = len(self.sessions) + 1
+        while os.path.exists(stamp + "-" + str(k)):     # -> Nunca reutilizar el directorio de otra sesión
+            k += 1
+        return sessionStore(path=stamp + "-" + str(k))
+
+    def finishSession(self):                            # Método llamado al concluir una sesión. Termina de escribir la sesión exportada y marca como concluida la
+        if not self.sessions:                           # sesión respaldada en disco, que se indexa en el catálogo. Sus metadatos se conservan para exportarla después
+            self.closeSessionWriter()
+            return
+        session = self.sessions[-1]
+        if session.meta is None:
+            session.meta = self.sessionMeta()
+        self.closeSessionWriter(session.meta)
+        session.close()
+        self.catalogSession(session, session.meta)
+
+    def catalogSession(self, session, meta):            # Método que indexa una sesión concluida en el catálogo, una sola vez. Las sesiones guardadas solo en memoria o
+        if self.catalog is None or session.path is None or session.path in self.catalogued:    # sin lecturas no se indexan
+            return
+        if not any(len(record) for record in session.channels.values()):
+            return
+        try:
+            self.catalog.add(session, meta, self.rigName, self.label)
+            self.catalogued.add(session.path)
+        except (OSError, sqlite3.Error) as e:
+            self.log("Catalog error: " + str(e))
+
+    def resetSessions(self):                            # Método para descartar las sesiones guardadas en memoria. Las sesiones respaldadas se conservan en 'spillDir'.
+        self.finishSession()                            # Si hay una sesión activa, concluye y el muestreo continua en una sesión nueva
+        self.sessions = []
+        self.dataSets = 0
+        if self.readStatus == 1:
+            self.sessions.append(self.newSession())
+            self.dataSets += 1
+            self.openSessionWriter()
+
+    def exportTo(self, base, ext, numbered=True):       # Método para habilitar la exportación continua a '<base>_<sesión><ext>' ('<base><ext>' si 'numbered' es False).
+        self.exportPath = (base, ext, numbered)         # Exporta en segundo plano las sesiones ya guardadas y, en caso de que haya una sesión activa, continua
+                                                        # escribiendola conforme lleguen sus lecturas. Sin numerar, únicamente se exporta la sesión activa o la
+        for k in range(len(self.sessions)):             # siguiente, ya que todas compartirían el mismo archivo (p. ej. las recuperadas al iniciar)
+            if not numbered or (k == len(self.sessions)-1 and self.readStatus == 1):
+                continue
+            if any(len(record) for record in self.sessions[k].channels.values()):
+                try:
+                    self.releasePath(self.sessionPath(k+1))
+                    self.closedWriters.append(exportSession(self.sessionPath(k+1), self.sessions[k], self.sessions[k].meta or {"session": k+1}))
+                except (OSError, RuntimeError, ValueError) as e:
+                    self.log("Export error: " + str(e))
+                    return False
+        if self.readStatus == 1 and self.writer is None:
+            self.openSessionWriter()
+            if self.writer is not None:
+                for block in sessionBlocks(self.sessions[-1], self.sessionMeta()):    # -> Lecturas ya guardadas, con la etapa y el Throttle
+                    self.writer.append(*block)                                                      #    vigentes en cada una
+        self.log("Exporting sessions to: " + base + ("_<session>" if numbered else "") + ext)
+        return True
+
+    def sessionPath(self, session):                     # Método que devuelve la ruta del archivo de exportación de una sesión
+        (base, ext, numbered) = self.exportPath
+        return base + "_" + str(session) + ext if numbered else base + ext
+
+    def releasePath(self, path):                        # Método que espera a que concluyan los escritores anteriores del archivo 'path', para nunca abrir dos escritores
+        for writer in self.closedWriters:               # sobre el mismo archivo
+            if writer.is_alive() and os.path.abspath(writer.path) == os.path.abspath(path):
+                writer.join()
+
+    def sessionMeta(self):                              # Método que devuelve los metadatos de la sesión activa que se guardan junto con sus lecturas
+        return {"session": self.dataSets, "mode": self.mode, "period": self.period, "steps": self.steps,
+                "powerSteps": np.atleast_1d(self.powerSteps).tolist() if self.mode == "Auto Period" else [],
+                "stepTiming": self.stepLog if self.mode == "Auto Period" else [],
+                "throttleLog": self.throttleLog,
+                "filters": dict(self.filterSpec), "fusionInterval": self.fusion.interval, "propDiameter": self.propDiameter,
+                "airDensity": self.airDensity, "rig": self.rigName, "link": {"format": self.connection.linkFormat, "baudrate": self.connection.baudrate,
+                "sequenced": self.connection.sequenced, "lost": max(self.decoder.lost() - self.lostAtStart, 0)}, "label": self.label, "settle": self.stats.settle, "stepStats": self.stats.summary() if self.mode == "Auto Period" else []}
+
+    def openSessionWriter(self):                        # Método llamado al iniciar una sesión. En caso de que la exportación continua este habilitada, crea el escritor
+        self.closeSessionWriter()                       # en segundo plano de la nueva sesión. Vease 'export.sessionWriter'
+        if self.exportPath is None:
+            return
+        try:
+            self.releasePath(self.sessionPath(self.dataSets))
+            self.writer = sessionWriter(self.sessionPath(self.dataSets), self.sessionMeta())
+        except (OSError, RuntimeError, ValueError) as e:
+            self.log("Export error: " + str(e))
+
+    def closeSessionWriter(self, meta=None):            # Método llamado al concluir una sesión. El escritor termina de escribir los bloques pendientes y cierra el
+        if self.writer is not None:                     # archivo en segundo plano con los metadatos finales 'meta' (por defecto, los de la sesión activa)
+            if self.writer.error is not None:
+                self.log("Export error: " + str(self.writer.error))
+            self.writer.close(self.sessionMeta() if meta is None else meta)     # -> Los metadatos finales incluyen la duración real de las etapas
+            self.closedWriters = [w for w in self.closedWriters if w.is_alive()] + [self.writer]
+            self.writer = None
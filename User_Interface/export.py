@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de exportación de Sampler. Contiene el escritor de sesiones que guarda las lecturas en disco por bloques, en un hilo
+# independiente, mientras la adquisición continúa. Formatos disponibles:
+#
+#   .csv        Una fila por lectura: canal, marca temporal (ms), lectura, etapa, Throttle y lectura sin filtrar
+#   .npz        Archivo zip comprimido con un vector .npy por columna y por tramo de 'chunk' lecturas de cada canal. Vease 'loadSession()'
+#   .parquet    Tabla columnar comprimida. Requiere el módulo opcional 'pyarrow'
+#
+# La columna 'raw' guarda cada lectura tal como se recibió, antes de la cadena de filtros del canal (vease 'filters.py'). Las columnas
+# 'step' y 'throttle' de una sesión exportada después de concluir se reconstruyen de sus metadatos ('throttleLog' y 'stepTiming',
+# vease 'samplerEngine.sessionMeta()'), por lo que coinciden con las de la exportación continua.
+
+import json
+import queue
+import threading
+import zipfile
+import numpy as np
+
+
+FORMATS = (".csv", ".npz", ".parquet")
+
+
+class csvWriter:                                        # Escritor de sesiones en formato CSV
+    def __init__(self, path):
+        self.file = open(path, "w")
+        self.file.write("channel,t_ms,value,step,throttle,raw\n")
+
+    def write(self, channel, t, y, step, throttle, raw):
+        block = np.column_stack((t, y, step, throttle, raw))
+        np.savetxt(self.file, block, fmt=channel + ",%d,%.5f,%d,%.2f,%.5f")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self, meta):
+        self.file.close()
+
+
+class npzWriter:                                        # Escritor de sesiones en formato NPZ. Los bloques de cada canal se acumulan en memoria y se agregan al archivo zip como
+    columns = ("t", "y", "step", "throttle", "raw")    # miembros nuevos cada 'chunk' lecturas (o al vaciar o cerrar el archivo), sin reescribir los anteriores
+    dtypes = (np.uint32, np.float32, np.int16, np.float32, np.float32)
+
+    def __init__(self, path, chunk=1 << 16):
+        self.zip = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+        self.chunk = chunk
+        self.pending = {}                               # Canal -> lista de bloques (t, y, step, throttle, raw) aún no escritos
+        self.pendingRows = {}
+        self.parts = {}                                 # Canal -> cantidad de tramos ya escritos
+
+    def write(self, channel, t, y, step, throttle, raw):
+        self.pending.setdefault(channel, []).append((t, y, step, throttle, raw))
+        self.pendingRows[channel] = self.pendingRows.get(channel, 0) + len(t)
+        if self.pendingRows[channel] >= self.chunk:
+            self.writePending(channel)
+
+    def writePending(self, channel):                    # Método que escribe los bloques pendientes de un canal como un tramo: un miembro por columna
+        blocks = self.pending.pop(channel, [])
+        self.pendingRows[channel] = 0
+        if not blocks:
+            return
+        part = self.parts.get(channel, 0)
+        for (k, (name, dtype)) in enumerate(zip(self.columns, self.dtypes)):
+            with self.zip.open("%s_%s_%d.npy" % (channel, name, part), "w") as member:
+                np.lib.format.write_array(member, np.concatenate([np.asarray(b[k], dtype) for b in blocks]))
+        self.parts[channel] = part + 1
+
+    def flush(self):
+        for channel in list(self.pending):
+            self.writePending(channel)
+        self.zip.fp.flush()
+
+    def close(self, meta):
+        for channel in list(self.pending):
+            self.writePending(channel)
+        self.zip.writestr("meta.json", json.dumps(meta))
+        self.zip.close()
+
+
+class parquetWriter:                                    # Escritor de sesiones en formato Parquet. Requiere 'pyarrow'
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires the 'pyarrow' package")
+        self.pa = pa
+        self.schema = pa.schema([("channel", pa.string()), ("t_ms", pa.uint32()), ("value", pa.float32()),
+                                 ("step", pa.int16()), ("throttle", pa.float32()), ("raw", pa.float32())])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, channel, t, y, step, throttle, raw):
+        n = len(t)
+        self.writer.write_table(self.pa.table({"channel": [channel]*n, "t_ms": np.asarray(t, np.uint32), "value": np.asarray(y, np.float32),
+                                               "step": np.asarray(step, np.int16), "throttle": np.asarray(throttle, np.float32),
+                                               "raw": np.asarray(raw, np.float32)}, schema=self.schema))
+
+    def flush(self):
+        pass
+
+    def close(self, meta):
+        self.writer.add_key_value_metadata({"sampler": json.dumps(meta)})
+        self.writer.close()
+
+
+WRITERS = {".csv": csvWriter, ".npz": npzWriter, ".parquet": parquetWriter}
+
+
+class sessionWriter(threading.Thread):                  # Clase del hilo que escribe una sesión en disco. Los bloques se encolan desde la interfaz y se escriben en segundo plano
+    def __init__(self, path, meta=None):                # Requiere la ruta del archivo (el formato se elige por su extensión) y los metadatos de la sesión
+        super().__init__(daemon=True)
+        self.path = path
+        self.meta = dict(meta or {})
+        self.writer = WRITERS[extensionOf(path)](path)  # El archivo se crea de inmediato para que los errores (p. ej. ruta inválida) se reporten al iniciar
+        self.blocks = queue.SimpleQueue()
+        self.error = None
+        self.start()
+
+    def run(self):
+        while True:
+            item = self.blocks.get()
+            try:
+                if item is None:                        # -> Fin de la sesión: escribir metadatos y cerrar el archivo
+                    self.writer.close(self.meta)
+                    return
+                if item == "flush":
+                    self.writer.flush()
+                else:
+                    self.writer.write(*item)
+            except Exception as e:                      # -> Un error de disco no debe detener la adquisición; se guarda para reportarlo y se descartan los
+                self.error = e                          #    bloques pendientes. Los siguientes ya no se encolan (vease 'append()')
+                while True:
+                    try:
+                        self.blocks.get_nowait()
+                    except queue.Empty:
+                        return
+
+    def append(self, channel, t, y, step=-1, throttle=0.0, raw=None):  # Método para encolar un bloque de lecturas de un canal con la etapa y el Throttle activos (un
+        n = len(t)                                                      # valor para todo el bloque o uno por lectura) y, opcionalmente, las lecturas sin filtrar
+        if n and self.error is None:                                    # (por defecto, iguales a 'y'). Después de un error de escritura no hace nada
+            y = np.array(y, np.float32)
+            self.blocks.put((channel, np.array(t, np.uint32), y, np.array(np.broadcast_to(np.asarray(step, np.int16), n)),
+                             np.array(np.broadcast_to(np.asarray(throttle, np.float32), n)), y if raw is None else np.array(raw, np.float32)))
+
+    def flush(self):                                    # Método para forzar que los bloques escritos lleguen a disco (p. ej. al pausar la sesión)
+        if self.error is None:
+            self.blocks.put("flush")
+
+    def close(self, meta=None):                         # Método para terminar la sesión. Los bloques pendientes se escriben antes de cerrar el archivo
+        self.meta.update(meta or {})
+        self.blocks.put(None)
+
+
+def extensionOf(path):
+    for ext in FORMATS:
+        if path.lower().endswith(ext):
+            return ext
+    raise ValueError("Unsupported export format: " + path)
+
+
+def stepColumns(log, n):                                # Función que reconstruye la etapa y el Throttle de cada una de las 'n' lecturas de un canal a partir de su registro de
+    step = np.full(n, -1, np.int16)                     # cambios [[indice, etapa, Throttle], ...] (vease 'samplerEngine.storeBlock()')
+    throttle = np.zeros(n, np.float32)
+    for (k, (start, s, value)) in enumerate(log):
+        stop = log[k+1][0] if k+1 < len(log) else n
+        step[start:stop] = s
+        throttle[start:stop] = value
+    return (step, throttle)
+
+
+def sessionBlocks(session, meta=None, chunk=65536):     # Función que devuelve los bloques (canal, t, y, etapa, Throttle, raw) de una sesión guardada, de a lo sumo 'chunk'
+    meta = meta or {}                                   # lecturas, con las marcas de cambio de etapa (canal "S") de 'stepTiming'
+    log = meta.get("throttleLog", {})
+    marks = [e for e in meta.get("stepTiming", []) if e.get("deviceStart") is not None]
+    if marks:
+        yield ("S", [e["deviceStart"] for e in marks], [e["throttle"] for e in marks], [e["step"] for e in marks], [e["throttle"] for e in marks], None)
+    for (channel, record) in session.channels.items():
+        (t, y) = record.view()
+        raw = session.rawView(channel)
+        (step, throttle) = stepColumns(log.get(channel, []), len(t))
+        for i in range(0, len(t), chunk):
+            yield (channel, t[i:i+chunk], y[i:i+chunk], step[i:i+chunk], throttle[i:i+chunk], raw[i:i+chunk])
+
+
+def exportSession(path, session, meta=None, chunk=65536):   # Función para exportar una sesión ya guardada con sus metadatos. Los canales se escriben por bloques de
+    writer = sessionWriter(path, meta)                       # 'chunk' lecturas desde las vistas de 'storage.sessionStore', en segundo plano
+    for block in sessionBlocks(session, meta, chunk):
+        writer.append(*block)
+    writer.close()
+    return writer
+
+
+def loadSession(path):                                  # Función para cargar una sesión exportada en formato NPZ. Devuelve {canal: {columna: vector}} y los metadatos
+    columns = {}
+    with zipfile.ZipFile(path) as z:
+        meta = json.loads(z.read("meta.json")) if "meta.json" in z.namelist() else {}
+        members = [name[:-4].split("_") + [name] for name in z.namelist() if name.endswith(".npy")]
+        for (channel, column, part, name) in sorted(members, key=lambda m: (m[0], m[1], int(m[2]))):
+            with z.open(name) as member:
+                columns.setdefault(channel, {}).setdefault(column, []).append(np.lib.format.read_array(member))
+    return ({c: {k: np.concatenate(v) for (k, v) in cols.items()} for (c, cols) in columns.items()}, meta)
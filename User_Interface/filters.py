@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de filtros de Sampler. Reemplaza al filtro anti-ruido de límites fijos ('noiseProtect') por una cadena configurable de
+# filtros por canal. Cada filtro procesa bloques completos de lecturas con operaciones vectorizadas de numpy y conserva su estado
+# entre bloques (últimas lecturas, último valor válido, salida anterior), por lo que el resultado no depende de cómo se dividan
+# las lecturas en bloques. Filtros disponibles y su especificación en texto (vease 'parseChain()'):
+#
+#   range:lo:hi             Reemplaza las lecturas fuera de [lo, hi] por la última lectura válida
+#   hampel:window:nsigma    Reemplaza por la mediana las lecturas que se alejan de la mediana de las últimas 'window' lecturas más de
+#                           'nsigma' desviaciones (estimadas con la desviación absoluta mediana). Rechaza picos aislados del HX711 y de la sonda de RPM.
+#                           La ventana es causal (solo lecturas anteriores), por lo que también reemplaza las primeras lecturas de un escalón
+#                           real (p. ej. un cambio de etapa); no conviene en canales con cambios bruscos de nivel
+#   median:window           Mediana de las últimas 'window' lecturas
+#   ema:alpha               Promedio móvil exponencial (pasa bajas) con factor 'alpha' en (0, 1]
+#   fir:taps                Promedio de las últimas 'taps' lecturas (pasa bajas FIR). 'firFilter' acepta también coeficientes arbitrarios
+#   rate:maxRate            Reemplaza por la última lectura válida las lecturas que cambian más de 'maxRate' unidades por ms respecto a la anterior
+#
+# Una cadena se especifica separando los filtros con comas, p. ej. "range:0:2,hampel:9:3,ema:0.3". Una cadena vacia no filtra.
+# Los filtros que reemplazan lecturas (range, hampel y rate) cuentan las lecturas rechazadas en 'rejected' (vease 'metrics.py').
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def forwardFill(y, valid, last):                        # Función que reemplaza las lecturas no válidas por la última válida anterior ('last' para las del inicio del bloque)
+    index = np.maximum.accumulate(np.where(valid, np.arange(len(y)), -1))
+    return np.where(index >= 0, y[np.maximum(index, 0)], last)
+
+
+class rangeFilter:                                      # Filtro de límites de tolerancia
+    def __init__(self, lo, hi):
+        (self.lo, self.hi) = (float(lo), float(hi))
+        self.rejected = 0                               # Lecturas reemplazadas desde la creación del filtro
+        self.reset()
+
+    def reset(self):
+        self.last = 0.0                                 # Última lectura válida. 0 mientras no haya ninguna
+
+    def apply(self, t, y):
+        valid = (y >= self.lo) & (y <= self.hi)
+        if valid.all():
+            out = y
+        else:
+            out = forwardFill(y, valid, self.last)
+            self.rejected += len(y) - int(np.count_nonzero(valid))
+        if valid.any():
+            self.last = float(y[np.flatnonzero(valid)[-1]])
+        return out
+
+
+class windowFilter:                                     # Clase base de los filtros sobre las últimas 'window' lecturas. Conserva las 'window' - 1 lecturas anteriores
+    def __init__(self, window):                         # al bloque para que las ventanas del inicio de cada bloque esten completas
+        self.window = max(int(window), 1)
+        self.reset()
+
+    def reset(self):
+        self.history = None
+
+    def windows(self, y):                               # Método que devuelve una vista (sin copiar) de la ventana que termina en cada lectura del bloque
+        if self.history is None:                        # -> Antes de la primer lectura, se supone que la señal era igual a esta
+            self.history = np.full(self.window - 1, y[0])
+        extended = np.concatenate((self.history, y))
+        self.history = extended[len(extended) - (self.window - 1):]
+        return sliding_window_view(extended, self.window)
+
+
+class medianFilter(windowFilter):                       # Filtro de mediana
+    def apply(self, t, y):
+        return np.median(self.windows(y), axis=1)
+
+
+class hampelFilter(windowFilter):                       # Filtro de Hampel (rechazo de lecturas atípicas)
+    def __init__(self, window, nsigma=3):
+        super().__init__(window)
+        self.nsigma = float(nsigma)
+        self.rejected = 0
+
+    def apply(self, t, y):
+        windows = self.windows(y)
+        median = np.median(windows, axis=1)
+        mad = 1.4826 * np.median(np.abs(windows - median[:, None]), axis=1)     # -> Desviación absoluta mediana, escalada para estimar la desviación estándar
+        outlier = np.abs(y - median) > self.nsigma * mad
+        outlier &= mad > 0                              # -> Sin dispersión en la ventana (p. ej. señal constante) no hay criterio para rechazar
+        self.rejected += int(np.count_nonzero(outlier))
+        return np.where(outlier, median, y)
+
+
+class emaFilter:                                        # Filtro de promedio móvil exponencial: out[k] = alpha*y[k] + (1 - alpha)*out[k-1]
+    def __init__(self, alpha):
+        self.alpha = min(max(float(alpha), 1e-6), 1.0)
+        decay = 1.0 - self.alpha
+        self.chunk = max(int(250 / -np.log10(decay)), 1) if decay > 0 else 0    # Lecturas por tramo para que decay**chunk no pierda precisión
+        self.reset()
+
+    def reset(self):
+        self.out = None                                 # Última salida del filtro
+
+    def apply(self, t, y):                              # La recurrencia se resuelve por tramos con sumas acumuladas: out[k] = P[k]*(out[-1] + alpha*cumsum(y/P)[k]),
+        if self.chunk == 0:                             # con P[k] = decay**(k+1)
+            return y
+        if self.out is None:
+            self.out = float(y[0])
+        out = np.empty(len(y))
+        powers = (1.0 - self.alpha) ** np.arange(1, self.chunk + 1)
+        for i in range(0, len(y), self.chunk):
+            block = y[i:i+self.chunk]
+            p = powers[:len(block)]
+            out[i:i+len(block)] = p * (self.out + self.alpha * np.cumsum(block / p))
+            self.out = float(out[i+len(block)-1])
+        return out
+
+
+class firFilter:                                        # Filtro FIR causal. Requiere la cantidad de coeficientes (promedio móvil) o los coeficientes mismos
+    def __init__(self, taps):
+        taps = np.atleast_1d(np.asarray(taps, dtype=np.float64))
+        if len(taps) == 1:
+            taps = np.full(max(int(taps[0]), 1), 1.0 / max(int(taps[0]), 1))
+        self.taps = taps
+        self.reset()
+
+    def reset(self):
+        self.history = None                             # Últimas len(taps) - 1 lecturas del bloque anterior
+
+    def apply(self, t, y):
+        if self.history is None:
+            self.history = np.full(len(self.taps) - 1, y[0])
+        extended = np.concatenate((self.history, y))
+        self.history = extended[len(extended) - (len(self.taps) - 1):]
+        return np.convolve(extended, self.taps, mode="valid")
+
+
+class rateFilter:                                       # Filtro de razón de cambio
+    def __init__(self, maxRate):
+        self.maxRate = float(maxRate)
+        self.rejected = 0
+        self.reset()
+
+    def reset(self):
+        self.previous = None                            # Última lectura y marca temporal del bloque anterior
+        self.last = 0.0                                 # Última lectura válida
+
+    def apply(self, t, y):
+        if self.previous is None:
+            self.previous = (float(t[0]), float(y[0]))
+            self.last = float(y[0])
+        dt = np.diff(np.asarray(t, dtype=np.float64), prepend=self.previous[0])
+        dy = np.diff(y, prepend=self.previous[1])
+        valid = np.abs(dy) <= self.maxRate * np.maximum(dt, 1)   # -> Lecturas con la misma marca temporal se comparan como si distaran 1 ms
+        out = y if valid.all() else forwardFill(y, valid, self.last)
+        self.rejected += len(y) - int(np.count_nonzero(valid))
+        self.previous = (float(t[-1]), float(y[-1]))
+        self.last = float(out[-1])
+        return out
+
+
+FILTERS = {"range": rangeFilter, "hampel": hampelFilter, "median": medianFilter, "ema": emaFilter, "fir": firFilter, "rate": rateFilter}
+
+
+class filterChain:                                      # Clase de la cadena de filtros de un canal. Los filtros se aplican en orden sobre cada bloque
+    def __init__(self, spec=""):
+        self.spec = spec
+        self.filters = parseChain(spec)
+
+    def reset(self):                                    # Método para descartar el estado de los filtros (p. ej. al iniciar una nueva sesión)
+        for f in self.filters:
+            f.reset()
+
+    def rejected(self):                                 # Método que devuelve la cantidad de lecturas reemplazadas por los filtros de la cadena
+        return sum(getattr(f, "rejected", 0) for f in self.filters)
+
+    def apply(self, t, y):                              # Método que devuelve el bloque 'y' filtrado. Requiere las marcas temporales 't' (ms) del bloque
+        y = np.asarray(y, dtype=np.float64)
+        if not len(y):
+            return y
+        for f in self.filters:
+            y = f.apply(t, y)
+        return y
+
+
+def parseChain(spec):                                   # Función que crea los filtros de una especificación en texto. Lanza ValueError si no es válida
+    filters = []
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        (name, *args) = item.split(":")
+        if name not in FILTERS:
+            raise ValueError("Unknown filter '" + name + "'. Available: " + ", ".join(FILTERS))
+        try:
+            filters.append(FILTERS[name](*(float(a) for a in args)))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid parameters for filter: " + item)
+    return filters
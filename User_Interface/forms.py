@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de formularios de Sampler. Carga la interfaz elaborada en QtDesigner ('sampler.ui') en la ventana principal a partir de un
+# módulo de Python precompilado, en lugar de interpretar el archivo .ui en cada inicio con 'loadUi()'. El módulo precompilado
+# ('ui_sampler.py') y el de recursos con los iconos de la barra de herramientas ('Sampler_rc.py') se generan automáticamente la
+# primera vez, y de nuevo cada vez que 'sampler.ui' o 'Sampler.qrc' sean más recientes que ellos. Si no es posible generarlos
+# (p. ej. el directorio es de solo lectura), la interfaz se carga con 'loadUi()' como antes.
+#
+# Para generarlos manualmente (p. ej. al empaquetar la aplicación):
+#
+#   python forms.py
+
+import importlib
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FORM = os.path.join(HERE, "sampler.ui")
+FORM_MODULE = "ui_sampler"
+RESOURCES = os.path.join(HERE, "Sampler.qrc")
+RESOURCE_MODULE = "Sampler_rc"
+
+
+def isStale(source, target):                            # Función que indica si 'target' no existe o es más antiguo que 'source'
+    return not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(source)
+
+
+def compileForms():                                     # Función que genera los módulos precompilados que estén desactualizados. Devuelve True si ambos estan disponibles
+    targets = ((FORM, FORM_MODULE, compileForm), (RESOURCES, RESOURCE_MODULE, compileResources))
+    try:
+        for (source, module, compiler) in targets:
+            target = os.path.join(HERE, module + ".py")
+            if isStale(source, target):
+                compiler(source, target + ".tmp")       # -> Escribir a un archivo temporal y reemplazar, para nunca dejar un módulo incompleto
+                os.replace(target + ".tmp", target)
+                sys.modules.pop(module, None)
+    except (OSError, SyntaxError):
+        return False
+    return True
+
+
+def compileForm(source, target):
+    from PyQt5.uic import compileUi
+    with open(target, "w") as out:
+        compileUi(source, out)
+
+
+def compileResources(source, target):
+    from PyQt5.pyrcc_main import processResourceFile
+    cwd = os.getcwd()
+    os.chdir(HERE)                                      # -> Las rutas de los iconos en el archivo .qrc son relativas a su directorio
+    try:
+        if not processResourceFile([os.path.basename(source)], target, False):
+            raise OSError("Could not compile " + source)
+    finally:
+        os.chdir(cwd)
+
+
+def setupForm(window):                                  # Función que carga la interfaz en 'window'. Devuelve el método utilizado: "compiled" o "loadUi"
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    if compileForms():
+        form = importlib.import_module(FORM_MODULE).Ui_MainWindow()
+        form.setupUi(window)
+        for (name, widget) in vars(form).items():       # -> Exponer los widgets como atributos de la ventana, igual que 'loadUi()'
+            setattr(window, name, widget)
+        return "compiled"
+    try:
+        importlib.import_module(RESOURCE_MODULE)        # -> Registrar los iconos, en caso de que el módulo de recursos exista
+    except ImportError:
+        pass
+    from PyQt5.uic import loadUi
+    loadUi(FORM, window)
+    return "loadUi"
+
+
+if __name__ == "__main__":
+    sys.exit(0 if compileForms() else 1)
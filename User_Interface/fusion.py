@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de fusión de canales de Sampler. La tracción, el torque (promedio de M1 y M2) y la velocidad angular llegan con marcas
+# temporales y frecuencias distintas (la sonda de RPM exporta un promedio cada 100 ms). 'channelFusion' remuestrea los tres
+# canales sobre una base temporal común (una marca cada 'interval' ms) por interpolación lineal vectorizada, de manera incremental:
+# cada llamada a 'fuse()' produce únicamente las marcas nuevas cubiertas por los tres canales y conserva de cada canal solo las
+# lecturas necesarias para interpolar las siguientes. Sobre las lecturas alineadas se calculan los canales derivados
+# ('derivedChannels()'):
+#
+#   P       Potencia mecánica (W): torque * velocidad angular
+#   E       Tracción por potencia (g/W)
+#   CT      Coeficiente de tracción: T / (rho * n^2 * D^4), con n en revoluciones por segundo y D el diámetro de la hélice
+#   CQ      Coeficiente de torque: Q / (rho * n^2 * D^5)
+#
+# Los canales derivados valen 0 donde no estan definidos (potencia menor a 'minPower' o velocidad angular menor a 'minSpeed'). Las
+# marcas comprendidas en un hueco de más de 'maxGap' ms entre dos lecturas de algún canal (p. ej. el muestreo estuvo en pausa) se omiten,
+# por lo que si un canal no tiene lecturas o se retrasa (p. ej. sin sonda de RPM), los demás conservan únicamente sus últimos
+# 'maxGap' + 'interval' ms: las lecturas anteriores solo podrían interpolar marcas comprendidas en el hueco del canal retrasado.
+
+import numpy as np
+
+from storage import CHANNELS, DERIVED
+
+
+G = 9.80665                                             # Aceleración de la gravedad (m/s^2). Las celdas de carga reportan kg y kg*m
+
+
+class channelFusion:                                    # Clase de la etapa de fusión. Requiere el intervalo (ms) de la base temporal común
+    def __init__(self, interval=20, channels=CHANNELS, maxGap=500):
+        self.interval = interval
+        self.maxGap = maxGap
+        self.channels = channels
+        self.reset()
+
+    def reset(self):                                    # Método para descartar las lecturas pendientes (p. ej. al iniciar una nueva sesión)
+        self.pending = {c: (np.zeros(0), np.zeros(0)) for c in self.channels}   # Lecturas (t, y) de cada canal aún no cubiertas por la base común
+        self.next = None                                # Siguiente marca de la base común
+
+    def push(self, channel, t, y):                      # Método para agregar un bloque de lecturas de un canal
+        (tp, yp) = self.pending[channel]
+        self.pending[channel] = (np.concatenate((tp, np.asarray(t, np.float64))), np.concatenate((yp, np.asarray(y, np.float64))))
+
+    def fuse(self):                                     # Método que devuelve las marcas nuevas de la base común y las lecturas interpoladas de cada canal en ellas
+        result = self.align()
+        self.discardStale()
+        return result
+
+    def align(self):                                    # Método que interpola las lecturas pendientes en las marcas nuevas cubiertas por los tres canales
+        if any(not len(t) for (t, _) in self.pending.values()):
+            return (np.zeros(0), {})
+        if self.next is None:                           # -> La base común comienza cuando todos los canales tienen al menos una lectura
+            self.next = np.ceil(max(t[0] for (t, _) in self.pending.values()) / self.interval) * self.interval
+        horizon = min(t[-1] for (t, _) in self.pending.values())    # -> Únicamente hasta donde los tres canales tienen lecturas, para interpolar sin extrapolar
+        if horizon < self.next:
+            return (np.zeros(0), {})
+        grid = np.arange(self.next, horizon + 1, self.interval)
+        grid = grid[grid <= horizon]
+        covered = np.ones(len(grid), bool)
+        for (t, _) in self.pending.values():            # -> Descartar las marcas que caen en un hueco de algún canal
+            right = np.minimum(np.searchsorted(t, grid), len(t) - 1)
+            covered &= t[right] - t[np.maximum(right - 1, 0)] <= self.maxGap
+        self.next = grid[-1] + self.interval
+        grid = grid[covered]
+        values = {c: np.interp(grid, t, y) for (c, (t, y)) in self.pending.items()}
+        for (c, (t, y)) in self.pending.items():        # -> Conservar de cada canal la última lectura anterior a la siguiente marca y las posteriores
+            keep = max(np.searchsorted(t, self.next, "right") - 1, 0)
+            self.pending[c] = (t[keep:], y[keep:])
+        return (grid, values)
+
+    def discardStale(self):                             # Método que descarta de cada canal las lecturas anteriores en más de 'maxGap' + 'interval' ms a la lectura más
+        latest = [t[-1] for (t, _) in self.pending.values() if len(t)]  # reciente de todos los canales, salvo la última de ellas
+        if not latest:
+            return
+        limit = max(latest) - self.maxGap - self.interval
+        for (c, (t, y)) in self.pending.items():
+            keep = max(np.searchsorted(t, limit, "right") - 1, 0)
+            if keep:
+                self.pending[c] = (t[keep:], y[keep:])
+
+
+def derivedChannels(values, density=1.225, diameter=0.254, minPower=1.0, minSpeed=1000.0):  # Función que calcula los canales derivados a partir de las lecturas
+    thrust = values["T"] * G                                                                # alineadas {canal: vector}. Requiere la densidad del aire (kg/m^3) y el
+    torque = values["M"] * G                                                                # diámetro de la hélice (m). Devuelve {canal derivado: vector}
+    n = values["R"] / 60
+    power = torque * 2 * np.pi * n
+    spinning = n >= minSpeed / 60
+    with np.errstate(divide="ignore", invalid="ignore"):
+        efficiency = np.where(power >= minPower, 1000 * values["T"] / power, 0.0)
+        ct = np.where(spinning, thrust / (density * n**2 * diameter**4), 0.0)
+        cq = np.where(spinning, torque / (density * n**2 * diameter**5), 0.0)
+    return dict(zip(DERIVED, (power, efficiency, ct, cq)))
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de métricas de Sampler. Mide de manera permanente, con un costo de unos microsegundos por llamada a 'samplerEngine.update()',
+# si el anfitrión se mantiene al ritmo del microcontrolador. Cada motor de adquisición tiene un 'pipelineMetrics' con:
+#
+#   Contadores      Totales y tasa por segundo de la ventana reciente: bytes recibidos, lecturas decodificadas, lecturas rechazadas por
+#                   los filtros (vease 'filters.py') y lineas o bytes corruptos descartados por el decodificador (vease 'protocol.py')
+#   Histogramas     Duración de cada etapa (lectura del puerto, decodificación, filtros, almacenamiento, gráficas y cuadros dibujados) en
+#                   intervalos logarítmicos, con percentiles de la ventana reciente
+#   Indicadores     Bytes pendientes en el puerto ('in_waiting') y en la cola del hilo de adquisición al vaciarla
+#
+# Con la velocidad acordada con el microcontrolador ('setLink()') se reporta además la utilización del enlace (bits recibidos por
+# segundo, con 10 bits por byte en 8N1, contra los baudios) y, si las lecturas tienen número de secuencia, las lecturas perdidas.
+#
+# La ventana principal muestra el resumen ('summary()') en la barra de estado; 'dump()' guarda todas las métricas en un archivo JSON.
+# 'samplingProfiler' es un perfilador por muestreo opcional: registra periódicamente la pila de cada hilo y guarda las pilas en formato
+# "colapsado" (una linea 'f1;f2;f3 cuenta' por pila), que leen herramientas como flamegraph.pl o speedscope.
+
+import json
+import math
+import sys
+import threading
+import time
+from collections import Counter
+
+
+DECADES = (-6, 1)                                       # Rango de los histogramas: de 1 us a 10 s
+PER_DECADE = 10                                         # Intervalos por década
+BUCKETS = (DECADES[1] - DECADES[0]) * PER_DECADE + 2    # Intervalos, más uno por debajo y otro por encima del rango
+EDGES = [10 ** (DECADES[0] + k / PER_DECADE) for k in range(BUCKETS - 1)]  # Límite inferior de cada intervalo (s), a partir del segundo
+
+
+class rollingWindow:                                    # Clase base de las métricas de ventana reciente. Guarda una ranura por segundo de los últimos 'window' segundos;
+    def __init__(self, window=10, clock=time.monotonic):    # al avanzar el tiempo, la ranura más antigua se reutiliza
+        self.window = window
+        self.clock = clock
+        self.stamps = [None] * window                   # Segundo al que corresponde cada ranura
+        self.slots = [self.empty() for _ in range(window)]
+
+    def empty(self):
+        raise NotImplementedError
+
+    def slot(self):                                     # Método que devuelve la ranura del segundo actual, vaciandola si pertenecia a un segundo anterior
+        second = int(self.clock())
+        k = second % self.window
+        if self.stamps[k] != second:
+            self.stamps[k] = second
+            self.slots[k] = self.empty()
+        return self.slots[k]
+
+    def recent(self):                                   # Método que devuelve las ranuras de los últimos 'window' segundos completos y el actual
+        second = int(self.clock())
+        return [s for (stamp, s) in zip(self.stamps, self.slots) if stamp is not None and second - stamp < self.window]
+
+
+class rollingCounter(rollingWindow):                    # Contador con total acumulado y tasa de la ventana reciente
+    def __init__(self, window=10, clock=time.monotonic):
+        super().__init__(window, clock)
+        self.total = 0
+        self.start = clock()
+
+    def empty(self):
+        return [0]
+
+    def add(self, n=1):
+        self.total += n
+        self.slot()[0] += n
+
+    def rate(self):                                     # Método que devuelve la tasa por segundo de la ventana reciente (o desde la creación, si es más corta). La
+        now = self.clock()                              # ranura del segundo actual aún no esta completa
+        span = min(self.window - 1 + now % 1, max(now - self.start, 1e-3))
+        return sum(s[0] for s in self.recent()) / span
+
+
+class rollingHistogram(rollingWindow):                  # Histograma de duraciones con intervalos logarítmicos. Registrar una duración cuesta O(1)
+    def __init__(self, window=10, clock=time.monotonic):
+        super().__init__(window, clock)
+        self.count = 0
+        self.max = 0.0                                  # Duración máxima registrada (s)
+
+    def empty(self):
+        return [0] * BUCKETS
+
+    def observe(self, seconds):
+        if seconds <= 0:
+            k = 0
+        else:
+            k = min(max(int((math.log10(seconds) - DECADES[0]) * PER_DECADE) + 1, 0), BUCKETS - 1)
+        self.slot()[k] += 1
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def counts(self):                                   # Método que devuelve la cuenta de cada intervalo en la ventana reciente
+        return [sum(column) for column in zip(*self.recent())] or [0] * BUCKETS
+
+    def percentile(self, q):                            # Método que devuelve el percentil 'q' (0 a 100) de la ventana reciente, como el límite superior de su intervalo (s).
+        counts = self.counts()                          # None si no hay duraciones en la ventana
+        total = sum(counts)
+        if not total:
+            return None
+        target = q / 100 * total
+        seen = 0
+        for (k, n) in enumerate(counts):
+            seen += n
+            if seen >= target and n:
+                return EDGES[k] if k < len(EDGES) else self.max
+        return self.max
+
+
+class rollingGauge(rollingWindow):                      # Indicador con el último valor y el máximo de la ventana reciente
+    def __init__(self, window=10, clock=time.monotonic):
+        super().__init__(window, clock)
+        self.value = 0
+
+    def empty(self):
+        return [0]
+
+    def set(self, value):
+        self.value = value
+        s = self.slot()
+        s[0] = max(s[0], value)
+
+    def peak(self):
+        return max((s[0] for s in self.recent()), default=0)
+
+
+class pipelineMetrics:                                  # Clase del registro de métricas de un motor de adquisición. Las métricas se crean al registrarse por primera vez
+    behindLag = 0.25                                    # Segundos de lecturas pendientes en la cola y bytes pendientes en el puerto a partir de los cuales se considera
+    behindBacklog = 2048                                # que el anfitrión no se mantiene al ritmo del microcontrolador
+
+    def __init__(self, window=10, clock=time.monotonic):
+        self.window = window
+        self.clock = clock
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.baudrate = None                            # Velocidad del enlace (None si se desconoce)
+        self.sequenced = False                          # Flag de lecturas con número de secuencia; sin ellas no se pueden contar las perdidas
+
+    def setLink(self, baudrate, sequenced):             # Método llamado al conectarse el microcontrolador con la velocidad y los números de secuencia acordados
+        (self.baudrate, self.sequenced) = (baudrate, sequenced)
+
+    def count(self, name, n=1):                         # Método para sumar 'n' al contador 'name'
+        if name not in self.counters:
+            self.counters[name] = rollingCounter(self.window, self.clock)
+        self.counters[name].add(n)
+
+    def observe(self, name, seconds):                   # Método para registrar una duración (s) en el histograma 'name'
+        if name not in self.histograms:
+            self.histograms[name] = rollingHistogram(self.window, self.clock)
+        self.histograms[name].observe(seconds)
+
+    def gauge(self, name, value):                       # Método para actualizar el indicador 'name'
+        if name not in self.gauges:
+            self.gauges[name] = rollingGauge(self.window, self.clock)
+        self.gauges[name].set(value)
+
+    def rate(self, name):
+        return self.counters[name].rate() if name in self.counters else 0.0
+
+    def percentile(self, name, q):
+        return self.histograms[name].percentile(q) if name in self.histograms else None
+
+    def peak(self, name):
+        return self.gauges[name].peak() if name in self.gauges else 0
+
+    def lag(self):                                      # Método que devuelve los segundos de lecturas que esperaban en la cola del hilo de adquisición al vaciarla (máximo
+        rate = self.rate("rx.bytes")                    # de la ventana reciente)
+        return self.peak("queue.bytes") / rate if rate > 0 else 0.0
+
+    def utilization(self):                              # Método que devuelve la fracción de la capacidad del enlace ocupada en la ventana reciente (None si se desconoce)
+        return 10 * self.rate("rx.bytes") / self.baudrate if self.baudrate else None
+
+    def behind(self):                                   # Método que indica si el anfitrión se esta retrasando respecto al microcontrolador
+        return self.lag() > self.behindLag or self.peak("serial.backlog") > self.behindBacklog
+
+    def summary(self):                                  # Método que devuelve el resumen de una linea que se muestra en la barra de estado
+        def ms(name):
+            p = self.percentile(name, 95)
+            return "-" if p is None else "%.1f" % (1e3 * p)
+        total = lambda name: self.counters[name].total if name in self.counters else 0
+        link = self.utilization()
+        text = "RX %.1f kB/s  %s  %d S/s  parse %s  filter %s  render %s ms p95  lag %d ms  rejected %d  garbled %d  lost %s" % (
+            self.rate("rx.bytes") / 1e3, "link -" if link is None else "link %d%% of %g kbaud" % (100 * link, self.baudrate / 1e3), self.rate("samples"),
+            ms("parse"), ms("filter"), ms("render"), 1e3 * self.lag(), total("filter.rejected"), total("garbled"),
+            total("lost") if self.sequenced else "-")
+        return text + ("   FALLING BEHIND" if self.behind() else "")
+
+    def snapshot(self):                                 # Método que devuelve todas las métricas como diccionario
+        return {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "window": self.window, "behind": self.behind(), "lag": self.lag(),
+                "baudrate": self.baudrate, "sequenced": self.sequenced, "utilization": self.utilization(),
+                "counters": {n: {"total": c.total, "rate": c.rate()} for (n, c) in sorted(self.counters.items())},
+                "histograms": {n: {"count": h.count, "max": h.max, "p50": h.percentile(50), "p95": h.percentile(95), "p99": h.percentile(99),
+                                   "edges": EDGES, "counts": h.counts()} for (n, h) in sorted(self.histograms.items())},
+                "gauges": {n: {"value": g.value, "peak": g.peak()} for (n, g) in sorted(self.gauges.items())}}
+
+    def dump(self, path):                               # Método para guardar todas las métricas en un archivo JSON
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=1)
+
+
+class samplingProfiler(threading.Thread):               # Clase del perfilador por muestreo. Cada 'interval' segundos registra la pila de cada hilo (excepto el suyo)
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stacks = Counter()                         # Cuenta de cada pila, como tupla de "archivo:función" de la más externa a la más interna
+        self.samples = 0
+        self.stopEvent = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self.stopEvent.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for (ident, frame) in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code.co_filename.rsplit("/", 1)[-1] + ":" + frame.f_code.co_name)
+                    frame = frame.f_back
+                self.stacks[(names.get(ident, str(ident)),) + tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self.stopEvent.set()
+        if self.is_alive():
+            self.join()
+
+    def dump(self, path):                               # Método para guardar las pilas en formato colapsado
+        with open(path, "w") as f:
+            for (stack, n) in self.stacks.most_common():
+                f.write(";".join(stack) + " " + str(n) + "\n")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo base de las ventanas de gráficas de Sampler. Contiene la parte de la ventana de gráficas que no depende de la biblioteca
+# con la que se dibuja: las lecturas de cada linea, su decimación (vease 'decimation.py'), la superposición de sesiones concluidas
+# y el temporizador de cuadros. Cada backend hereda de 'plotWindowBase' e implementa la creación y el dibujo de las lineas:
+#
+#   matplotlib  'plotting.plotWindow'       Figura de Matplotlib con blitting (por defecto)
+#   pyqtgraph   'sceneplot.scenePlotWindow' Escena de Qt de pyqtgraph, sin rasterizar la figura completa en cada cuadro
+#
+# La ventana principal elige el backend al iniciar (vease 'Main.plotBackend') y utiliza el mismo contrato con ambos: 'updatePlot()',
+# 'redraw()', 'requestFullRedraw()', 'clearPlotReferences()', 'setOverlay()' y los ejes 'plot.axesT', ... con 'set_xlim()'/'set_ylim()'.
+
+import time
+
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QCheckBox
+
+from decimation import minMaxPyramid
+
+
+PANELS = (("axesT", ("T",), "Thrust (kg)", (-0.1, 3)),              # Gráficas de la ventana: atributo del eje, canales que muestra, etiqueta y límites
+          ("axesM", ("M",), "Torque (kg*m)", (-0.1, 1)),            # iniciales del eje "Y". Las 3 primeras son de los canales medidos y las 3 últimas
+          ("axesR", ("R",), "Rotation Speed (rpm)", (0, 10000)),    # de los derivados (vease 'fusion.py')
+          ("axesP", ("P",), "Power (W)", (0, 100)),
+          ("axesE", ("E",), "Thrust per watt (g/W)", (0, 20)),
+          ("axesC", ("CT", "CQ"), "CT (red), CQ (blue)", (0, 0.3)))
+COLORS = {"CQ": "b"}                                                # Color de la linea de cada canal ('r' si no se indica)
+OVERLAY_COLORS = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf")    # Colores de las
+                                                                    # sesiones superpuestas, en orden
+
+
+class plotWindowBase(QWidget):          # Clase base de las ventanas de gráficas. Hereda de QWidget
+    def __init__(self, fps=30):                                     # Requiere la cantidad máxima de cuadros por segundo 'fps' con la que se redibujan las gráficas
+        super().__init__()
+        self.plot = self.createCanvas()                             # Figura o escena del backend, con un eje por gráfica ('plot.channelAxes')
+        self.dirty = False                                          # Flag encargada de indicar que las lineas de datos cambiaron desde el último cuadro
+        self.fullRedraw = True                                      # Flag encargada de indicar que los ejes cambiaron y es necesario redibujar la figura completa
+        self.renderTimer = QtCore.QTimer()                          # Temporizador del programador de cuadros: redibuja como máximo 'fps' veces por segundo
+        self.renderTimer.setInterval(int(1000/fps))
+        self.renderTimer.timeout.connect(self.timedFrame)
+        self.renderTimer.start()
+        self.metrics = None                                         # Métricas donde se registra la duración de cada cuadro dibujado. Vease 'metrics.py'
+
+        self.overlayData = QCheckBox("Overlay plot data")           # Insertar casilla de comprobación de Overlay. Vease 'Main.updateOverlay()'
+        channels = self.plot.channelAxes                            # Canales gráficados y el eje de cada uno
+        self.plotReferences = {c: [None] for c in channels}         # Crear listas vacias para guardar las referencias de las lineas de datos de cada canal
+        self.sources = {c: [None] for c in channels}                # Lecturas completas de cada referencia de linea
+        self.pyramids = {c: [minMaxPyramid()] for c in channels}    # Pirámides de decimación de cada referencia de linea
+        self.stale = set()                                          # Referencias cuyas lineas deben recibir nuevos puntos decimados en el siguiente cuadro
+        self.queryLimits = None                                     # Límites de los ejes con los que se decimaron las lineas por última vez
+        for channel in channels:                                    # Actualizar gráficas de Tracción, Torque, velocidad angular y canales derivados
+            self.updatePlot([], [], 0, channel)
+        self.overlaySources = []                                    # Canales de cada sesión superpuesta: {canal: (record, pirámide de decimación)}
+        self.overlayCache = {}                                      # Pirámide de decimación de cada canal ya superpuesto, para no reconstruirla al agregar sesiones
+
+        layout = QVBoxLayout()                                      # Layout o posicionamiento de las widgets de gráficos: barra de herramientas (si el backend
+        for widget in self.toolbars():                              # tiene), gráficas y casilla de Overlay
+            layout.addWidget(widget)
+        layout.addWidget(self.plot)
+        layout.addWidget(self.overlayData)
+        self.setLayout(layout)
+
+    # ==== Métodos que implementa cada backend ==== #
+
+    def createCanvas(self):                                         # Método que crea la figura o escena con los ejes de 'PANELS'
+        raise NotImplementedError
+
+    def toolbars(self):                                             # Método que devuelve las barras de herramientas que se muestran sobre las gráficas
+        return []
+
+    def newLine(self, axes, plot):                                  # Método que crea una linea vacia del canal 'plot' en el eje 'axes'
+        raise NotImplementedError
+
+    def setLineData(self, line, x, y):                              # Método que reemplaza los puntos de una linea
+        raise NotImplementedError
+
+    def axesWidth(self, axes):                                      # Método que devuelve el ancho en pixeles de un eje
+        raise NotImplementedError
+
+    def setOverlayLines(self, channel, segments, colors):           # Método que reemplaza las lineas superpuestas de un canal por 'segments' (lista de (x, y))
+        raise NotImplementedError
+
+    def axesLimits(self):                                           # Método que devuelve los límites actuales de todos los ejes para detectar si cambiaron
+        return tuple(tuple(axes.get_xlim()) + tuple(axes.get_ylim()) for axes in dict.fromkeys(self.plot.channelAxes.values()))
+
+    def renderFrame(self):                                          # Método llamado por 'renderTimer' como máximo 'fps' veces por segundo
+        raise NotImplementedError
+
+    # ==== Lineas de datos ==== #
+
+    def updatePlot(self, x, y, i, plot):                            # Método llamado cuando se requiere añadir datos a los buffers de las gráficas. Requiere los datos para añadir, indice del juego de datos y el tipo de gráfico
+                                                                    # Ejecuta:
+        (axes, refs) = self.channelAxes(plot)                       # -> Obtener el gráfico y la lista de referencias correspondientes a 'plot'
+        if refs[i] is None:                                         # -> En caso de que no exista una referencia al gráfico actual, crear la linea de datos y
+            refs[i] = self.newLine(axes, plot)                      #    guardar una referencia a ella
+        self.pyramids[plot][i].update(x, y)                         # -> Actualizar de manera incremental la pirámide de decimación con las lecturas nuevas. Vease 'decimation.py'
+        self.sources[plot][i] = (x, y)                              # -> Guardar las lecturas completas; la linea recibe sus puntos decimados en el siguiente cuadro
+        self.stale.add((plot, i))
+        self.dirty = True                                           # -> Marcar las gráficas como pendientes de redibujar en el siguiente cuadro
+
+    def channelAxes(self, plot):                                    # Método que devuelve el gráfico y la lista de referencias de lineas de un tipo de gráfica
+        return (self.plot.channelAxes[plot], self.plotReferences[plot])
+
+    def refreshLines(self):                                         # Método que entrega a cada linea pendiente únicamente los puntos visibles en su eje, con el nivel de detalle
+        for (plot, i) in self.stale:                                # adecuado para el ancho en pixeles del gráfico (2 puntos, mínimo y máximo, por pixel)
+            (axes, refs) = self.channelAxes(plot)
+            (x0, x1) = axes.get_xlim()
+            self.setLineData(refs[i], *self.pyramids[plot][i].query(*self.sources[plot][i], x0, x1, 2*self.axesWidth(axes)))
+        self.stale = set()
+
+    def refreshStale(self):                                         # Método llamado al inicio de cada cuadro. En caso de zoom, desplazamiento o reescalado, vuelve a decimar todas las
+        if self.axesLimits() != self.queryLimits:                   # lineas (y las superpuestas) para el nuevo intervalo visible. Devuelve True si alguna linea cambió
+            self.queryLimits = self.axesLimits()
+            self.stale = {(plot, i) for plot in self.sources for i in range(len(self.sources[plot])) if self.sources[plot][i] is not None}
+            if self.overlaySources:
+                self.refreshOverlay()
+        if self.stale:                                              # -> Entregar los puntos decimados a las lineas pendientes
+            self.refreshLines()
+            return True
+        return False
+
+    def addPlotReference(self):                                     # Método llamado cuando se necesitan guardar referencias a multiples gráficos del mismo tipo: Cuando se desean gráficar multiples juegos al mismo tiempo.
+        for plot in self.plotReferences:                            # En desarrollo
+            self.plotReferences[plot].append(None)                  # Acopla una entrada vacia a las listas de referencias de gráficos, de lecturas y de pirámides de decimación
+            self.sources[plot].append(None)
+            self.pyramids[plot].append(minMaxPyramid())
+
+    def clearPlotReferences(self):                                  # Método llamado cuando se desea limpiar la información de los gráficos. Ejecuta:
+        for refs in self.plotReferences.values():                   # -> Para cada referencia a gráficos de cada canal:
+            for line in refs:
+                if line is not None:                                # ---> Si la referencia no esta vacia, asignar un 0 a sus buffers
+                    self.setLineData(line, [], [])
+        for plot in self.plotReferences:                            # -> Vaciar las lecturas y pirámides de decimación de todas las referencias
+            self.sources[plot] = [None]*len(self.sources[plot])
+            for pyramid in self.pyramids[plot]:
+                pyramid.reset()
+        self.stale = set()
+        self.dirty = True
+
+    # ==== Superposición de sesiones ==== #
+
+    def setOverlay(self, sessions):                                 # Método para superponer las sesiones concluidas 'sessions' (lista de 'storage.sessionStore') a la sesión activa.
+        cache = {}                                                  # Las lineas se deciman y se dibujan en el siguiente cuadro completo
+        self.overlaySources = []
+        for session in sessions:
+            entry = {}
+            for (channel, record) in session.channels.items():
+                if channel not in self.plotReferences or not len(record):
+                    continue
+                pyramid = self.overlayCache.get(id(record), (None, minMaxPyramid()))[1]
+                pyramid.update(*record.view())                      # -> Una pirámide ya construida solo procesa las lecturas nuevas, si las hay
+                cache[id(record)] = (record, pyramid)               # -> Guardar el record junto con su pirámide para que su 'id' no se reutilice
+                entry[channel] = (record, pyramid)
+            self.overlaySources.append(entry)
+        self.overlayCache = cache
+        self.refreshOverlay()
+        self.requestFullRedraw()
+
+    def refreshOverlay(self):                                       # Método que entrega a las lineas superpuestas únicamente los puntos visibles en su eje. Se llama al superponer
+        for channel in self.plotReferences:                         # sesiones y cada vez que cambian los ejes
+            axes = self.plot.channelAxes[channel]
+            (x0, x1) = axes.get_xlim()
+            (segments, colors) = ([], [])
+            for (k, entry) in enumerate(self.overlaySources):
+                if channel in entry:
+                    (record, pyramid) = entry[channel]
+                    segments.append(pyramid.query(*record.view(), x0, x1, 2*self.axesWidth(axes)))
+                    colors.append(OVERLAY_COLORS[k % len(OVERLAY_COLORS)])
+            self.setOverlayLines(channel, segments, colors)
+
+    # ==== Cuadros ==== #
+
+    def timedFrame(self):                                           # Método llamado por 'renderTimer'. Dibuja el cuadro y, si había algo por dibujar, registra su duración
+        pending = self.isVisible() and (self.dirty or self.fullRedraw or bool(self.stale))
+        t0 = time.perf_counter()
+        self.renderFrame()
+        if pending and self.metrics is not None:
+            self.metrics.observe("render", time.perf_counter() - t0)
+
+    def redraw(self):                                               # Método llamado cuando los buffers de gráficos han sido actualizados y únicamente es necesario reflejar el cambio visualmente.
+        self.dirty = True                                           # No dibuja de inmediato: marca las gráficas como pendientes y 'self.renderFrame()' las dibuja en el siguiente cuadro
+
+    def requestFullRedraw(self):                                    # Método llamado cuando los límites de los ejes cambian y es necesario redibujar la figura completa en el siguiente cuadro
+        self.fullRedraw = True
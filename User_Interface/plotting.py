@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de gráficas de Sampler. Contiene la ventana de gráficas de Matplotlib (backend por defecto, vease 'plotbase.py') con las
+# gráficas de Tracción, Torque y velocidad angular y, debajo, las de los canales derivados: potencia, tracción por potencia y
+# coeficientes (vease 'fusion.py'). La ventana principal importa este módulo únicamente cuando el usuario solicita las gráficas por
+# primera vez ('Main.showPlot()'), de modo que Matplotlib no se carga al iniciar la aplicación.
+#
+# Superposición de sesiones: las sesiones concluidas se dibujan con una sola 'LineCollection' por canal que forma parte del fondo
+# de la figura. El fondo únicamente se vuelve a dibujar al cambiar los ejes, por lo que cada cuadro (blitting) dibuja solo las
+# lineas de la sesión activa, sin importar cuántas sesiones se superpongan.
+
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+import matplotlib
+matplotlib.use('Qt5Agg')
+
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+import numpy as np
+
+from plotbase import plotWindowBase, COLORS
+
+
+class plotWindow(plotWindowBase):       # Clase de la ventana de gráficas de Matplotlib. Hereda de 'plotWindowBase'
+    def __init__(self, fps=30):                                     # --- Inicializador de la clase --- # Requiere la cantidad máxima de cuadros por segundo 'fps' con la que
+        super().__init__(fps)                                       # se redibujan las gráficas
+        self.background = None                                      # Imagen de la figura sin lineas de datos (ejes, etiquetas, etc.) para el blitting
+        self.limits = None                                          # Límites de los ejes con los que se capturó 'background'
+        self.plot.mpl_connect("draw_event", self.onDraw)            # Cada vez que la figura se dibuja completa (reescalado, zoom, cambio de tamaño) se captura el fondo
+        self.overlays = {c: LineCollection([], linewidths=1, alpha=0.6) for c in self.plot.channelAxes}    # Lineas de las sesiones superpuestas de cada canal
+        for (channel, collection) in self.overlays.items():        # (parte del fondo, no animadas)
+            self.plot.channelAxes[channel].add_collection(collection, autolim=False)
+        
+    def createCanvas(self):
+        return MplCanvas(self, width=5, height=6, dpi=100)         # Parámetros para cambiar el tamaño de la ventana inicial
+        
+    def toolbars(self):
+        self.toolbar = NavigationToolbar2QT(self.plot, self)        # Insertar barra de herramientas para navegación del gráfico
+        return [self.toolbar]
+        
+    def newLine(self, axes, plot):                                  # Las lineas animadas no se dibujan con la figura, solo por blitting
+        return axes.plot([], [], COLORS.get(plot, 'r'), animated=True)[0]
+        
+    def setLineData(self, line, x, y):
+        line.set_data(x, y)
+        
+    def axesWidth(self, axes):
+        return int(axes.bbox.width)
+        
+    def setOverlayLines(self, channel, segments, colors):
+        self.overlays[channel].set_segments([np.column_stack(points) for points in segments])
+        self.overlays[channel].set_color(colors)
+        
+    def renderFrame(self):                                          # Método llamado por 'renderTimer' como máximo 'fps' veces por segundo. Ejecuta:
+        if not self.isVisible():                                    # -> Si la ventana no esta visible, no dibujar nada
+            return
+        if self.refreshStale():                                     # -> Entregar los puntos decimados a las lineas pendientes (todas, en caso de zoom o reescalado)
+            self.dirty = True
+        if self.fullRedraw or self.background is None or self.axesLimits() != self.limits:
+            self.fullRedraw = False                                 # -> En caso de que los ejes hayan cambiado, redibujar la figura completa. 'self.onDraw()' captura
+            self.plot.draw()                                        #    el nuevo fondo y dibuja las lineas encima
+        elif self.dirty:                                            # -> De lo contrario, si solo cambiaron las lineas, restaurar el fondo guardado y dibujar
+            self.plot.restore_region(self.background)               #    únicamente las lineas de datos (blitting)
+            self.drawLines()
+            self.plot.blit(self.plot.figure.bbox)
+        self.dirty = False
+        
+    def onDraw(self, event):                                        # Método llamado por Matplotlib cada vez que la figura se dibuja completa
+        self.background = self.plot.copy_from_bbox(self.plot.figure.bbox)   # -> Guardar el fondo (todo excepto las lineas animadas)
+        self.limits = self.axesLimits()
+        self.drawLines()                                            # -> Dibujar las lineas encima del fondo
+        self.plot.blit(self.plot.figure.bbox)
+        
+    def drawLines(self):                                            # Método para dibujar las lineas de datos existentes sobre sus respectivos ejes
+        for (plot, refs) in self.plotReferences.items():
+            axes = self.plot.channelAxes[plot]
+            for line in refs:
+                if line is not None:
+                    axes.draw_artist(line)
+        
+        
+        
+        
+        
+        
+        
+        
+        
+class MplCanvas(FigureCanvasQTAgg):                                 # Clase de la figura en donde se crean, contienen y muestran las gráficas de Tracción, Torque, velocidad angular y canales derivados. Hereda de FigureCanvasQtAgg
+    def __init__(self, parent=None, width=5, height=4, dpi=100):    # Inicializador con las dimensiones de la figura
+        fig = Figure(figsize=(width, height), dpi=dpi)
+        self.axesT = fig.add_subplot(231)                           # Añade un gráfico al contenedor de la figura
+        self.axesT.set_ylabel("Thrust (kg)")                        # Configura las etiquetas y límites de ejes para los 3 gráficos
+        self.axesT.set_xlabel("Time (ms)")
+        self.axesT.set_xlim(0, 5000, emit=True, auto=True)
+        self.axesT.set_ylim(-0.1, 3, emit=True, auto=True)
+        
+        self.axesM = fig.add_subplot(232)
+        self.axesM.set_ylabel("Torque (kg*m)")
+        self.axesM.set_xlabel("Time (ms)")
+        self.axesM.set_xlim(0, 5000, emit=True, auto=True)
+        self.axesM.set_ylim(-0.1, 1, emit=True, auto=True)
+        
+        self.axesR = fig.add_subplot(233)
+        self.axesR.set_ylabel("Rotation Speed (rpm)")
+        self.axesR.set_xlabel("Time (ms)")
+        self.axesR.set_xlim(0, 5000, emit=True, auto=True)
+        self.axesR.set_ylim(0, 10000, emit=True, auto=True)       
+        
+        self.axesP = fig.add_subplot(234)                           # Gráficas de los canales derivados. Vease 'fusion.py'
+        self.axesP.set_ylabel("Power (W)")
+        self.axesP.set_xlabel("Time (ms)")
+        self.axesP.set_xlim(0, 5000, emit=True, auto=True)
+        self.axesP.set_ylim(0, 100, emit=True, auto=True)
+        
+        self.axesE = fig.add_subplot(235)
+        self.axesE.set_ylabel("Thrust per watt (g/W)")
+        self.axesE.set_xlabel("Time (ms)")
+        self.axesE.set_xlim(0, 5000, emit=True, auto=True)
+        self.axesE.set_ylim(0, 20, emit=True, auto=True)
+        
+        self.axesC = fig.add_subplot(236)                           # Los coeficientes de tracción (rojo) y torque (azul) comparten el eje
+        self.axesC.set_ylabel("CT (red), CQ (blue)")
+        self.axesC.set_xlabel("Time (ms)")
+        self.axesC.set_xlim(0, 5000, emit=True, auto=True)
+        self.axesC.set_ylim(0, 0.3, emit=True, auto=True)
+        
+        self.channelAxes = {"T": self.axesT, "M": self.axesM, "R": self.axesR, "P": self.axesP, "E": self.axesE, "CT": self.axesC, "CQ": self.axesC}
+        
+        super(MplCanvas, self).__init__(fig)
+
+
+
+
+
+
+
+
+
+class stepCurveWindow(QWidget):         # Clase de la ventana de curvas por etapa: tracción, torque y velocidad angular contra Throttle, con la media y la desviación
+    def __init__(self, source, fps=2):  # estándar de cada etapa. Requiere la función que devuelve las estadísticas a mostrar ('samplerEngine.stats') y la
+        super().__init__()              # cantidad máxima de veces por segundo que se redibuja
+        self.source = source
+        self.drawn = None                                           # Estadísticas y versión dibujadas por última vez
+        self.plot = FigureCanvasQTAgg(Figure(figsize=(9, 3), dpi=100))
+        self.axes = dict(zip("TMR", self.plot.figure.subplots(1, 3)))
+        self.labels = {"T": "Thrust (kg)", "M": "Torque (kg*m)", "R": "Rotation Speed (rpm)"}
+        self.refreshTimer = QtCore.QTimer()
+        self.refreshTimer.setInterval(int(1000/fps))
+        self.refreshTimer.timeout.connect(self.refresh)
+        self.refreshTimer.start()
+        layout = QVBoxLayout()
+        layout.addWidget(NavigationToolbar2QT(self.plot, self))
+        layout.addWidget(self.plot)
+        self.setLayout(layout)
+        self.setWindowTitle("Step summary curves")
+        
+    def refresh(self):                                              # Método llamado por 'refreshTimer'. Redibuja únicamente si las estadísticas cambiaron
+        stats = self.source()
+        if not self.isVisible() or self.drawn == (id(stats), stats.version):
+            return
+        self.drawn = (id(stats), stats.version)
+        for (channel, axes) in self.axes.items():
+            axes.cla()
+            axes.errorbar(*stats.curve(channel), fmt="o-", color="r", capsize=3)
+            axes.set_xlabel("Throttle")
+            axes.set_ylabel(self.labels[channel])
+            axes.grid(True)
+        self.plot.figure.tight_layout()
+        self.plot.draw_idle()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo del protocolo de comunicación entre Sampler y el programa del microcontrolador (TestBankMain3.ino).
+# El microcontrolador puede exportar sus lecturas en dos formatos, seleccionados durante el saludo inicial (handshake):
+#
+#   ASCII   (por defecto)  Una linea de texto por lectura, p. ej. "[HX7T] Read: 1.2345 Kg 1234 ms"
+#   Binario (opcional)     Una trama de tamaño fijo por lectura:
+#
+#       Byte    0        1        2-5                 6-9                   10
+#               0xA5     Canal    Marca temporal      Lectura               Checksum
+#               (sync)   (uint8)  (uint32, ms, LE)    (float32, LE)         (XOR de los bytes 1 a 9)
+#
+# Las ordenes de un solo carácter ('X', 'Y', 'r', 's', 't', 'n') funcionan igual en ambos formatos. Las ordenes 'A' y 'B'
+# solicitan el formato ASCII o binario respectivamente, y el microcontrolador responde con "[FMT: ASC]" o "[FMT: BIN]".
+#
+# El microcontrolador inicia siempre a 57600 baudios. Durante el saludo, Sampler solicita la velocidad más alta de 'BAUDRATES' con
+# la orden "U<baudios>\n"; el microcontrolador responde "[BAUD: <baudios>]" (o "[BAUD: NO]" si no la admite), cambia de velocidad
+# y espera durante 'LINK_WINDOW' segundos la orden 'V' a la nueva velocidad, a la que responde "[BAUD: OK]". Si la confirmación no
+# llega, ambos regresan a 57600 baudios y Sampler solicita la siguiente velocidad. Un microcontrolador que completa el saludo agrega
+# a cada lectura un número de secuencia de 16 bits, con el que Sampler cuenta las lecturas perdidas (p. ej. por desbordamiento de
+# los buffers del puerto):
+#
+#   ASCII   "[HX7T] Read: 1.2345 Kg 1234 ms #57"
+#   Binario Byte    0        1        2-3               4-7                 8-11                  12
+#                   0xA5     Canal    Secuencia         Marca temporal      Lectura               Checksum
+#                   (sync)   (uint8)  (uint16, LE)      (uint32, ms, LE)    (float32, LE)         (XOR de los bytes 1 a 11)
+#
+# Los programas anteriores ignoran la orden 'U', por lo que el enlace permanece a 57600 baudios y sin números de secuencia.
+
+import re
+import time
+import numpy as np
+
+
+FRAME_SYNC = 0xA5
+FRAME_DTYPE = np.dtype([("sync", "u1"), ("ch", "u1"), ("t", "<u4"), ("y", "<f4"), ("chk", "u1")])
+FRAME_SIZE = FRAME_DTYPE.itemsize                       # 11 bytes por lectura, contra ~33 bytes de la linea ASCII equivalente
+FRAME_SEQ_DTYPE = np.dtype([("sync", "u1"), ("ch", "u1"), ("seq", "<u2"), ("t", "<u4"), ("y", "<f4"), ("chk", "u1")])  # Trama con número de secuencia (13 bytes)
+SEQ_MODULO = 1 << 16                                    # Los números de secuencia vuelven a 0 después de 65535
+
+CH_T = 0                                                # Identificadores de canal, idénticos a los del microcontrolador
+CH_M1 = 1
+CH_M2 = 2
+CH_R = 3
+
+CHANNEL_TAGS = {CH_T: "HX7T", CH_M1: "HX7M1", CH_M2: "HX7M2", CH_R: "RPMp"}
+CHANNEL_UNITS = {CH_T: "Kg", CH_M1: "Kg.m", CH_M2: "Kg.m", CH_R: "rpm"}
+
+SAMPLE_PATTERN = re.compile(rb"\[(HX7T|HX7M1|HX7M2|RPMp)\] Read[:;] (-?[0-9.]+) \S+ (-?[0-9]+) ms(?: #([0-9]+))?")  # Linea ASCII de una lectura
+
+FORMAT_REQUEST = {"ascii": b"A", "binary": b"B"}
+FORMAT_REPLY = {"ascii": b"[FMT: ASC]", "binary": b"[FMT: BIN]"}
+
+BAUD_DEFAULT = 57600                                    # Velocidad con la que inicia el microcontrolador
+BAUDRATES = (1000000, 500000, 250000, 115200, 57600)    # Velocidades que se solicitan durante el saludo, de la más alta a la más baja. Solicitar 57600 únicamente
+                                                        # habilita los números de secuencia
+BAUD_REPLY = b"[BAUD: %d]"
+BAUD_REFUSED = b"[BAUD: NO]"
+BAUD_VERIFY = b"V"
+BAUD_CONFIRM = b"[BAUD: OK]"
+LINK_WINDOW = 1.0                                       # Segundos que el microcontrolador espera la confirmación antes de regresar a 57600 baudios
+
+
+class sequenceTracker:                                  # Clase encargada de contar las lecturas perdidas a partir de sus números de secuencia
+    def __init__(self):
+        self.last = None                                # Último número de secuencia recibido (None al iniciar o después de descartar datos)
+        self.received = 0                               # Lecturas recibidas con número de secuencia
+        self.lost = 0                                   # Lecturas perdidas: saltos en la secuencia
+
+    def track(self, seq):                               # Método que registra de manera vectorizada los números de secuencia de un bloque
+        if not len(seq):
+            return
+        seq = seq.astype(np.int64)
+        previous = np.concatenate(([seq[0] - 1 if self.last is None else self.last], seq[:-1]))
+        self.lost += int(np.sum((seq - previous - 1) % SEQ_MODULO))
+        self.received += len(seq)
+        self.last = int(seq[-1])
+
+    def reset(self):                                    # Método llamado al descartar datos pendientes, para que no se cuenten como perdidos
+        self.last = None
+
+
+class asciiDecoder:                                     # Clase encargada de convertir bloques de lineas ASCII a vectores de NumPy. Misma interfaz que 'binaryDecoder'
+    def __init__(self):
+        self.tail = b""                                 # Fragmento de linea incompleto recibido al final del último bloque
+        self.text = ""                                  # Texto de las lineas completas del último bloque, para la consola
+        self.garbledLines = 0                           # Cuenta de lineas que no corresponden a una lectura (mensajes de estado o lineas corruptas)
+        self.sequence = sequenceTracker()               # Lecturas perdidas, si las lineas incluyen número de secuencia
+
+    def feed(self, data):                               # Método que decodifica un bloque de bytes. Devuelve los vectores (t, y, ch) de todas las lineas completas.
+        buf = self.tail + data                          # Todas las lineas del bloque se separan en una sola pasada de la expresión regular y las conversiones
+        end = buf.rfind(b"\n") + 1                      # a números se realizan sobre vectores completos
+        self.tail = buf[end:]
+        self.text = buf[:end].decode("utf-8", "replace")
+        matches = SAMPLE_PATTERN.findall(buf, 0, end)
+        self.garbledLines += buf.count(b"\n", 0, end) - len(matches)
+        if not matches:
+            return (np.zeros(0, np.uint32), np.zeros(0, np.float32), np.zeros(0, np.uint8))
+        (tags, values, times, seq) = (np.array(column) for column in zip(*matches))
+        self.sequence.track(seq[seq != b""].astype(np.int64))     # -> Las lineas sin número de secuencia (programa anterior) no se cuentan
+        ch = np.zeros(len(tags), np.uint8)
+        for (code, tag) in CHANNEL_TAGS.items():
+            ch[tags == tag.encode()] = code
+        return (np.abs(times.astype(np.int64)).astype(np.uint32), values.astype(np.float32), ch)
+
+    def consoleText(self):                              # Método que devuelve el texto del último bloque decodificado para mostrarlo en la consola
+        return self.text
+
+    def garbled(self):                                  # Método que devuelve la cuenta de lineas descartadas. Vease 'metrics.py'
+        return self.garbledLines
+
+    def lost(self):                                     # Método que devuelve la cuenta de lecturas perdidas según los números de secuencia
+        return self.sequence.lost
+
+    def reset(self):
+        self.tail = b""
+        self.sequence.reset()
+
+
+class binaryDecoder:                                    # Clase encargada de convertir bloques de bytes en formato binario a vectores de NumPy. Requiere, opcionalmente, si
+    def __init__(self, sequenced=False):                # las tramas incluyen número de secuencia (acordado durante el saludo, vease 'negotiateBaudrate()')
+        self.dtype = FRAME_SEQ_DTYPE if sequenced else FRAME_DTYPE
+        self.size = self.dtype.itemsize
+        self.tail = b""                                 # Bytes de una trama incompleta recibida al final del último bloque
+        self.frames = np.zeros(0, self.dtype)           # Tramas del último bloque decodificado
+        self.garbledBytes = 0                           # Cuenta de bytes descartados por no pertenecer a una trama válida
+        self.sequence = sequenceTracker() if sequenced else None
+
+    def feed(self, data):                               # Método que decodifica un bloque de bytes. Devuelve los vectores (t, y, ch) de todas las tramas completas
+        buf = self.tail + data
+        count = len(buf) // self.size
+        frames = np.frombuffer(buf, self.dtype, count=count)
+        if count and self.framesValid(buf, frames):     # -> Caso común: el bloque inicia en una trama y todas son válidas. Se decodifica todo de una vez
+            self.tail = buf[count*self.size:]
+        else:                                           # -> De lo contrario, resincronizar buscando los bytes de sincronía trama por trama
+            frames = self.resync(buf)
+        self.frames = frames
+        if self.sequence is not None:
+            self.sequence.track(frames["seq"])
+        return (frames["t"].copy(), frames["y"].copy(), frames["ch"].copy())
+
+    def consoleText(self):                              # Método que reconstruye las lineas ASCII equivalentes al último bloque decodificado
+        return "".join(formatSample(c, t, y) for (t, y, c) in zip(self.frames["t"], self.frames["y"], self.frames["ch"]))
+
+    def garbled(self):                                  # Método que devuelve la cuenta de bytes descartados. Vease 'metrics.py'
+        return self.garbledBytes
+
+    def lost(self):                                     # Método que devuelve la cuenta de tramas perdidas según los números de secuencia
+        return self.sequence.lost if self.sequence is not None else 0
+
+    def framesValid(self, buf, frames):                 # Método que revisa de manera vectorizada la sincronía y el checksum de todas las tramas
+        raw = np.frombuffer(buf, np.uint8, count=len(frames)*self.size).reshape(-1, self.size)
+        return bool(np.all(frames["sync"] == FRAME_SYNC) and np.all(np.bitwise_xor.reduce(raw[:, 1:-1], axis=1) == raw[:, -1]))
+
+    def resync(self, buf):                              # Método que recorre el bloque en busca de tramas válidas cuando el flujo de bytes perdió la sincronía
+        good = []
+        i = 0
+        while True:
+            j = buf.find(FRAME_SYNC.to_bytes(1, "little"), i)
+            if j < 0:                                   # -> No hay más bytes de sincronía: todo lo restante se descarta
+                self.garbledBytes += len(buf) - i
+                i = len(buf)
+                break
+            self.garbledBytes += j - i
+            if j + self.size > len(buf):                # -> Trama incompleta al final del bloque: se conserva para la siguiente llamada
+                i = j
+                break
+            frame = buf[j:j+self.size]
+            if checksum(frame[1:-1]) == frame[-1]:      # -> Trama válida
+                good.append(frame)
+                i = j + self.size
+            else:                                       # -> Byte de sincronía falso, continuar a partir del siguiente byte
+                self.garbledBytes += 1
+                i = j + 1
+        self.tail = buf[i:]
+        return np.frombuffer(b"".join(good), self.dtype)
+
+    def reset(self):
+        self.tail = b""
+        if self.sequence is not None:
+            self.sequence.reset()
+
+
+class torquePairer:                                     # Clase encargada de emparejar las lecturas de las celdas de torque M1 y M2. El microcontrolador exporta
+    def __init__(self):                                 # siempre M1 seguida de M2; si un bloque termina en M1, esta se conserva hasta recibir su pareja
+        self.pending = None
+
+    def pair(self, t, y, ch):                           # Método que devuelve los vectores (t, y) promedio de cada pareja M1/M2 contenida en el bloque
+        sel = (ch == CH_M1) | (ch == CH_M2)
+        (tm, ym, cm) = (t[sel].astype(np.float64), y[sel], ch[sel])
+        if self.pending is not None:                    # -> Anteponer la lectura M1 pendiente del bloque anterior
+            tm = np.concatenate(([self.pending[0]], tm))
+            ym = np.concatenate(([self.pending[1]], ym))
+            cm = np.concatenate(([CH_M1], cm))
+            self.pending = None
+        first = np.nonzero((cm[:-1] == CH_M1) & (cm[1:] == CH_M2))[0]
+        if len(cm) and cm[-1] == CH_M1:                 # -> Guardar la última M1 si su pareja aún no llega
+            self.pending = (tm[-1], ym[-1])
+        return ((tm[first] + tm[first+1]) / 2, (ym[first] + ym[first+1]) / 2)
+
+    def reset(self):
+        self.pending = None
+
+
+def checksum(payload):                                  # Función que calcula el checksum de una trama (XOR de los bytes de canal, secuencia, tiempo y lectura)
+    c = 0
+    for b in payload:
+        c ^= b
+    return c
+
+
+def encodeFrame(ch, t, y, seq=None):                    # Función que construye una trama binaria, con número de secuencia si 'seq' no es None. La utiliza Sampler para
+    frame = np.zeros(1, FRAME_DTYPE if seq is None else FRAME_SEQ_DTYPE)  # pruebas y simulación
+    frame["sync"] = FRAME_SYNC
+    frame["ch"] = ch
+    frame["t"] = t
+    frame["y"] = y
+    if seq is not None:
+        frame["seq"] = seq % SEQ_MODULO
+    raw = bytearray(frame.tobytes())
+    raw[-1] = checksum(raw[1:-1])
+    return bytes(raw)
+
+
+def formatSample(ch, t, y):                             # Función que reconstruye la linea ASCII equivalente a una lectura, para mostrarla en la consola
+    if ch == CH_R:
+        return "[RPMp] Read; %.2f rpm %d ms\n" % (y, t)
+    return "[%s] Read: %.4f %s %d ms\n" % (CHANNEL_TAGS[ch], y, CHANNEL_UNITS[ch], t)
+
+
+def negotiateFormat(reader, linkFormat, timeout=3.0, retry=0.5):
+    # Función encargada del saludo inicial que selecciona el formato de exportación del microcontrolador. Requiere el hilo de adquisición
+    # (vease 'acquisition.serialReader') y el formato deseado ("ascii" o "binary"). Como el microcontrolador se reinicia al abrir el puerto
+    # COM, la solicitud se repite cada 'retry' segundos hasta recibir respuesta o agotar 'timeout'. Devuelve el formato acordado; en caso de
+    # no recibir respuesta (p. ej. un programa del microcontrolador anterior a este protocolo) se asume ASCII.
+    deadline = time.monotonic() + timeout
+    nextRequest = 0
+    received = b""
+    while time.monotonic() < deadline:
+        if time.monotonic() >= nextRequest:
+            reader.write(FORMAT_REQUEST[linkFormat])
+            nextRequest = time.monotonic() + retry
+        received += reader.drainBytes()
+        if FORMAT_REPLY[linkFormat] in received:
+            return linkFormat
+        time.sleep(0.01)
+    reader.write(FORMAT_REQUEST["ascii"])               # -> Sin respuesta: asegurar que el microcontrolador permanezca en formato ASCII
+    return "ascii"
+
+
+def negotiateBaudrate(reader, rates=BAUDRATES, timeout=3.0, retry=0.5, verify=0.5):
+    # Función encargada del saludo que acuerda la velocidad del enlace y habilita los números de secuencia. Requiere el hilo de adquisición
+    # (vease 'acquisition.serialReader') y las velocidades por solicitar, de la más alta a la más baja. Como el microcontrolador se reinicia
+    # al abrir el puerto COM, la primer solicitud se repite cada 'retry' segundos hasta recibir respuesta o agotar 'timeout'. Cada velocidad
+    # aceptada se confirma durante 'verify' segundos; si la confirmación falla, se espera a que el microcontrolador regrese a 57600 baudios y
+    # se solicita la siguiente. Devuelve (baudios, números de secuencia); en caso de no recibir respuesta (p. ej. un programa del
+    # microcontrolador anterior a este saludo) el enlace permanece a 57600 baudios y sin números de secuencia.
+    wait = timeout
+    for rate in rates:
+        reply = requestBaudrate(reader, rate, wait, retry)
+        if reply is None:                               # -> Sin respuesta: programa anterior o dispositivo perdido
+            break
+        wait = retry                                    # -> El microcontrolador ya respondió: las siguientes solicitudes no esperan el reinicio
+        if not reply:                                   # -> Velocidad rechazada: solicitar la siguiente
+            continue
+        switched = time.monotonic()
+        reader.setBaudrate(rate)
+        if confirmBaudrate(reader, verify):
+            return (rate, True)
+        time.sleep(max(switched + LINK_WINDOW + 0.1 - time.monotonic(), 0))   # -> Esperar a que el microcontrolador regrese a 57600 baudios
+        reader.setBaudrate(BAUD_DEFAULT)
+        reader.reset()                                  # -> Descartar los bytes recibidos a la velocidad equivocada
+    return (BAUD_DEFAULT, False)
+
+
+def requestBaudrate(reader, rate, timeout, retry):      # Función que solicita la velocidad 'rate'. Devuelve True si el microcontrolador la acepta, False si la rechaza y
+    deadline = time.monotonic() + timeout               # None si no responde en 'timeout' segundos
+    nextRequest = 0
+    received = b""
+    while time.monotonic() < deadline:
+        if time.monotonic() >= nextRequest:
+            reader.write(b"U%d\n" % rate)
+            nextRequest = time.monotonic() + retry
+        received += reader.drainBytes()
+        if BAUD_REPLY % rate in received:
+            return True
+        if BAUD_REFUSED in received:
+            return False
+        time.sleep(0.01)
+    return None
+
+
+def confirmBaudrate(reader, timeout, retry=0.1):        # Función que envia la orden 'V' a la nueva velocidad hasta recibir la confirmación o agotar 'timeout'. Los bytes
+    deadline = time.monotonic() + timeout               # recibidos durante el cambio de velocidad se ignoran
+    nextRequest = 0
+    received = b""
+    while time.monotonic() < deadline:
+        if time.monotonic() >= nextRequest:
+            reader.write(BAUD_VERIFY)
+            nextRequest = time.monotonic() + retry
+        received += reader.drainBytes()
+        if BAUD_CONFIRM in received:
+            return True
+        time.sleep(0.005)
+    return False
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de bancos de pruebas múltiples de Sampler. Permite que una misma computadora controle varios bancos al mismo tiempo: cada
+# banco tiene su propio motor de adquisición ('engine.py'), con su administrador de conexión, hilo de adquisición, secuencia de
+# Throttle y sesiones, y los puertos de los microcontroladores se reparten entre ellos por medio de 'connection.portPool'.
+#
+# La lectura del puerto de cada banco ocurre en sus propios hilos, por lo que un banco ocupado no retrasa la recepción de otro.
+# Sin interfaz gráfica, 'runEach()' ejecuta además el muestreo de cada banco en un hilo independiente. Las sesiones respaldadas en
+# disco se guardan en un subdirectorio por banco ('<spillDir>/<nombre>') cuando hay más de uno, y todos los bancos indexan sus sesiones
+# en un mismo catálogo ('<spillDir>/catalog.sqlite', vease 'catalog.py') con el nombre de su banco.
+
+import os
+import threading
+
+from catalog import sessionCatalog
+from connection import portPool
+from engine import samplerEngine
+
+
+class rigArray:                                         # Clase del conjunto de bancos de pruebas
+    def __init__(self, count=None, linkFormat="ascii", spillDir="sessions", lister=None, **connectionOptions):
+        self.pool = portPool(lister)                    # Requiere la cantidad de bancos (None para uno por cada microcontrolador conectado al iniciar), el formato
+        if count is None:                               # de exportación, el directorio de respaldo y, opcionalmente, la función que enumera los puertos y las
+            count = max(len(self.pool.lister()), 1)     # opciones del administrador de conexión (p. ej. 'portOpener')
+        self.names = ["rig" + str(k+1) for k in range(count)]
+        self.engines = []
+        self.catalog = sessionCatalog(spillDir) if spillDir is not None else None     # Catálogo de las sesiones de todos los bancos
+        for name in self.names:
+            options = dict(connectionOptions)
+            options.setdefault("portFinder", self.pool.finder(name))
+            spill = spillDir if (spillDir is None or count == 1) else os.path.join(spillDir, name)
+            self.engines.append(samplerEngine(linkFormat, spill, **options))
+            (self.engines[-1].catalog, self.engines[-1].rigName) = (self.catalog, name)
+        for (name, engine) in zip(self.names, self.engines):
+            engine.log = self.prefixed(name, print)
+
+    def __len__(self):
+        return len(self.engines)
+
+    def __getitem__(self, k):
+        return self.engines[k]
+
+    def prefixed(self, name, log):                      # Método que devuelve una función de mensajes que antepone el nombre del banco, cuando hay más de uno
+        if len(self.names) == 1:
+            return log
+        return lambda text: log("[" + name + "] " + text)
+
+    def start(self):
+        for engine in self.engines:
+            engine.start()
+
+    def stop(self):
+        for (name, engine) in zip(self.names, self.engines):
+            engine.stop()
+            self.pool.release(name)
+        if self.catalog is not None:                    # -> Las sesiones activas se indexan al concluir, antes de cerrar el catálogo
+            self.catalog.close()
+
+    def update(self):                                   # Método que avanza el motor de cada banco. Vease 'samplerEngine.update()'
+        for engine in self.engines:
+            engine.update()
+
+    def pollConnection(self):                           # Método que atiende los sucesos de conexión de todos los bancos. Devuelve la lista de (banco, suceso, puerto)
+        return [(k, event, port) for (k, engine) in enumerate(self.engines) for (event, port) in engine.pollConnection()]
+
+    def connected(self):
+        return [engine for engine in self.engines if engine.isConnected()]
+
+    def status(self):                                   # Método que devuelve el estado de cada banco: nombre, puerto, modo, fase y lecturas de tracción de la sesión activa
+        rows = []
+        for (name, engine) in zip(self.names, self.engines):
+            session = engine.sessions[-1] if engine.sessions else None
+            rows.append({"name": name, "port": engine.connection.portName, "connected": engine.isConnected(), "mode": engine.mode,
+                         "sampling": engine.readStatus == 1, "phase": engine.phase, "step": engine.stepIndex,
+                         "samples": len(session["T"]) if session is not None else 0})
+        return rows
+
+    def summary(self):                                  # Método que devuelve un resumen de una linea del estado de todos los bancos
+        rows = self.status()
+        return "Rigs: %d/%d connected, %d sampling" % (sum(r["connected"] for r in rows), len(rows), sum(r["sampling"] for r in rows))
+
+    def runEach(self, function, *args):                 # Método que ejecuta 'function(motor, *args)' para cada banco en un hilo independiente y devuelve sus resultados
+        results = [None] * len(self.engines)
+        def run(k):
+            results[k] = function(self.engines[k], *args)
+        threads = [threading.Thread(target=run, args=(k,), daemon=True) for k in range(len(self.engines))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Linea de comandos de Sampler. Ejecuta el motor de adquisición ('engine.py') sin la interfaz gráfica, por lo que no importa Qt ni
+# Matplotlib y puede utilizarse en una computadora sin pantalla o desde un script. Ejemplos:
+#
+#   python sampler.py run --steps 10 --period 3000 --out run.npz         Muestreo por etapas, exportado al concluir
+#   python sampler.py sweep --duration 20 --throttle 30 --out sweep.csv  Muestreo de barrido con Throttle fijo
+#   python sampler.py run --steps 4 --period 1000 --simulate --binary    Con el banco de pruebas virtual ('simulator.py')
+#   python sampler.py run --steps 10 --period 3000 --rigs all --out run.npz     En todos los bancos conectados, cada uno en su propio hilo
+#
+# El formato de exportación se elige por la extensión de '--out' (.npz, .csv o .parquet). Vease 'export.py'. La sesión se escribe en
+# disco mientras se muestrea, con la etapa y el Throttle de cada lectura y las marcas de cambio de etapa (canal "S"). Con varios
+# bancos, cada uno se exporta como '<nombre>_<banco>.<formato>' (vease 'rigs.py')
+#
+# Las cadenas de filtros de cada canal se pueden reemplazar con '--filter', p. ej. '--filter T=hampel:9:3,ema:0.2 --filter R=' (vease
+# 'filters.py'). Las lecturas sin filtrar se exportan en la columna 'raw'. Junto con los canales medidos se exportan los derivados
+# (potencia, tracción por potencia y coeficientes de tracción y torque, vease 'fusion.py'), para los que se indica la hélice con '--prop-diameter'
+#
+# Las sesiones respaldadas con '--spill' se indexan en el catálogo del directorio de respaldo con la etiqueta de '--label' (vease
+# 'catalog.py'). El subcomando 'find' las busca y, con '--out', exporta las encontradas:
+#
+#   python sampler.py run --steps 10 --period 3000 --spill sessions --label "10x4.5 2212-920KV"
+#   python sampler.py find --label "10x4.5*" --above R=8000 --since 2026-09-01 --out found.npz
+#
+# Con '--capture' se guarda el tráfico del puerto de cada banco en el directorio indicado; el subcomando 'replay' lo entrega de nuevo
+# al motor como si proviniera del banco (vease 'capture.py'), a la velocidad original, N veces más rápido o a la máxima:
+#
+#   python sampler.py run --steps 10 --period 3000 --capture captures
+#   python sampler.py replay captures/20261017-120000-ttyACM0.cap --speed max --out replay.npz
+#
+# Al conectarse, el enlace se eleva a la velocidad más alta que admitan ambos lados, hasta '--baud' (vease 'protocol.py'), y las lecturas
+# perdidas se cuentan con sus números de secuencia. '--baud 57600' conserva la velocidad inicial; '--baud 0' omite el saludo.
+#
+# Al concluir se reporta el resumen de las métricas de rendimiento de cada banco (vease 'metrics.py'). '--metrics' las guarda en un
+# archivo JSON, también en cualquier momento del muestreo al recibir la señal SIGUSR1; '--profile' habilita el perfilador por muestreo.
+
+import argparse
+import os
+import signal
+import sys
+import time
+
+from capture import RX, REPLAY_PORT, captureFormat, captureLink, captureOpener, readCapture, replayOpener
+from catalog import sessionCatalog
+from connection import openArduino
+from engine import samplerEngine
+from export import extensionOf, exportSession
+from filters import parseChain
+from protocol import BAUDRATES
+from storage import CHANNELS, DERIVED
+from rigs import rigArray
+
+
+def buildRigs(args):                                    # Función que crea los motores de los bancos con las opciones de conexión indicadas
+    count = None if args.rigs == "all" else int(args.rigs)
+    options = {}
+    if args.command == "replay":                        # -> Reemplazar al microcontrolador por la reproducción de una captura
+        options = dict(lister=lambda: [REPLAY_PORT], portOpener=replayOpener(args.chunks, args.speed, args.replayPorts), link=captureLink(args.chunks))
+    elif args.simulate:                                 # -> Reemplazar a los microcontroladores por bancos de pruebas virtuales
+        from simulator import simulatedPorts, openSimulator
+        options = dict(lister=lambda: simulatedPorts(count or 1), portOpener=lambda port: openSimulator(port, cellRate=args.sim_rate, loss=args.sim_loss))
+    if args.command != "replay":                        # -> Velocidades que se solicitan durante el saludo, hasta '--baud'
+        options["baudrates"] = tuple(rate for rate in BAUDRATES if rate <= args.baud)
+    if args.capture:                                    # -> Capturar el tráfico del puerto de cada banco
+        options["portOpener"] = captureOpener(options.get("portOpener", openArduino), args.capture)
+    rigs = rigArray(count, "binary" if args.binary else "ascii", args.spill, **options)
+    for engine in rigs.engines:
+        engine.setFilters(args.filters)
+        (engine.propDiameter, engine.airDensity) = (args.prop_diameter, args.air_density)
+        engine.label = args.label
+        if args.quiet:
+            engine.log = lambda text: None
+    return rigs
+
+
+def filterSpecs(items):                                 # Función que convierte los argumentos '--filter CANAL=ESPECIFICACIÓN' en {canal: especificación}. Lanza ValueError
+    specs = {}                                          # si alguno no es válido
+    for item in items:
+        (channel, sep, spec) = item.partition("=")
+        if not sep or channel not in CHANNELS:
+            raise ValueError("Invalid --filter '" + item + "'. Expected CHANNEL=SPEC with CHANNEL one of " + ", ".join(CHANNELS))
+        parseChain(spec)
+        specs[channel] = spec
+    return specs
+
+
+def channelLimits(items):                               # Función que convierte los argumentos '--above/--below CANAL=VALOR' en {canal: valor}. Lanza ValueError si alguno
+    limits = {}                                         # no es válido
+    for item in items:
+        (channel, sep, value) = item.partition("=")
+        if not sep or channel not in CHANNELS + DERIVED:
+            raise ValueError("Invalid limit '" + item + "'. Expected CHANNEL=VALUE with CHANNEL one of " + ", ".join(CHANNELS + DERIVED))
+        limits[channel] = float(value)
+    return limits
+
+
+def parseDate(text):                                    # Función que convierte una fecha 'AAAA-MM-DD' (o 'AAAA-MM-DD HH:MM') local en segundos desde la época
+    if text is None:
+        return None
+    for form in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(text, form))
+        except ValueError:
+            pass
+    raise ValueError("Invalid date '" + text + "'. Expected YYYY-MM-DD or 'YYYY-MM-DD HH:MM'")
+
+
+def replaySpeed(text):                                  # Función que convierte el argumento '--speed' en la velocidad de reproducción (None para la máxima)
+    if text == "max":
+        return None
+    speed = float(text)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def findSessions(args):                                 # Subcomando 'find': busca sesiones en el catálogo y, con '--out', exporta las encontradas
+    catalog = sessionCatalog(args.spill)
+    catalog.log = lambda text: print(text, file=sys.stderr)
+    try:
+        if args.scan:
+            print("Indexed %d sessions" % catalog.scan(), file=sys.stderr)
+        t0 = time.perf_counter()
+        found = catalog.find(args.label, args.rig, args.mode, args.since, args.until, args.period, args.steps, args.above, args.below, args.limit)
+        print("%d of %d sessions found in %.1f ms" % (len(found), len(catalog), 1000 * (time.perf_counter() - t0)), file=sys.stderr)
+        print("%6s  %-16s  %-6s  %-24s  %-11s  %6s  %5s  %s" % ("id", "started", "rig", "label", "mode", "period", "steps", "path"))
+        for row in found:
+            print("%6d  %-16s  %-6s  %-24s  %-11s  %6s  %5s  %s" % (row["id"], time.strftime("%Y-%m-%d %H:%M", time.localtime(row["started"])),
+                  row["rig"] or "-", row["label"] or "-", row["mode"] or "-", row["period"] or "-", row["steps"] or "-", row["path"]))
+        if args.out:
+            (base, ext) = os.path.splitext(args.out)
+            for row in found:
+                writer = exportSession(base + "_" + str(row["id"]) + ext, catalog.load(row["id"]), catalog.meta(row["id"]))
+                writer.join()
+                if writer.error is not None:
+                    print("Export error: " + str(writer.error), file=sys.stderr)
+                    return 1
+        return 0
+    finally:
+        catalog.close()
+
+
+def waitConnection(rigs, timeout):                      # Función que espera a que los administradores de conexión encuentren a todos los microcontroladores.
+    deadline = time.monotonic() + timeout               # Devuelve los motores conectados
+    while time.monotonic() < deadline and len(rigs.connected()) < len(rigs):
+        rigs.pollConnection()
+        time.sleep(0.05)
+    rigs.pollConnection()
+    return rigs.connected()
+
+
+def exportPath(out, rigs, k):                           # Función que devuelve el archivo de exportación del banco 'k'
+    if len(rigs) == 1:
+        return out
+    (base, ext) = os.path.splitext(out)
+    return base + "_" + rigs.names[k] + ext
+
+
+def runLoop(engine, running):                           # Función que llama a 'engine.update()' cada 'samplingInterval' ms mientras 'running()' sea verdadero
+    interval = engine.samplingInterval / 1000
+    nextUpdate = time.monotonic()
+    while running():
+        engine.update()
+        engine.pollConnection()
+        nextUpdate += interval
+        time.sleep(max(nextUpdate - time.monotonic(), 0))
+
+
+def startExport(rigs, out):                             # Función que habilita la exportación continua de la sesión de cada banco a su archivo
+    for (k, engine) in enumerate(rigs.engines):
+        engine.exportTo(exportPath(out, rigs, k)[:-len(extensionOf(out))], extensionOf(out), numbered=False)
+
+
+def runSteps(engine, args):                             # Subcomando 'run': muestreo por etapas
+    if not engine.isConnected():
+        return False
+    engine.throttleRange = (0, args.max_throttle)
+    engine.settleTime = args.settle
+    engine.selectMode("Auto Period")
+    try:
+        engine.startSteps(args.period, args.steps, args.countdown)
+    except ValueError as e:
+        engine.log(str(e))
+        return False
+    runLoop(engine, lambda: engine.readStatus == 1)
+    return True
+
+
+def runSweep(engine, args):                             # Subcomando 'sweep': muestreo de barrido durante 'duration' segundos con Throttle fijo
+    if not engine.isConnected():
+        return False
+    engine.selectMode("Manual")
+    engine.startSweep()
+    engine.setThrottle(args.throttle)
+    end = time.monotonic() + args.duration
+    runLoop(engine, lambda: engine.readStatus == 1 and time.monotonic() < end)
+    engine.setThrottle(0)
+    engine.pauseSweep()
+    engine.readSamples()                                # -> Procesar las lecturas recibidas antes de la pausa
+    engine.finishSession()
+    return True
+
+
+def runReplay(engine, args):                            # Subcomando 'replay': muestreo de barrido durante toda la captura reproducida
+    if not engine.isConnected():
+        return False
+    engine.selectMode("Manual")
+    engine.startSweep()
+    start = time.monotonic()
+    runLoop(engine, lambda: engine.readStatus == 1 and not args.replayPorts[-1].drained)
+    engine.pauseSweep()
+    engine.readSamples()                                # -> Procesar el último bloque entregado por la captura
+    engine.finishSession()
+    engine.log("Replayed %d bytes in %.2f s" % (sum(len(data) for (_, direction, data) in args.chunks if direction == RX), time.monotonic() - start))
+    return True
+
+
+def dumpMetrics(rigs, path):                            # Función que guarda las métricas de rendimiento de cada banco en su archivo
+    for (k, engine) in enumerate(rigs.engines):
+        try:
+            engine.metrics.dump(exportPath(path, rigs, k))
+        except OSError as e:
+            engine.log("Metrics error: " + str(e))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="sampler", description="Headless acquisition for the Sampler test bank")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="sample by steps of throttle")
+    run.add_argument("--steps", type=int, required=True, help="number of throttle steps")
+    run.add_argument("--period", type=int, required=True, help="duration of each step (ms)")
+    run.add_argument("--countdown", type=int, default=samplerEngine.defaultCountdown, help="countdown before the first step (s)")
+    run.add_argument("--max-throttle", type=float, default=samplerEngine.throttleRange[1], help="throttle of the last step")
+    run.add_argument("--settle", type=float, default=samplerEngine.settleTime, help="time excluded from the statistics at the start of each step (ms)")
+    sweep = commands.add_parser("sweep", help="sample at a fixed throttle")
+    sweep.add_argument("--duration", type=float, required=True, help="sampling time (s)")
+    sweep.add_argument("--throttle", type=int, default=0, help="throttle setting")
+    find = commands.add_parser("find", help="search the session catalog")
+    find.add_argument("--spill", default="sessions", help="directory where sessions are backed on disk and catalogued")
+    find.add_argument("--label", help="propeller/motor label; accepts wildcards, e.g. '10x4.5*'")
+    find.add_argument("--rig", help="test bench name, e.g. rig1")
+    find.add_argument("--mode", choices=("Manual", "Auto Period"), help="sampling mode")
+    find.add_argument("--since", help="sessions started on or after this date (YYYY-MM-DD)")
+    find.add_argument("--until", help="sessions started before this date (YYYY-MM-DD)")
+    find.add_argument("--period", type=int, help="duration of each step (ms)")
+    find.add_argument("--steps", type=int, help="number of throttle steps")
+    find.add_argument("--above", action="append", default=[], metavar="CHANNEL=VALUE", help="channel maximum at least VALUE, e.g. R=8000")
+    find.add_argument("--below", action="append", default=[], metavar="CHANNEL=VALUE", help="channel minimum at most VALUE")
+    find.add_argument("--limit", type=int, help="maximum number of sessions listed")
+    find.add_argument("--scan", action="store_true", help="first index the sessions on disk that are not catalogued yet")
+    find.add_argument("--out", help="export each session found to <name>_<id>.<format>")
+    replay = commands.add_parser("replay", help="sample the traffic of a capture file instead of a test bench")
+    replay.add_argument("file", help="capture file (.cap) recorded with --capture")
+    replay.add_argument("--speed", type=replaySpeed, default=1.0, help="replay speed: 1 for real time, N for N times faster or 'max'")
+    replay.set_defaults(rigs="1", binary=False, simulate=False, sim_rate=80.0, capture=None)
+    for command in (run, sweep, replay):
+        command.add_argument("--label", default=samplerEngine.label, help="propeller/motor label the sessions are catalogued with")
+        command.add_argument("--out", help="export file (.npz, .csv or .parquet)")
+        command.add_argument("--spill", default=None, help="directory where sessions are backed on disk")
+        command.add_argument("--connect-timeout", type=float, default=10.0, help="seconds to wait for the microcontroller")
+        command.add_argument("--quiet", action="store_true", help="do not print status messages")
+        command.add_argument("--prop-diameter", type=float, default=samplerEngine.propDiameter, help="propeller diameter for the thrust and torque coefficients (m)")
+        command.add_argument("--air-density", type=float, default=samplerEngine.airDensity, help="air density for the thrust and torque coefficients (kg/m^3)")
+        command.add_argument("--filter", action="append", default=[], metavar="CHANNEL=SPEC",
+                             help="filter chain of a channel, e.g. T=range:0:2,hampel:9:3,ema:0.3 (empty SPEC disables filtering)")
+        command.add_argument("--metrics", help="write the pipeline metrics to this JSON file at the end and on SIGUSR1")
+        command.add_argument("--profile", help="sample the call stacks while running and write them to this file (collapsed format)")
+    for command in (run, sweep):
+        command.add_argument("--binary", action="store_true", help="request binary frames from the microcontroller")
+        command.add_argument("--simulate", action="store_true", help="use the virtual test bank instead of hardware")
+        command.add_argument("--sim-rate", type=float, default=80.0, help="load cell rate of the virtual test bank (Hz)")
+        command.add_argument("--sim-loss", type=float, default=0.0, help="fraction of the virtual test bank readings dropped on the link")
+        command.add_argument("--baud", type=int, default=BAUDRATES[0], help="highest baud rate negotiated with the microcontroller (0 keeps 57600 "
+                                                                          "without sequence numbers)")
+        command.add_argument("--rigs", default="1", help="number of test benches to drive at once, or 'all' for every one found")
+        command.add_argument("--capture", metavar="DIR", help="record the serial traffic of each test bench to DIR for replay")
+    args = parser.parse_args(argv)
+    try:
+        if args.out:
+            extensionOf(args.out)
+        if args.command == "find":
+            (args.since, args.until) = (parseDate(args.since), parseDate(args.until))
+            (args.above, args.below) = (channelLimits(args.above), channelLimits(args.below))
+        else:
+            args.filters = filterSpecs(args.filter)
+        if args.command == "replay":
+            args.chunks = readCapture(args.file)
+            args.binary = captureFormat(args.chunks) == "binary"    # -> Decodificar con el formato acordado durante la captura
+            args.replayPorts = []
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+    if args.command == "find":
+        return findSessions(args)
+
+    rigs = buildRigs(args)
+    if args.metrics and hasattr(signal, "SIGUSR1"):     # -> Guardar las métricas a solicitud, p. ej. 'kill -USR1 <pid>' durante un muestreo largo
+        signal.signal(signal.SIGUSR1, lambda signum, frame: dumpMetrics(rigs, args.metrics))
+    profiler = None
+    if args.profile:
+        from metrics import samplingProfiler
+        profiler = samplingProfiler()
+        profiler.start()
+    rigs.start()
+    try:
+        engines = waitConnection(rigs, args.connect_timeout)
+        if not engines:
+            print("No microcontroller found", file=sys.stderr)
+            return 1
+        if len(engines) < len(rigs):
+            print("Only %d of %d test benches found" % (len(engines), len(rigs)), file=sys.stderr)
+        if args.out:
+            startExport(rigs, args.out)
+        done = rigs.runEach({"run": runSteps, "sweep": runSweep, "replay": runReplay}[args.command], args)    # -> Cada banco muestrea en su propio hilo
+        status = 0
+        for (k, engine) in enumerate(rigs.engines):
+            if not done[k] or not engine.sessions:
+                status = 1
+                continue
+            session = engine.sessions[-1]
+            engine.log("Samples: " + ", ".join(c + "=" + str(len(session[c])) for c in session.channels))
+            engine.log("Pipeline: " + engine.metrics.summary())
+        return status
+    except KeyboardInterrupt:
+        for engine in rigs.engines:
+            engine.setThrottle(0)
+        return 130
+    finally:
+        rigs.stop()
+        if args.metrics:
+            dumpMetrics(rigs, args.metrics)
+        if profiler is not None:
+            profiler.stop()
+            profiler.dump(args.profile)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
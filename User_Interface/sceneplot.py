@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo del backend de gráficas 'pyqtgraph' de Sampler. Dibuja las mismas gráficas que 'plotting.py' como elementos de una escena
+# de Qt (QGraphicsScene): cada cuadro únicamente reemplaza los puntos de las lineas que cambiaron y Qt vuelve a pintar sus regiones,
+# sin rasterizar la figura completa con Agg. Las lineas reciben los puntos decimados por la pirámide de mínimos y máximos (vease
+# 'decimation.py'), por lo que cada linea dibuja a lo sumo 2 puntos por pixel sin importar la duración de la sesión; además tienen
+# habilitados el recorte a la vista y la reducción por picos propios de pyqtgraph.
+#
+# Requiere el módulo opcional 'pyqtgraph'. Se elige al iniciar la aplicación:
+#
+#   python main.py --plot-backend=pyqtgraph
+
+import numpy as np
+import pyqtgraph as pg
+
+from plotbase import plotWindowBase, PANELS, COLORS
+
+
+class sceneAxes:                                        # Adaptador de un PlotItem de pyqtgraph con los métodos de los ejes de Matplotlib que utiliza la ventana principal
+    def __init__(self, item):
+        self.item = item
+
+    def set_xlim(self, x0, x1, **kwargs):
+        self.item.setXRange(x0, x1, padding=0)
+
+    def set_ylim(self, y0, y1, **kwargs):
+        self.item.setYRange(y0, y1, padding=0)
+
+    def get_xlim(self):
+        return tuple(self.item.viewRange()[0])
+
+    def get_ylim(self):
+        return tuple(self.item.viewRange()[1])
+
+
+class sceneCanvas(pg.GraphicsLayoutWidget):             # Clase de la escena con las gráficas de 'PANELS', en 2 filas de 3
+    def __init__(self):
+        super().__init__()
+        self.channelAxes = {}
+        for (k, (name, channels, label, ylim)) in enumerate(PANELS):
+            item = self.addPlot(row=k // 3, col=k % 3)
+            item.setLabel("left", label)
+            item.setLabel("bottom", "Time (ms)")
+            item.disableAutoRange()                     # -> Los límites los controla la ventana principal, igual que con Matplotlib
+            item.setClipToView(True)
+            item.setDownsampling(auto=True, mode="peak")
+            axes = sceneAxes(item)
+            axes.set_xlim(0, 5000)
+            axes.set_ylim(*ylim)
+            setattr(self, name, axes)
+            for channel in channels:
+                self.channelAxes[channel] = axes
+
+
+class scenePlotWindow(plotWindowBase):                  # Clase de la ventana de gráficas de pyqtgraph. Hereda de 'plotWindowBase'
+    def __init__(self, fps=60):
+        super().__init__(fps)
+        self.overlays = {c: [] for c in self.plot.channelAxes}     # Lineas de las sesiones superpuestas de cada canal
+
+    def createCanvas(self):
+        pg.setConfigOptions(antialias=False, background="w", foreground="k")
+        return sceneCanvas()
+
+    def newLine(self, axes, plot):
+        return axes.item.plot([], [], pen=pg.mkPen(COLORS.get(plot, "r")))
+
+    def setLineData(self, line, x, y):
+        line.setData(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+
+    def axesWidth(self, axes):
+        return max(int(axes.item.getViewBox().width()), 1)
+
+    def setOverlayLines(self, channel, segments, colors):   # Las lineas superpuestas se crean o se retiran de la escena para que haya una por sesión, debajo de las de
+        item = self.plot.channelAxes[channel].item          # la sesión activa
+        lines = self.overlays[channel]
+        while len(lines) > len(segments):
+            item.removeItem(lines.pop())
+        while len(lines) < len(segments):
+            lines.append(item.plot([], []))
+            lines[-1].setZValue(-1)
+        for (line, (x, y), color) in zip(lines, segments, colors):
+            line.setPen(pg.mkPen(pg.mkColor(color + "99")))    # -> Mismo color que con Matplotlib, con 60% de opacidad
+            self.setLineData(line, x, y)
+
+    def renderFrame(self):                              # Método llamado por 'renderTimer' como máximo 'fps' veces por segundo. Entrega los puntos decimados a las lineas
+        if not self.isVisible():                        # pendientes; Qt vuelve a pintar únicamente las regiones de la escena que cambiaron
+            return
+        self.refreshStale()
+        self.dirty = False
+        self.fullRedraw = False
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo del banco de pruebas virtual de Sampler. Contiene un dispositivo simulado que reemplaza al objeto 'serial.Serial' del
+# microcontrolador y responde a las mismas ordenes que TestBankMain3.ino ('X', 'Y', 'r', 's', 't', 'n' + 4 bytes, 'A', 'B',
+# 'U' + baudios, 'V'), exportando lecturas de tracción, torque y velocidad angular en formato ASCII o binario (vease 'protocol.py'),
+# con números de secuencia una vez completado el saludo de velocidad. Las ordenes enviadas mientras la velocidad del puerto ('baudrate',
+# la que ajusta Sampler) no coincide con la del dispositivo se pierden, igual que con el puerto real, y 'loss' descarta al azar una
+# fracción de las lecturas para probar la detección de lecturas perdidas.
+#
+# Las lecturas se generan a partir de un modelo sencillo del motor: la velocidad angular sigue al Throttle con un retardo de
+# primer orden, y la tracción y el torque son proporcionales al cuadrado de la velocidad angular. Las frecuencias de muestreo,
+# el ruido y las constantes del modelo son configurables, lo que permite probar Sampler sin hardware y a frecuencias mayores
+# que las reales. Para utilizarlo con el administrador de conexión:
+#
+#   connectionManager(portFinder=lambda: SIM_PORT, portOpener=openSimulator)
+#
+# Para simular varios bancos a la vez (vease 'rigs.py'), 'simulatedPorts(n)' enumera n puertos simulados:
+#
+#   rigArray(n, lister=lambda: simulatedPorts(n), portOpener=openSimulator)
+
+import threading
+import time
+import numpy as np
+
+from protocol import FRAME_DTYPE, FRAME_SEQ_DTYPE, FRAME_SYNC, SEQ_MODULO, CH_T, CH_M1, CH_M2, CH_R, BAUD_DEFAULT, BAUDRATES, LINK_WINDOW
+
+
+SIM_PORT = "sim://testbank"                             # Nombre del puerto simulado reportado a la interfaz
+
+
+class virtualTestBank:                                  # Clase del dispositivo simulado. Implementa la parte de la interfaz de 'serial.Serial' utilizada por Sampler
+    def __init__(self, cellRate=80.0, rpmInterval=100, noise=(0.005, 0.002, 30.0), maxRPM=9000.0, thrustMax=1.8, torqueMax=0.06,
+                 tau=0.3, seed=None, clock=time.monotonic, timeout=None, maxBaud=1000000, loss=0.0):
+        self.cellRate = cellRate                        # Frecuencia (Hz) con la que las celdas de carga entregan lecturas. El HX711 real entrega 10 u 80
+        self.rpmInterval = rpmInterval                  # Periodo (ms) con el que se exporta la lectura de la sonda de RPM
+        self.noise = noise                              # Desviación estándar del ruido de tracción (kg), torque (kg*m) y velocidad angular (rpm)
+        self.maxRPM = maxRPM                            # Velocidad angular a Throttle máximo
+        self.kT = thrustMax / maxRPM**2                 # Constantes de tracción y torque: lectura = k * rpm^2
+        self.kQ = torqueMax / maxRPM**2
+        self.tau = tau                                  # Constante de tiempo (s) con la que la velocidad angular sigue al Throttle
+        self.rng = np.random.default_rng(seed)
+        self.clock = clock
+        self.timeout = timeout
+        self.maxBaud = maxBaud                          # Velocidad más alta que acepta el dispositivo durante el saludo
+        self.loss = loss                                # Fracción de lecturas que se pierden antes de llegar a Sampler
+        self.baudrate = BAUD_DEFAULT                    # Velocidad del puerto del lado de Sampler (atributo de 'serial.Serial')
+        self.linkRate = BAUD_DEFAULT                    # Velocidad del lado del dispositivo
+        self.verifyUntil = None                         # Tiempo (ms) hasta el que se espera la confirmación 'V' de una nueva velocidad
+        self.seqMode = False                            # Flag de lecturas con número de secuencia, habilitada por el saludo
+        self.seq = 0                                    # Número de secuencia de la siguiente lectura
+        self.is_open = True
+        self.lock = threading.Condition()
+        self.output = bytearray(b"[HX711: OK]")         # Bytes pendientes de ser leidos por Sampler. El programa real saluda al iniciar
+        self.commands = bytearray()                     # Bytes de ordenes recibidos y aún no procesados
+        self.start = clock()
+        self.lastUpdate = 0.0                           # Tiempo (ms desde el inicio) hasta el que ya se generaron lecturas
+        self.nextCell = 0.0                             # Tiempo de la siguiente lectura de las celdas de carga
+        self.nextRPM = 0.0                              # Tiempo de la siguiente exportación de RPM
+        self.rpm = 0.0                                  # Estado del modelo del motor
+        self.throttle = 0.0                             # Fracción de Throttle (0 a 1) de la señal PWM actual
+        self.sweep = False                              # Equivalente al bucle del modo Lectura de Barrido ('X')
+        self.running = False                            # Equivalente a la Flag 'i' del programa (False = en pausa, True = en ejecución)
+        self.tp = 0.0
+        self.tk = 0.0
+        self.binMode = False
+
+    # ==== Interfaz de 'serial.Serial' ==== #
+
+    @property
+    def in_waiting(self):
+        with self.lock:
+            self.generate()
+            return len(self.output)
+
+    def read(self, size=1):                             # Método que devuelve hasta 'size' bytes, esperando como máximo 'timeout' segundos a que existan lecturas
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self.lock:
+            while True:
+                self.generate()
+                if self.output or not self.is_open:
+                    break
+                wait = 1/self.cellRate if self.sweep and self.running else 0.05
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        break
+                self.lock.wait(wait)
+            data = bytes(self.output[:size])
+            del self.output[:size]
+            return data
+
+    def write(self, data):                              # Método que recibe ordenes. Las lecturas anteriores a la orden se generan antes de procesarla
+        with self.lock:
+            self.generate()
+            if self.baudrate == self.linkRate:          # -> A velocidades distintas el dispositivo no recibe ordenes válidas
+                self.commands += data
+            self.processCommands()
+            self.lock.notify_all()
+        return len(data)
+
+    def reset_input_buffer(self):
+        with self.lock:
+            self.generate()
+            self.output.clear()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        with self.lock:
+            self.is_open = False
+            self.lock.notify_all()
+
+    # ==== Programa simulado ==== #
+
+    def now(self):                                      # Método que devuelve el tiempo de ejecución del dispositivo en milisegundos (equivalente a millis())
+        return (self.clock() - self.start) * 1000
+
+    def processCommands(self):                          # Método que interpreta las ordenes recibidas, igual que 'loop()' en TestBankMain3.ino
+        while self.commands:
+            M = chr(self.commands[0])
+            if M == "n":
+                if len(self.commands) < 5:              # -> La configuración de Throttle aún no llega completa
+                    return
+                self.setThrottle(int.from_bytes(self.commands[1:5], "little"))    # -> Dentro o fuera del modo de lectura, los 4 bytes nunca se interpretan
+                del self.commands[:5]                                               #    como ordenes
+                continue
+            if M == "U":
+                end = self.commands.find(b"\n")
+                if end < 0:                             # -> La velocidad solicitada aún no llega completa
+                    return
+                rate = int(self.commands[1:end] or 0)
+                del self.commands[:end+1]
+                self.negotiateBaud(rate)
+                continue
+            del self.commands[:1]
+            if M == "V" and self.verifyUntil is not None:
+                self.verifyUntil = None
+                (self.seqMode, self.seq) = (True, 0)
+                self.output += b"[BAUD: OK]\r\n"
+            elif M in "AB":
+                self.binMode = (M == "B")
+                self.output += b"[FMT: BIN]\r\n" if self.binMode else b"[FMT: ASC]\r\n"
+            elif M == "X":
+                self.sweep = True
+            elif not self.sweep:
+                continue
+            elif M == "r" and not self.running:
+                self.tp = self.now()
+                self.nextRPM = self.tp + self.rpmInterval
+                self.running = True
+            elif M == "s" and self.running:
+                self.tk = self.now() - self.tp + self.tk
+                self.running = False
+            elif M == "t":
+                self.tk = 0.0
+                self.running = False
+            elif M == "Y":
+                self.output += b"  Done\r\n"
+                (self.sweep, self.running) = (False, False)
+
+    def negotiateBaud(self, rate):                      # Método que atiende la solicitud de velocidad, igual que 'negotiateBaud()' en el programa: responde a la velocidad
+        if rate not in BAUDRATES or rate > self.maxBaud:    # actual, cambia de velocidad y espera la confirmación durante 'LINK_WINDOW' segundos
+            self.output += b"[BAUD: NO]\r\n"
+            return
+        self.output += b"[BAUD: %d]\r\n" % rate
+        self.linkRate = rate
+        self.verifyUntil = self.now() + 1000*LINK_WINDOW
+
+    def setThrottle(self, value):                       # Método que convierte la configuración recibida en la fracción de Throttle, igual que la señal PWM del programa:
+        pulse = (value*2.5 + 240) * 4                   # OCR1A = value*2.5 + 240 con cuentas de 4 us, sobre un rango del ESC de 1000 a 2000 us
+        self.throttle = min(max((pulse - 1000) / 1000, 0.0), 1.0)
+
+    def motorRPM(self, t):                              # Método que devuelve la velocidad angular del modelo en los tiempos 't' (ms), posteriores a 'lastUpdate'
+        target = self.throttle * self.maxRPM
+        return target + (self.rpm - target) * np.exp(-(t - self.lastUpdate) / (1000*self.tau))
+
+    def generate(self):                                 # Método que genera todas las lecturas pendientes desde la última llamada hasta el tiempo actual
+        now = self.now()
+        if self.verifyUntil is not None and now > self.verifyUntil:     # -> Sin confirmación: regresar a la velocidad inicial
+            (self.linkRate, self.verifyUntil) = (BAUD_DEFAULT, None)
+        if now <= self.lastUpdate:
+            return
+        if self.sweep and self.running:
+            cells = np.arange(self.nextCell, now, 1000/self.cellRate)
+            rpms = np.arange(self.nextRPM, now, self.rpmInterval)
+            if len(cells):
+                self.nextCell = cells[-1] + 1000/self.cellRate
+                self.emitCells(cells)
+            if len(rpms):
+                self.nextRPM = rpms[-1] + self.rpmInterval
+                self.emitRPM(rpms)
+        else:                                           # -> En pausa las celdas continuan leyendo, pero no se exporta nada
+            self.nextCell = max(self.nextCell, now)
+        self.rpm = float(self.motorRPM(now))
+        self.lastUpdate = now
+
+    def timestamps(self, t):                            # Método que convierte tiempos de ejecución a marcas temporales exportadas (millis() - tp + tk)
+        return (t - self.tp + self.tk).astype(np.uint32)
+
+    def emitCells(self, t):
+        rpm = self.motorRPM(t)
+        n = len(t)
+        thrust = self.kT * rpm**2 + self.rng.normal(0, self.noise[0], n)
+        m1 = self.kQ * rpm**2 + self.rng.normal(0, self.noise[1], n)
+        m2 = self.kQ * rpm**2 + self.rng.normal(0, self.noise[1], n)
+        ts = self.timestamps(t)
+        if self.binMode:
+            self.emitFrames(np.repeat(ts, 3), np.column_stack((thrust, m1, m2)).ravel(), np.tile([CH_T, CH_M1, CH_M2], n))
+        else:
+            self.emitLines([line for (a, b, c, k) in zip(thrust, m1, m2, ts)
+                            for line in ("[HX7T] Read: %.4f Kg %d ms" % (a, k), "[HX7M1] Read: %.4f Kg.m %d ms" % (b, k), "[HX7M2] Read: %.4f Kg.m %d ms" % (c, k))])
+
+    def emitRPM(self, t):
+        rpm = np.maximum(self.motorRPM(t) + self.rng.normal(0, self.noise[2], len(t)), 0)
+        ts = self.timestamps(t)
+        if self.binMode:
+            self.emitFrames(ts, rpm, np.full(len(t), CH_R))
+        else:
+            self.emitLines(["[RPMp] Read; %.2f rpm %d ms" % (r, k) for (r, k) in zip(rpm, ts)])
+
+    def emitLines(self, lines):                         # Método que exporta lineas ASCII de lecturas (sin terminador), con su número de secuencia si el saludo lo habilitó
+        if self.seqMode:
+            lines = ["%s #%d" % (line, (self.seq + k) % SEQ_MODULO) for (k, line) in enumerate(lines)]
+            self.seq += len(lines)
+        self.output += "".join(line + "\r\n" for (line, kept) in zip(lines, self.kept(len(lines))) if kept).encode()
+
+    def emitFrames(self, t, y, ch):                     # Método que construye de manera vectorizada las tramas binarias de un bloque de lecturas
+        dtype = FRAME_SEQ_DTYPE if self.seqMode else FRAME_DTYPE
+        frames = np.zeros(len(t), dtype)
+        frames["sync"] = FRAME_SYNC
+        frames["ch"] = ch
+        frames["t"] = t
+        frames["y"] = y
+        if self.seqMode:
+            frames["seq"] = (self.seq + np.arange(len(t))) % SEQ_MODULO
+            self.seq += len(t)
+        raw = frames.view(np.uint8).reshape(-1, dtype.itemsize)
+        raw[:, -1] = np.bitwise_xor.reduce(raw[:, 1:-1], axis=1)
+        self.output += raw[self.kept(len(t))].tobytes()
+
+    def kept(self, n):                                  # Método que indica cuáles de 'n' lecturas llegan a Sampler. Vease 'loss'
+        return self.rng.random(n) >= self.loss if self.loss else np.ones(n, bool)
+
+
+def simulatedPorts(count):                              # Función análoga a 'connection.findArduinos()' que enumera 'count' bancos de pruebas virtuales
+    return [SIM_PORT + "/" + str(k+1) for k in range(count)]
+
+
+def openSimulator(portID, **options):                   # Función análoga a 'connection.openArduino()' que abre el banco de pruebas virtual
+    return virtualTestBank(**options)
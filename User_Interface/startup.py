@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de medición del arranque de Sampler. La ventana principal marca el final de cada etapa del inicio (importaciones,
+# carga de la interfaz, construcción de la ventana, primer cuadro mostrado) y, con el argumento '--startup-report', imprime
+# el desglose de tiempos:
+#
+#   python main.py --startup-report             Mostrar el desglose al terminar de iniciar
+#   python main.py --startup-report --quit      Mostrar el desglose y salir (p. ej. para medir desde un script)
+
+import sys
+import time
+
+ORIGIN = time.perf_counter()                            # Instante de la primera importación de este módulo (inicio de 'main.py')
+marks = [("start", ORIGIN)]
+
+
+def mark(stage):                                        # Función que registra el final de la etapa 'stage'
+    marks.append((stage, time.perf_counter()))
+
+
+def report(out=sys.stdout):                             # Función que imprime la duración de cada etapa, el total y los módulos pesados que ya fueron importados
+    for ((_, t0), (stage, t1)) in zip(marks, marks[1:]):
+        print("  %-24s %8.1f ms" % (stage, 1e3*(t1 - t0)), file=out)
+    print("  %-24s %8.1f ms" % ("total", 1e3*(marks[-1][1] - ORIGIN)), file=out)
+    loaded = [m for m in ("matplotlib", "pyarrow", "PyQt5.uic") if m in sys.modules]
+    print("  loaded: " + (", ".join(loaded) if loaded else "none of matplotlib, pyarrow, PyQt5.uic"), file=out)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de estadísticas por etapa de Sampler. Durante el muestreo por etapas acumula, para cada canal y cada etapa de Throttle, la
+# cantidad de lecturas, la media, la varianza, el mínimo y el máximo, de manera incremental: cada bloque recibido se combina con lo
+# acumulado (algoritmo de Welford en su forma por bloques, de Chan et al.) sin guardar ni volver a recorrer las lecturas anteriores.
+# Al concluir la última etapa, las curvas de tracción, torque y velocidad angular contra Throttle ya estan calculadas.
+#
+# Las lecturas de los primeros 'settle' ms de cada etapa (medidos con las marcas temporales del microcontrolador desde la primer
+# lectura de la etapa) se excluyen, para no mezclar la respuesta transitoria del motor con el régimen estable.
+
+import numpy as np
+
+from storage import CHANNELS
+
+
+class stepStatistics:                                   # Clase del acumulador de estadísticas por canal y por etapa
+    def __init__(self, channels=CHANNELS):
+        self.channels = channels
+        self.reset([])
+
+    def reset(self, throttles, settle=0):               # Método para iniciar una secuencia de etapas. Requiere el Throttle de cada etapa y la ventana de asentamiento (ms)
+        steps = len(throttles)
+        self.throttles = np.asarray(throttles, dtype=np.float64)
+        self.settle = settle
+        self.starts = np.full(steps, np.nan)            # Marca temporal de la primer lectura de cada etapa
+        self.count = {c: np.zeros(steps, np.int64) for c in self.channels}
+        self.mean = {c: np.zeros(steps) for c in self.channels}
+        self.m2 = {c: np.zeros(steps) for c in self.channels}      # Suma de los cuadrados de las desviaciones respecto a la media
+        self.min = {c: np.full(steps, np.inf) for c in self.channels}
+        self.max = {c: np.full(steps, -np.inf) for c in self.channels}
+        self.version = 0                                # Se incrementa con cada bloque acumulado, para que las gráficas sepan cuándo redibujar
+
+    def startStep(self, step, t0):                      # Método que registra la marca temporal con la que comienza una etapa
+        if 0 <= step < len(self.starts):
+            self.starts[step] = t0
+
+    def update(self, channel, step, t, y):              # Método que acumula un bloque de lecturas (t, y) de un canal en una etapa
+        if not (0 <= step < len(self.starts)) or np.isnan(self.starts[step]):
+            return
+        y = np.asarray(y, dtype=np.float64)[np.asarray(t) >= self.starts[step] + self.settle]   # -> Excluir la ventana de asentamiento
+        if not len(y):
+            return
+        (na, nb) = (self.count[channel][step], len(y))
+        (ma, mb) = (self.mean[channel][step], y.mean())
+        n = na + nb
+        delta = mb - ma                                 # -> Combinar (n, media, M2) del bloque con lo acumulado
+        self.mean[channel][step] = ma + delta * nb / n
+        self.m2[channel][step] += ((y - mb)**2).sum() + delta**2 * na * nb / n
+        self.count[channel][step] = n
+        self.min[channel][step] = min(self.min[channel][step], y.min())
+        self.max[channel][step] = max(self.max[channel][step], y.max())
+        self.version += 1
+
+    def std(self, channel):                             # Método que devuelve la desviación estándar muestral de cada etapa (NaN con menos de 2 lecturas)
+        count = self.count[channel]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 1, np.sqrt(self.m2[channel] / np.maximum(count - 1, 1)), np.nan)
+
+    def curve(self, channel):                           # Método que devuelve la curva (Throttle, media, desviación estándar) de un canal, solo con las etapas que tienen lecturas
+        done = self.count[channel] > 0
+        return (self.throttles[done], self.mean[channel][done], self.std(channel)[done])
+
+    def summary(self):                                  # Método que devuelve las estadísticas de cada etapa como lista de diccionarios (p. ej. para los metadatos)
+        rows = []
+        for k in range(len(self.throttles)):
+            row = {"step": k, "throttle": float(self.throttles[k])}
+            for c in self.channels:
+                n = int(self.count[c][k])
+                row[c] = {"count": n, "mean": float(self.mean[c][k]) if n else None, "std": float(self.std(c)[k]) if n > 1 else None,
+                          "min": float(self.min[c][k]) if n else None, "max": float(self.max[c][k]) if n else None}
+            rows.append(row)
+        return rows
+
+    def table(self):                                    # Método que devuelve las lineas de una tabla de texto con la media y la desviación estándar de cada etapa
+        lines = ["  step throttle " + "".join("%22s" % (c + " mean±std") for c in self.channels)]
+        for k in range(len(self.throttles)):
+            cells = ""
+            for c in self.channels:
+                n = self.count[c][k]
+                cells += "%22s" % (("%.4g±%.2g" % (self.mean[c][k], self.std(c)[k] if n > 1 else 0)) if n else "-")
+            lines.append("  %4d %8.2f " % (k, self.throttles[k]) + cells)
+        return lines
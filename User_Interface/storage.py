@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Módulo de almacenamiento de Sampler. Contiene los juegos de datos que se guardan en cada sesión de muestreo en formato columnar:
+# marcas temporales en milisegundos como uint32 y lecturas como float32. Los vectores crecen de manera geométrica (duplicando su
+# capacidad), por lo que insertar lecturas cuesta O(1) amortizado sin importar la duración de la sesión.
+#
+# Las sesiones pueden respaldarse en disco ('mappedData'): cada canal se escribe en archivos de solo inserción mapeados en memoria,
+# de los cuales únicamente una ventana reciente permanece residente en RAM. El encabezado de cada canal guarda la cantidad de
+# lecturas escritas, por lo que una sesión interrumpida (p. ej. el programa fue cerrado a la fuerza) se puede recuperar. Las sesiones
+# concluidas se pueden abrir en modo de solo lectura ('readOnly'), sin modificar sus archivos (p. ej. desde el catálogo).
+#
+#   <sesión>/<canal>.t      Encabezado de 64 bytes (ver HEADER) seguido de las marcas temporales (uint32)
+#   <sesión>/<canal>.y      Lecturas (float32)
+
+import os
+import mmap
+import numpy as np
+
+
+CHANNELS = ("T", "M", "R")                              # Canales medidos en cada sesión: Tracción, Torque y velocidad angular
+DERIVED = ("P", "E", "CT", "CQ")                        # Canales derivados de los medidos sobre una base temporal común: potencia, tracción por potencia y
+                                                        # coeficientes de tracción y torque. Vease 'fusion.py'
+
+HEADER = np.dtype([("magic", "S8"), ("count", "<u8"), ("yMax", "<f8"), ("closed", "<u8"), ("pad", "V32")])    # Encabezado de los archivos de canal (64 bytes)
+MAGIC = b"SMPLR001"
+
+
+class recordedData:                                     # Clase de un canal de lecturas. Guarda los datos mismos, el máximo y la cuenta de cuantos datos han sido ingresados
+    __slots__ = ("t", "y", "dataCount", "yMax")
+
+    def __init__(self, capacity=1024):
+        self.t = np.zeros(capacity, np.uint32)          # Marcas temporales (ms)
+        self.y = np.zeros(capacity, np.float32)         # Lecturas
+        self.dataCount = 0
+        self.yMax = 0.0
+
+    def __len__(self):
+        return self.dataCount
+
+    def extend(self, t, y):                             # Método para insertar un bloque de nuevas lecturas al final del canal
+        n = len(t)
+        if n == 0:
+            return
+        if self.dataCount + n > len(self.t):            # -> En caso de no tener capacidad suficiente, incrementar el tamaño de los vectores
+            self.increaseSize(self.dataCount + n)
+        self.t[self.dataCount:self.dataCount+n] = t
+        self.y[self.dataCount:self.dataCount+n] = y
+        self.dataCount += n
+        self.verifyMaximun(y)
+
+    def increaseSize(self, required):                   # Método para incrementar la capacidad de los vectores al doble (o a 'required' si es mayor). Copia
+        capacity = max(2*len(self.t), required)         # los datos existentes una sola vez por duplicación, en lugar de cada 100 lecturas
+        t = np.zeros(capacity, np.uint32)
+        y = np.zeros(capacity, np.float32)
+        t[:self.dataCount] = self.t[:self.dataCount]
+        y[:self.dataCount] = self.y[:self.dataCount]
+        (self.t, self.y) = (t, y)
+
+    def verifyMaximun(self, yNew):                      # Método para verificar si las lecturas más recientes son mayores que el máximo histórico
+        yNew = float(yNew[np.argmax(np.abs(yNew))])
+        if abs(yNew) > abs(self.yMax):
+            self.yMax = yNew
+        return self.yMax
+
+    def view(self):                                     # Método que devuelve vistas (sin copiar) de las lecturas ingresadas, para gráficar o exportar
+        return (self.t[:self.dataCount], self.y[:self.dataCount])
+
+    def last(self):                                     # Método que devuelve la última lectura ingresada, o 0 si el canal esta vacio
+        return float(self.y[self.dataCount-1]) if self.dataCount else 0.0
+
+
+class mappedData(recordedData):                         # Clase de un canal de lecturas respaldado en disco. Misma interfaz que 'recordedData'; los vectores 't' y 'y' son
+    __slots__ = ("path", "maps", "header", "hot", "released", "readOnly")  # vistas de archivos mapeados en memoria, por lo que 'view()' tampoco copia. En modo
+                                                                            # 'readOnly' los archivos deben existir y no se modifican (ni su encabezado)
+    def __init__(self, path, capacity=1 << 16, hot=1 << 20, readOnly=False):
+        self.path = path                                # Ruta base de los archivos del canal, sin extensión
+        self.hot = hot                                  # Cantidad de lecturas recientes que se mantienen residentes en RAM
+        self.released = 0                               # Lecturas anteriores a este indice ya fueron liberadas de la RAM
+        self.readOnly = readOnly
+        self.maps = None
+        if readOnly or os.path.exists(path + ".t"):     # -> Si los archivos existen, abrir el canal con las lecturas indicadas en el encabezado
+            capacity = (os.path.getsize(path + ".t") - HEADER.itemsize) // 4
+            if readOnly:
+                capacity = min(capacity, os.path.getsize(path + ".y") // 4)
+            self.mapFiles(capacity)
+            if self.header["magic"][0] != MAGIC:
+                raise ValueError("Not a Sampler channel file: " + path + ".t")
+            self.dataCount = min(int(self.header["count"][0]), capacity, os.path.getsize(path + ".y") // 4)
+            self.yMax = float(self.header["yMax"][0])
+        else:                                           # -> De lo contrario, crear archivos vacios
+            self.mapFiles(capacity)
+            self.header["magic"] = MAGIC
+            self.dataCount = 0
+            self.yMax = 0.0
+        if not readOnly:
+            self.header["closed"] = 0
+
+    def mapFiles(self, capacity):                       # Método para ajustar el tamaño de los archivos a 'capacity' lecturas y mapearlos en memoria. Los mapas anteriores
+        maps = []                                       # se liberan cuando ya no existen vistas suyas (p. ej. las que guardan las gráficas)
+        for (ext, offset) in ((".t", HEADER.itemsize), (".y", 0)):
+            with open(self.path + ext, "rb" if self.readOnly else "a+b") as f:
+                size = offset + 4*capacity
+                if self.readOnly:                       # -> Vistas de solo lectura; los archivos no cambian de tamaño
+                    maps.append(mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) if size else b"")
+                    continue
+                if os.path.getsize(self.path + ext) < size:
+                    f.truncate(size)                    # -> Los archivos crecen de manera dispersa; el espacio en disco se ocupa al escribir
+                maps.append(mmap.mmap(f.fileno(), size))
+        self.maps = maps
+        self.header = np.frombuffer(maps[0], HEADER, 1)
+        self.t = np.frombuffer(maps[0], np.uint32, capacity, HEADER.itemsize)
+        self.y = np.frombuffer(maps[1], np.float32, capacity)
+
+    def increaseSize(self, required):                   # Método para incrementar la capacidad de los archivos al doble (o a 'required' si es mayor). A diferencia de
+        self.flush()                                    # 'recordedData', las lecturas no se copian: se vuelven a mapear los mismos archivos con mayor tamaño
+        self.mapFiles(max(2*len(self.t), required))
+        self.released = 0
+
+    def extend(self, t, y):                             # Método para insertar un bloque de nuevas lecturas. Las lecturas se escriben antes que la cuenta del encabezado,
+        super().extend(t, y)                            # por lo que el encabezado nunca indica lecturas que no hayan sido escritas
+        self.header["count"] = self.dataCount
+        self.header["yMax"] = self.yMax
+        if self.dataCount - self.released > 2*self.hot:
+            self.releaseCold(self.dataCount - self.hot)
+
+    def releaseCold(self, stop):                        # Método para liberar de la RAM las lecturas anteriores al indice 'stop'. Las páginas se escriben en el archivo y
+        for (m, offset) in ((self.maps[0], HEADER.itemsize), (self.maps[1], 0)):   # el sistema operativo las vuelve a leer de disco solo si se consultan
+            end = (offset + 4*stop) // mmap.PAGESIZE * mmap.PAGESIZE
+            if end > mmap.PAGESIZE:
+                m.flush(mmap.PAGESIZE, end - mmap.PAGESIZE)
+                if hasattr(m, "madvise"):
+                    m.madvise(mmap.MADV_DONTNEED, mmap.PAGESIZE, end - mmap.PAGESIZE)   # -> La primer página (encabezado) se conserva residente
+        self.released = stop
+
+    def flush(self):                                    # Método para escribir en disco las lecturas pendientes
+        if self.readOnly:
+            return
+        for m in self.maps:
+            m.flush()
+
+    def close(self):                                    # Método para marcar el canal como concluido y escribirlo en disco
+        if self.readOnly:
+            return
+        self.header["closed"] = 1
+        self.flush()
+
+
+class sessionStore:                                     # Clase de una sesión de muestreo. Agrupa un 'recordedData' por canal. Si se especifica un directorio 'path', las
+    __slots__ = ("channels", "raw", "path", "meta")    # lecturas se respaldan en disco por medio de 'mappedData' (o se recuperan, si el directorio ya existe)
+
+    def __init__(self, capacity=1024, path=None, readOnly=False):  # En modo 'readOnly' se abre una sesión respaldada sin modificar sus archivos; los canales sin
+        self.path = path                                            # archivos (p. ej. de una versión anterior) quedan vacios
+        self.meta = None                                # Metadatos de la sesión concluida. Vease 'samplerEngine.finishSession()'
+        if path is None:
+            self.channels = {c: recordedData(capacity) for c in CHANNELS + DERIVED}
+            self.raw = {c: recordedData(capacity) for c in CHANNELS}    # Lecturas de cada canal antes de filtrar. Vease 'filters.py'
+        elif readOnly:
+            self.channels = {c: readOnlyChannel(os.path.join(path, c)) for c in CHANNELS + DERIVED}
+            self.raw = {c: readOnlyChannel(os.path.join(path, "raw" + c)) for c in CHANNELS}
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.channels = {c: mappedData(os.path.join(path, c)) for c in CHANNELS + DERIVED}
+            self.raw = {c: mappedData(os.path.join(path, "raw" + c)) for c in CHANNELS}
+
+    def __getitem__(self, channel):
+        return self.channels[channel]
+
+    def extend(self, arrays):                           # Método para insertar en bloque las lecturas de varios canales. Requiere un diccionario {canal: (t, y)}
+        for (channel, (t, y)) in arrays.items():
+            self.channels[channel].extend(t, y)
+
+    def view(self, channel):                            # Método que devuelve las vistas (t, y) de un canal
+        return self.channels[channel].view()
+
+    def rawView(self, channel):                         # Método que devuelve las lecturas sin filtrar de un canal, alineadas con 'view()'. Los canales derivados y las
+        y = self.raw[channel].view()[1] if channel in self.raw else []  # sesiones guardadas sin ellas (p. ej. recuperadas de una versión anterior)
+        return y if len(y) == len(self.channels[channel]) else self.channels[channel].view()[1]     # devuelven las lecturas filtradas
+
+    def close(self):                                    # Método llamado al concluir la sesión. Marca la sesión respaldada en disco como concluida
+        if self.path is not None:
+            for record in list(self.channels.values()) + list(self.raw.values()):
+                record.close()
+
+
+def readOnlyChannel(path):                              # Función que abre un canal respaldado en modo de solo lectura. Los canales sin archivos o con archivos
+    try:                                                # truncados (sin encabezado completo o sin lecturas) se abren vacios
+        complete = os.path.getsize(path + ".t") >= HEADER.itemsize and os.path.isfile(path + ".y")
+    except OSError:
+        complete = False
+    return mappedData(path, readOnly=True) if complete else recordedData(0)
+
+
+def interruptedSessions(directory):                     # Función que devuelve las rutas de las sesiones respaldadas en 'directory' que no fueron concluidas (el programa
+    found = []                                          # se cerró durante el muestreo) y contienen lecturas. Se pueden recuperar con 'sessionStore(path=ruta)'
+    if not os.path.isdir(directory):
+        return found
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        headers = [os.path.join(path, c + ".t") for c in CHANNELS]
+        if not all(os.path.isfile(h) for h in headers):
+            continue
+        for h in headers:
+            header = np.fromfile(h, HEADER, 1)
+            if len(header) and header[0]["magic"] == MAGIC and not header[0]["closed"] and header[0]["count"]:
+                found.append(path)
+                break
+    return found
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+# Configuración de las pruebas de Sampler. Los módulos de la interfaz se importan por nombre desde el directorio padre, igual que al
+# ejecutar 'sampler.py' o 'main.py'. Para ejecutarlas: python -m pytest User_Interface/tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+# Pruebas de las cadenas de filtros por defecto ('samplerEngine.filterSpec'): un escalón real con ruido, como el de un cambio de etapa,
+# debe llegar sin modificar a las gráficas, los canales derivados y el archivo exportado.
+
+import numpy as np
+import pytest
+
+from engine import samplerEngine
+from filters import filterChain
+
+
+def noisyStep(before, after, noise, n=200, block=7):    # Función que devuelve los bloques (t, y) de un escalón con ruido a la mitad de 'n' lecturas
+    rng = np.random.default_rng(0)
+    y = np.where(np.arange(n) < n // 2, before, after) + rng.normal(0, noise, n)
+    t = np.arange(n) * 12
+    return [(t[i:i+block], y[i:i+block]) for i in range(0, n, block)]
+
+
+@pytest.mark.parametrize("channel, before, after, noise", [("T", 0.2, 0.9, 0.003), ("M", 0.01, 0.04, 0.0005), ("R", 1200.0, 4500.0, 25.0)])
+def test_default_chain_passes_a_step_unchanged(channel, before, after, noise):
+    chain = filterChain(samplerEngine.filterSpec[channel])
+    for (t, y) in noisyStep(before, after, noise):
+        assert np.array_equal(chain.apply(t, y), y)
+    assert chain.rejected() == 0
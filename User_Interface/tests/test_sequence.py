@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+# Pruebas de los números de secuencia del enlace con el banco de pruebas virtual ('simulator.py'), que reproduce las ordenes y la
+# numeración de TestBankMain3.ino: cada lectura exportada (tracción, torque M1 y M2, velocidad angular) lleva exactamente un número.
+
+import struct
+import time
+
+import numpy as np
+import pytest
+
+from protocol import CH_T, CH_M1, CH_M2, CH_R, asciiDecoder, binaryDecoder
+from simulator import virtualTestBank
+
+
+def linkedBank(fmt, **options):                         # Función que abre el banco virtual y completa el saludo de velocidad, habilitando los números de secuencia
+    bank = virtualTestBank(**options)
+    bank.timeout = 0.05
+    bank.write(b"U1000000\n")
+    assert b"[BAUD: 1000000]" in bank.read(4096)
+    bank.baudrate = 1000000
+    bank.write(b"V" + fmt)
+    reply = bank.read(4096)
+    assert b"[BAUD: OK]" in reply
+    return bank
+
+
+def stream(bank, decoder, seconds):                     # Función que lee y decodifica durante 'seconds' segundos. Devuelve el vector de canales decodificados
+    channels = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        channels.append(decoder.feed(bank.read(65536))[2])
+    return np.concatenate(channels)
+
+
+@pytest.mark.parametrize("fmt", [b"A", b"B"])
+def test_clean_stream_loses_nothing(fmt):               # Con T, M1/M2 y R intercalados, pausas, reinicios de las marcas temporales y cambios de Throttle
+    bank = linkedBank(fmt, cellRate=400.0)              # (también fuera del modo de lectura) no se debe contar ninguna lectura perdida
+    decoder = asciiDecoder() if fmt == b"A" else binaryDecoder(True)
+    bank.write(b"n" + struct.pack("I", 65))             # -> Un Throttle de 65 ('A') fuera del modo de lectura no se interpreta como orden
+    bank.write(b"Xr")
+    ch = [stream(bank, decoder, 0.35)]
+    for command in (b"n" + struct.pack("I", 40) + b"r", b"s", b"r", b"t", b"r"):
+        bank.write(command)
+        ch.append(stream(bank, decoder, 0.25))
+    bank.write(b"sY")
+    ch.append(stream(bank, decoder, 0.05))
+    ch = np.concatenate(ch)
+    for channel in (CH_T, CH_M1, CH_M2, CH_R):
+        assert np.any(ch == channel)
+    assert decoder.sequence.received == len(ch)         # -> Un número de secuencia por lectura
+    assert decoder.lost() == 0
+
+
+def test_lost_readings_are_counted():                   # Con pérdidas simuladas, la cuenta de lecturas perdidas debe coincidir con los saltos de la secuencia
+    bank = linkedBank(b"B", cellRate=400.0, loss=0.05)
+    decoder = binaryDecoder(True)
+    bank.write(b"Xr")
+    ch = stream(bank, decoder, 0.5)
+    assert decoder.lost() > 0
+    assert decoder.sequence.received == len(ch)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+# Pruebas de las sesiones del motor de adquisición ('engine.py') conectado al banco de pruebas virtual ('simulator.py').
+
+import time
+
+from export import loadSession
+from rigs import rigArray
+from sampler import runLoop
+from simulator import simulatedPorts, openSimulator
+
+
+def connectedEngine():                                  # Función que devuelve un motor conectado a un banco virtual, con sesiones solo en memoria
+    rigs = rigArray(1, "ascii", None, lister=lambda: simulatedPorts(1), portOpener=lambda port: openSimulator(port, cellRate=200.0))
+    engine = rigs.engines[0]
+    engine.log = lambda text: None
+    engine.start()
+    end = time.monotonic() + 5
+    while not engine.isConnected() and time.monotonic() < end:
+        engine.pollConnection()
+        time.sleep(0.05)
+    assert engine.isConnected()
+    return engine
+
+
+def runFor(engine, seconds):
+    end = time.monotonic() + seconds
+    runLoop(engine, lambda: time.monotonic() < end)
+
+
+def test_sweep_keeps_its_meta_when_steps_follow(tmp_path):     # Al cambiar de modo e iniciar etapas, la sesión de barrido anterior debe concluir con
+    engine = connectedEngine()                                  # sus propios metadatos, tanto en la sesión como en su archivo exportado
+    try:
+        engine.exportTo(str(tmp_path / "run"), ".npz")
+        engine.selectMode("Manual")
+        engine.startSweep()
+        engine.setThrottle(30)
+        runFor(engine, 0.4)
+        engine.selectMode("Auto Period")
+        engine.startSteps(500, 2, 0)
+        runLoop(engine, lambda: engine.readStatus == 1)
+    finally:
+        engine.stop()
+    (sweep, steps) = (engine.sessions[0].meta, engine.sessions[1].meta)
+    assert (sweep["mode"], sweep["period"], sweep["steps"], sweep["stepTiming"]) == ("Manual", 0, 0, [])
+    assert (steps["mode"], steps["period"], steps["steps"], len(steps["stepTiming"])) == ("Auto Period", 500, 2, 2)
+    (_, exported) = loadSession(str(tmp_path / "run_1.npz"))
+    assert (exported["mode"], exported["period"], exported["steps"]) == ("Manual", 0, 0)
+
+
+def test_unnumbered_export_writes_only_the_live_session(tmp_path):     # Sin numerar, las sesiones ya guardadas (p. ej. recuperadas) no deben escribirse en
+    engine = connectedEngine()                                          # el mismo archivo que la sesión activa
+    try:
+        engine.selectMode("Manual")
+        engine.startSweep()
+        runFor(engine, 0.3)
+        engine.pauseSweep()
+        engine.finishSession()
+        engine.abort()                                  # -> La siguiente orden de barrido inicia una sesión nueva
+        engine.exportTo(str(tmp_path / "out"), ".npz", numbered=False)
+        engine.startSweep()
+        runFor(engine, 0.3)
+        engine.pauseSweep()
+        engine.finishSession()
+    finally:
+        engine.stop()
+    (channels, meta) = loadSession(str(tmp_path / "out.npz"))
+    assert meta["session"] == 2
+    assert len(channels["T"]["t"]) == len(engine.sessions[1]["T"])
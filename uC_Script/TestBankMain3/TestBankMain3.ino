@@ -3,13 +3,17 @@
 #define calibF -260000.0
 
 /* 
-BAUDRATE = 57600
+BAUDRATE = 57600 (inicial; Sampler la eleva con la literal U)
 Literal X: Lectura de Barrido
 Literal Y: Salir de cualquier modo
 Literal r: Empezar 
 Literal s: Parar
 Literal t: Reiniciar las marcas temporales
 Literal n: Cambia la configuración de Throttle del ESC. Uso exclusivo de Sampler
+Literal A: Exportar lecturas en formato ASCII (por defecto). Responde "[FMT: ASC]"
+Literal B: Exportar lecturas en formato binario. Responde "[FMT: BIN]"
+Literal U: Cambiar la velocidad del puerto, seguida de los baudios y un fin de linea (p. ej. "U1000000\n"). Responde "[BAUD: <baudios>]" o "[BAUD: NO]"
+Literal V: Confirmar la nueva velocidad. Responde "[BAUD: OK]" y habilita los números de secuencia de las lecturas
 */
 
 const byte pinData0 = 4;    // Asignación de pines para los HX711
@@ -40,11 +44,30 @@ volatile byte rpmState = HIGH;                      // Variable que guarda el es
 volatile int timeIndex = 0;                         // Variable encargada de recordar cuantos periodos del vector rpmTimeDelta han sido medidos
                                                     // antes de enviar un promedio de estos
 
+const byte FRAME_SYNC = 0xA5;                       // Byte de sincronía de las tramas binarias. Vease 'protocol.py' en Sampler
+const byte CH_T = 0;                                // Identificadores de canal de las tramas binarias
+const byte CH_M1 = 1;
+const byte CH_M2 = 2;
+const byte CH_R = 3;
+
+byte binMode = 0;                                   // Flag encargada de indicar el formato de exportación (0 = ASCII, 1 = binario)
+
+const long BAUDRATES[] = {1000000, 500000, 250000, 115200, 57600};   // Velocidades admitidas por la literal U. 1 Mbaud, 500 kbaud y 250 kbaud son exactas a 16 MHz
+const unsigned long LINK_WINDOW = 1000;             // Milisegundos que se espera la confirmación de una nueva velocidad antes de regresar a 57600 baudios
+
+byte seqMode = 0;                                   // Flag encargada de indicar si las lecturas llevan número de secuencia (1 = si, habilitado por el saludo de velocidad)
+unsigned int seq = 0;                               // Número de secuencia de la siguiente lectura. Sampler lo utiliza para contar las lecturas perdidas
+
 union period {            // Creación de un nuevo tipo de variable que permite crear variables cuyos valores pueden ser asignados en formato byte o long
   unsigned long t=0;
   byte b[4];
 };
 
+union reading {           // Análogo a "period" para las lecturas de tipo float de las tramas binarias
+  float f;
+  byte b[4];
+};
+
 
 HX711 loadCell;          // Asignación de las celdas a la clase HX711
 HX711 loadCellM1;
@@ -101,13 +124,17 @@ void loop() {       // Bucle de operación principal
     char M;               // Variable encargada de guardar las ordenes, en formato de literales, del usuario o de Sampler. Las ordenes y sus equivalentes 
                           // literales se encuentran en el comentario al inicio de este script. Se repiten a continuación:
                           /* 
-BAUDRATE = 57600
+BAUDRATE = 57600 (inicial)
 Literal X: Iniciar modo Lectura de Barrido
 Literal Y: Salir de cualquier modo
 Literal r: Empezar lectura
 Literal s: Parar lectura
 Literal t: Reiniciar las marcas temporales
 Literal n: Cambia la configuración de Throttle del ESC. Uso exclusivo de Sampler
+Literal A: Exportar lecturas en formato ASCII
+Literal B: Exportar lecturas en formato binario
+Literal U: Cambiar la velocidad del puerto
+Literal V: Confirmar la nueva velocidad
 */             
     
     M = Serial.read();    // Lee el buffer del puerto COM en busca de ordenes
@@ -127,14 +154,11 @@ Literal n: Cambia la configuración de Throttle del ESC. Uso exclusivo de Sample
           }
 
           if (digitalRead(pinData0) == LOW) {                 // Si loadCell se encuentra lista para la lectura:
-            sendSampleData(loadCell, "[HX7T]", "Kg");               // Exportar lectura de fuerza
-            sendSampleTime(tp, tk);                                 // Exportar marca temporal de la lectura
+            sendSample(loadCell, CH_T, "[HX7T]", "Kg", tp, tk);     // Exportar lectura de fuerza y su marca temporal
           }
           if (digitalRead(pinData1) == LOW) {                 // Si loadCellM1 se encuentra lista para la lectura:
-            sendSampleData(loadCellM1, "[HX7M1]", "Kg.m");          // Exportar lecturas de fuerza y marcas temporales
-            sendSampleTime(tp, tk);
-            sendSampleData(loadCellM2, "[HX7M2]", "Kg.m");
-            sendSampleTime(tp, tk);
+            sendSample(loadCellM1, CH_M1, "[HX7M1]", "Kg.m", tp, tk);   // Exportar lecturas de fuerza y marcas temporales
+            sendSample(loadCellM2, CH_M2, "[HX7M2]", "Kg.m", tp, tk);
           }
           checkRPM(i, tp, tk);                                // Revisar si se debe exportar la lectura de la sonda de RPM
           digitalWrite(LED_BUILTIN, LOW);
@@ -145,6 +169,14 @@ Literal n: Cambia la configuración de Throttle del ESC. Uso exclusivo de Sample
           break;                                // Rompe el ciclo contenedor del condicional anidado. En este caso, "while(int j=1 > 0)"
         } else if (M == 'n') {            // En caso de recibir la literal "n":
           checkCOMforPWM();                     // Recibir la nueva configuración para Throttle del ESC. Vease la función "void checkCOMforPWM()"
+        } else if (M == 'A' || M == 'B') {  // En caso de recibir las literales "A" o "B":
+          setLinkFormat(M);                     // Cambiar el formato de exportación y regresar al estado previo (en ejecución o en pausa)
+          M = (i == 2) ? 'r' : 's';
+        } else if (M == 'U' || M == 'V') {  // En caso de recibir las literales "U" o "V" (una confirmación repetida del saludo):
+          if (M == 'U') {
+            negotiateBaud();                    // Cambiar la velocidad del puerto. Vease la función "void negotiateBaud()"
+          }
+          M = (i == 2) ? 'r' : 's';             // Regresar al estado previo (en ejecución o en pausa)
         }
         
         if (M == 's' && i == 2) {         // En caso de recibir la literal "s":
@@ -156,6 +188,12 @@ Literal n: Cambia la configuración de Throttle del ESC. Uso exclusivo de Sample
           delay(80);
         }
       }
+    } else if (M == 'A' || M == 'B') {    // En caso de recibir las literales "A" o "B" fuera de un modo de lectura:
+      setLinkFormat(M);                       // Cambiar el formato de exportación. Vease la función "void setLinkFormat()"
+    } else if (M == 'U') {                // En caso de recibir la literal "U" fuera de un modo de lectura:
+      negotiateBaud();                        // Cambiar la velocidad del puerto. Vease la función "void negotiateBaud()"
+    } else if (M == 'n') {                // En caso de recibir la literal "n" fuera de un modo de lectura:
+      checkCOMforPWM();                       // Recibir la nueva configuración para Throttle del ESC. Sus 4 bytes se consumen aquí para no interpretarlos como ordenes
     }
   }
 }
@@ -188,6 +226,80 @@ void sendSampleData(HX711 loadCell, String type, String Units) {    // Función
   Serial.print(" ");
 }
 
+void sendSample(HX711 loadCell, byte ch, String type, String Units, unsigned long tp, unsigned long tk) {   // Función para exportar una lectura de celda con su
+  if (binMode == 1) {                                                                                     // marca temporal en el formato de exportación activo
+    sendFrame(ch, millis()-tp + tk, loadCell.get_units()*(-1));
+  } else {
+    sendSampleData(loadCell, type, Units);
+    sendSampleTime(tp, tk);
+  }
+}
+
+void sendFrame(byte ch, unsigned long t, float value) {    // Función para exportar una lectura como trama binaria: sync, canal, secuencia (si seqMode = 1), tiempo,
+  period tb;                                               // lectura y checksum
+  reading vb;
+  tb.t = t;
+  vb.f = value;
+  byte frame[13];
+  byte n = 0;
+  frame[n++] = FRAME_SYNC;
+  frame[n++] = ch;
+  if (seqMode == 1) {                                      // Número de secuencia de 16 bits, LE
+    frame[n++] = lowByte(seq);
+    frame[n++] = highByte(seq);
+    seq++;
+  }
+  byte chk = 0;
+  for (byte k = 0; k < 4; k++) {
+    frame[n + k] = tb.b[k];
+    frame[n + 4 + k] = vb.b[k];
+  }
+  n += 8;
+  for (byte k = 1; k < n; k++) {                           // Checksum: XOR de todos los bytes excepto el de sincronía
+    chk ^= frame[k];
+  }
+  frame[n] = chk;
+  Serial.write(frame, n + 1);
+}
+
+void setLinkFormat(char M) {               // Función para cambiar el formato de exportación de lecturas y confirmar el cambio a Sampler
+  binMode = (M == 'B') ? 1 : 0;
+  Serial.print(binMode == 1 ? "[FMT: BIN]" : "[FMT: ASC]");
+  Serial.println();
+}
+
+void negotiateBaud() {                     // Función del saludo de velocidad. Recibe los baudios solicitados por Sampler, responde a la velocidad actual, cambia de
+  long rate = Serial.parseInt();           // velocidad y espera la confirmación ('V') durante LINK_WINDOW ms. Sin confirmación regresa a 57600 baudios
+  boolean supported = false;
+  for (byte k = 0; k < sizeof(BAUDRATES)/sizeof(BAUDRATES[0]); k++) {
+    if (BAUDRATES[k] == rate) {
+      supported = true;
+    }
+  }
+  if (!supported) {                        // En caso de no admitir la velocidad, conservar la actual
+    Serial.print("[BAUD: NO]");
+    Serial.println();
+    return;
+  }
+  Serial.print("[BAUD: ");
+  Serial.print(rate);
+  Serial.print("]");
+  Serial.println();
+  Serial.flush();                          // Esperar a que la respuesta termine de enviarse a la velocidad actual
+  Serial.begin(rate);
+  unsigned long t0 = millis();
+  while (millis() - t0 < LINK_WINDOW) {    // Los bytes recibidos a una velocidad distinta llegan corruptos y se ignoran
+    if (Serial.available() > 0 && Serial.read() == 'V') {
+      seqMode = 1;                         // Confirmada la velocidad, habilitar los números de secuencia a partir de 0
+      seq = 0;
+      Serial.print("[BAUD: OK]");
+      Serial.println();
+      return;
+    }
+  }
+  Serial.begin(57600);                     // Sin confirmación, regresar a la velocidad inicial
+}
+
 void checkRPM(byte i, unsigned long tp, unsigned long tk) {         // Función para revisar si es necesario exportar la lectura de RPM
   if (millis() > rpmTimer && i == 2) {                              // En caso de que el tiempo de ejecución haya superado el límite establecido para exportar la lectura, y que
                                                                     // el programa se encuentre en ejecución, (Flag i = 2):
@@ -201,8 +313,12 @@ void checkRPM(byte i, unsigned long tp, unsigned long tk) {         // Función
     }
     timeIndex = 0;                                                        // Reiniciar la cuenta de periodos validos guardados entre el paso de palas
     interrupts();                                                         // Habilitar las interrupciones
-    sendRPMData(rpm);                                                     // Exportar las lecturas de rpm
-    sendSampleTime(tp, tk);                                               // Exportar la marca temporal del instante en el que se exportó la lectura
+    if (binMode == 1) {                                                   // Exportar las lecturas de rpm y la marca temporal del instante en el que se exportó la
+      sendFrame(CH_R, millis()-tp + tk, rpm);                             // lectura, en el formato de exportación activo
+    } else {
+      sendRPMData(rpm);
+      sendSampleTime(tp, tk);
+    }
     rpmTimer = rpmTimer + 100;                                            // Incrementar el límite de tiempo para exportar nuevamente la lectura de rpm
   }
 }
@@ -228,9 +344,13 @@ void sendRPMData(double rpm) {            // Función análoga a "sendSampleData
   Serial.print(" rpm ");
 }
 
-void sendSampleTime(unsigned long tp, unsigned long tk) {   // Función análoga a "sendSampleData" para las marcas temporales
-  Serial.print(millis()-tp + tk);
+void sendSampleTime(unsigned long tp, unsigned long tk) {   // Función análoga a "sendSampleData" para las marcas temporales. Termina la linea con su número de
+  Serial.print(millis()-tp + tk);                           // secuencia, si el saludo de velocidad lo habilitó
   Serial.print(" ms");
+  if (seqMode == 1) {
+    Serial.print(" #");
+    Serial.print(seq++);
+  }
   Serial.println();
 }
 